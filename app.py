@@ -1,32 +1,80 @@
 import os
+import io
 import sqlite3
 import re
-from flask import Flask, request, render_template, redirect, flash, url_for, session, send_file, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+import hmac
+import importlib
+import tempfile
+import time
+from flask import Flask, request, render_template, redirect, flash, url_for, session, send_file, jsonify, abort, stream_with_context
 from dotenv import load_dotenv
-import google.generativeai as genai
 from calc_job import calc_job_tax_new_regime 
 from calc_bus import calc_bus_tax_new_regime 
 from calc_gst import calculate_gst 
-from pdf_gen import create_tax_report as create_job_report
-from bus_pdf_gen import create_tax_report as create_business_report
+from tax_optimizer import compare_regimes
+from tax_slabs import get_slab_table
+import db
+from db import close_db, get_db
+import metrics
+from metrics import REGISTRY, observe_pdf
+import session_store
+import startup
+import assets
+import page_cache
+import passwords
+from passwords import PasswordHasherBusy, get_password_hasher
+from page_cache import render_cached
+from session_store import rotate_session
+import insights as ai_insights
+from database.rollups import record_business_result, record_job_result
+from database.gst_ledger import period_summary
+from insights import RESULT_TABLES, INSIGHTS_UNAVAILABLE, build_prompt, get_insight_worker
+import report_cache
+from report_cache import report_key, get_report_cache
+from bulk_reports import iter_report_jobs, iter_reports_zip, resolve_pans
 
 app = Flask(__name__)
 app.secret_key = 'your_super_secret_key_12345'
 
 load_dotenv()
 
+# Compiled templates are cached on disk for every worker; ReportLab and the Gemini SDK load on
+# first use, or here with PRELOAD_APP=1 for forking servers (see startup.py)
+startup.init_app(app)
+
 # Configure Gemini API key
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
+if not GEMINI_API_KEY:
     print("WARNING: GEMINI_API_KEY not found in .env file. AI features will be disabled.")
+# Insights are generated by a background worker (see insights.py)
+ai_insights.init_app(app, GEMINI_API_KEY)
+# Rendered PDF reports are cached by content (see report_cache.py)
+report_cache.init_app(app)
 
 # --- Database Configuration ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-db_dir = os.path.join(BASE_DIR, 'database')
-db_path = os.path.join(db_dir, 'mydata.db')
+# Connections come from a shared WAL-mode pool (see db.py); set DATABASE_PATH to use another file
+db.init_app(app)
+
+# Password hashing runs on a bounded pool; logins are refused fast when it is full (see passwords.py)
+passwords.init_app(app)
+
+# Session data is kept server-side; the cookie only carries its id (see session_store.py)
+session_store.init_app(app)
+
+# Templates link static files through asset_url(); after `python -m assets` they are
+# fingerprinted, precompressed and cached for a year (see assets.py)
+assets.init_app(app)
+# Pages that are the same for every user are rendered once and served with an ETag (see page_cache.py)
+page_cache.init_app(app)
+
+# Request, SQL, Gemini and PDF timings, served at /metrics to holders of METRICS_TOKEN (see metrics.py)
+metrics.init_app(app)
+
+# Bulk report downloads (/admin/reports.zip) are disabled unless ADMIN_TOKEN is set
+app.config['ADMIN_TOKEN'] = os.getenv('ADMIN_TOKEN')
+
+if os.getenv('PRELOAD_APP'):
+    startup.preload(app)
 
 # --- Helper Function ---
 def get_float(key):
@@ -35,12 +83,33 @@ def get_float(key):
     except (ValueError, TypeError):
         return 0.0
 
+def queue_insights(worker, kind, result_id, prompt, insights):
+    """
+    Hands a saved result to the background insight worker unless its insights
+    were already known (cached, or AI disabled).
+    Returns (insights, insights_url): the URL the result page polls while the
+    insights are generated, or the fallback text if the worker is saturated.
+    """
+    if insights is not None:
+        return insights, None
+    if worker.submit(kind, result_id, prompt) is not None:
+        return "", url_for('result_insights', kind=kind, result_id=result_id)
+    worker.save(RESULT_TABLES[kind], result_id, INSIGHTS_UNAVAILABLE)
+    return INSIGHTS_UNAVAILABLE, None
+
+def too_busy():
+    """
+    Fast rejection while the password hashing pool is saturated.
+    """
+    flash("We're handling a lot of logins right now. Please try again in a few seconds.")
+    return render_template('sign-up.html'), 503, {'Retry-After': '2'}
+
 # ===================================================================
 # --- General and User Management Routes ---
 # ===================================================================
 @app.route('/')
 def landing():
-    return render_template('landingpage.html')
+    return render_cached('landingpage.html')
 
 @app.route('/signup', methods=['GET', 'POST'])
 def signup():
@@ -50,33 +119,48 @@ def signup():
         if not pan or not password:
             flash("Please fill in all details!")
             return redirect(url_for('signup'))
-        with sqlite3.connect(db_path) as conn:
+        # Hash before taking a pooled connection, so a queued hash never holds one
+        try:
+            password_hash = get_password_hasher(app).hash(password)
+        except PasswordHasherBusy:
+            return too_busy()
+        with get_db() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute('INSERT INTO user (PAN_ID, Password) VALUES (?, ?)', (pan, generate_password_hash(password)))
+                cursor.execute('INSERT INTO user (PAN_ID, Password) VALUES (?, ?)', (pan, password_hash))
                 conn.commit()
                 flash("Signup successful! Please log in.")
                 return redirect(url_for('signup'))
             except sqlite3.IntegrityError:
                 flash("This PAN number is already registered.")
                 return redirect(url_for('signup'))
-    return render_template('sign-up.html')
+    return render_cached('sign-up.html')
 
 @app.route('/login', methods=['POST'])
 def login():
     pan = request.form.get('PAN')
     password = request.form.get('pass')
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        user = cursor.execute('SELECT * FROM user WHERE PAN_ID = ?', (pan,)).fetchone()
-        if user and check_password_hash(user[2], password):
-            flash("Login successful!")
-            session.clear()
-            session['pan_id'] = pan
-            return redirect(url_for('dashboard'))
-        else:
-            flash("Invalid PAN or password.")
-            return redirect(url_for('signup'))
+    with get_db() as conn:
+        user = conn.execute('SELECT * FROM user WHERE PAN_ID = ?', (pan,)).fetchone()
+    # Hand the connection back while the hasher works, so queued logins don't drain the pool
+    close_db()
+    try:
+        ok, new_hash = get_password_hasher(app).verify(user[2], password) if user and password else (False, None)
+    except PasswordHasherBusy:
+        return too_busy()
+    if ok:
+        if new_hash:
+            # Stored with an older cost setting: upgrade it now that we know the password
+            with get_db() as conn:
+                conn.execute('UPDATE user SET Password = ? WHERE ID = ?', (new_hash, user[0]))
+        flash("Login successful!")
+        session.clear()
+        rotate_session(session)
+        session['pan_id'] = pan
+        return redirect(url_for('dashboard'))
+    else:
+        flash("Invalid PAN or password.")
+        return redirect(url_for('signup'))
 
 @app.route('/logout')
 def logout():
@@ -90,7 +174,7 @@ def dashboard():
     if 'pan_id' not in session:
         return redirect(url_for('signup'))
     
-    with sqlite3.connect(db_path) as conn:
+    with get_db() as conn:
         cursor = conn.cursor()
         mapping = cursor.execute('SELECT person_id FROM user_pan_mapping WHERE pan_id = ?', (session['pan_id'],)).fetchone()
         if not mapping:
@@ -127,7 +211,7 @@ def details():
         category = session.get('user_category')
         pan_id = session.get('pan_id')
         
-        with sqlite3.connect(db_path) as conn:
+        with get_db() as conn:
             cursor = conn.cursor()
             
             cursor.execute("INSERT OR IGNORE INTO people_info (name, fathers_guardian_name, date_of_birth, gender, email, aadhar_number, mobile_number) VALUES (?, ?, ?, ?, ?, ?, ?)",
@@ -159,7 +243,8 @@ def details():
                 conn.commit()
                 return redirect(url_for("job_details"))
                 
-    return render_template('comm_det.html')
+    # The form shows business or job fields depending on the chosen category
+    return render_cached('comm_det.html', variant=session.get('user_category'))
 
 # ===================================================================
 # --- Business User Workflow ---
@@ -178,7 +263,7 @@ def business_details():
             'gst_rate_sell': get_float('sell-gst'), 'type_of_supply_sell': request.form.get('tos-s')
         }
         return redirect(url_for("business_expenses"))
-    return render_template("buss_det.html")
+    return render_cached("buss_det.html")
 
 @app.route('/business/expenses', methods=['GET', 'POST'])
 def business_expenses():
@@ -193,20 +278,18 @@ def business_expenses():
             'other_deduction': get_float('other-ded')
         }
         return redirect(url_for("business_result"))
-    return render_template("buss_deduct.html")
+    return render_cached("buss_deduct.html")
+
+def business_result_figures(sess):
+    """
+    Works out a business result from the form data in `sess` (the session or a
+    copy of it): the row to save, the insight prompt and the page's figures.
+    """
+    bus_income = sess.get('business_income', {})
+    bus_details = sess.get('business_details', {})
+    bus_expenses = sess.get('business_expenses', {})
+    fin_deductions = sess.get('finance_deduction', {})
 
-@app.route('/business/result')
-def business_result():
-    required_keys = ['business_income', 'business_details', 'business_expenses', 'pan_id']
-    if not all(key in session for key in required_keys):
-        flash("Session data is missing. Please restart the calculation.")
-        return redirect(url_for('business_details'))
-
-    bus_income = session.get('business_income', {})
-    bus_details = session.get('business_details', {})
-    bus_expenses = session.get('business_expenses', {})
-    fin_deductions = session.get('finance_deduction', {})
-    
     gross_revenue = bus_income.get('total_income', 0)
     total_expenses = sum(bus_expenses.values())
     final_tax_payable, net_taxable_income = calc_bus_tax_new_regime(gross_revenue, total_expenses)
@@ -218,31 +301,68 @@ def business_result():
     )
     final_gst_payable = gst_results['net_payable']['total']
 
-    insights = ""
-    if GEMINI_API_KEY:
-        try:
-            prompt = f"Analyze this business data and provide 2-3 simple tax tips: Revenue ₹{gross_revenue:,.2f}, Expenses ₹{total_expenses:,.2f}, 80C Investment ₹{fin_deductions.get('section_80c', 0):,.2f}"
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(prompt)
-            insights = response.text
-        except Exception as e:
-            print(f"Error calling Gemini API: {e}")
-            insights = "Could not generate AI insights at this time."
-
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO tax_results_business (person_id, pan_id, business_id, gross_income, net_taxable_income, gst_payable, final_tax_payable, insights)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (session.get('person_id'), session.get('pan_id'), session.get('business_id'), gross_revenue, net_taxable_income, final_gst_payable, final_tax_payable, insights))
-        conn.commit()
-
-    return render_template(
-        "tax_result_bus.html",
-        gross_income=round(gross_revenue, 2), net_taxable_income=round(net_taxable_income, 2),
-        gst_payable=round(final_gst_payable, 2), final_tax_payable=round(final_tax_payable, 2),
-        insights=insights
-    )
+    return {
+        'row': (sess.get('person_id'), sess.get('pan_id'), sess.get('business_id'), gross_revenue, net_taxable_income,
+                final_gst_payable, final_tax_payable),
+        'prompt': build_prompt('business', revenue=gross_revenue, expenses=total_expenses,
+                               section_80c=fin_deductions.get('section_80c', 0)),
+        'page': dict(gross_income=round(gross_revenue, 2), net_taxable_income=round(net_taxable_income, 2),
+                     gst_payable=round(final_gst_payable, 2), final_tax_payable=round(final_tax_payable, 2)),
+    }
+
+def save_business_result(conn, row, insights):
+    """
+    Saves a business result and updates its rollup. Returns the new row id.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO tax_results_business (person_id, pan_id, business_id, gross_income, net_taxable_income, gst_payable, final_tax_payable, insights)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', row + (insights,))
+    result_id = cursor.lastrowid
+    record_business_result(cursor, result_id)
+    conn.commit()
+    return result_id
+
+@app.route('/business/result')
+def business_result():
+    required_keys = ['business_income', 'business_details', 'business_expenses', 'pan_id']
+    if not all(key in session for key in required_keys):
+        flash("Session data is missing. Please restart the calculation.")
+        return redirect(url_for('business_details'))
+
+    figures = business_result_figures(session)
+    worker = get_insight_worker(app)
+    insights = worker.cached(figures['prompt']) if worker else ""
+
+    with get_db() as conn:
+        # On a cache miss insights stays NULL until the background worker fills it in
+        result_id = save_business_result(conn, figures['row'], insights)
+
+    insights, insights_url = queue_insights(worker, 'business', result_id, figures['prompt'], insights)
+
+    return render_template("tax_result_bus.html", insights=insights, insights_url=insights_url, **figures['page'])
+
+TAX_PERIOD_RE = re.compile(r'\d{4}-(0[1-9]|1[0-2])')
+
+@app.route('/api/gst/<int:business_id>/<tax_period>')
+def gst_period_summary(business_id, tax_period):
+    """
+    GSTR-3B-style summary of one month of a business's invoice ledger (see database/gst_ledger.py).
+    Only the signed-in PAN's own businesses are served.
+    """
+    if 'pan_id' not in session or not TAX_PERIOD_RE.fullmatch(tax_period):
+        return jsonify({'error': 'not found'}), 404
+
+    with get_db() as conn:
+        owned = conn.execute('''
+            SELECT 1 FROM businesses b JOIN user_pan_mapping m ON m.person_id = b.person_id
+            WHERE m.pan_id = ? AND b.id = ?
+        ''', (session['pan_id'], business_id)).fetchone()
+        if not owned:
+            return jsonify({'error': 'not found'}), 404
+        summary = period_summary(conn.cursor(), business_id, tax_period)
+    return jsonify(summary)
 
 # ===================================================================
 # --- Job User Workflow ---
@@ -256,7 +376,7 @@ def job_details():
             'fd_interest': get_float('fd_interest'), 'other_income': get_float('other_income')
         }
         return redirect(url_for("job_deductions"))
-    return render_template("job_det.html")
+    return render_cached("job_det.html")
 
 @app.route('/job/deductions', methods=['GET', 'POST'])
 def job_deductions():
@@ -266,11 +386,50 @@ def job_deductions():
             'elss': get_float('elss'), 'home_loan_principal': get_float('home_loan_principal'),
             'tuition': get_float('tuition_fees'), 'other_80c': get_float('other_80c'),
             'health_ins_self': get_float('health_insurance_self'), 'health_ins_parents': get_float('health_insurance_parents'),
+            'nps': get_float('nps'),
             'home_loan_interest': get_float('home_loan_interest'), 'education_loan_interest': get_float('education_loan_interest'),
             'donations': get_float('donations'), 'tds': get_float('tds')
         }
         return redirect(url_for("job_result"))
-    return render_template("job_deduct.html")
+    return render_cached("job_deduct.html")
+
+def job_result_figures(sess):
+    """
+    Works out a job result from the form data in `sess` (the session or a copy
+    of it): the row to save, the insight prompt and the page's figures.
+    """
+    job_income = sess.get('job_income', {})
+    job_deductions = sess.get('job_deductions', {})
+
+    gross_income = sum(v for k, v in job_income.items() if k != 'financial_year')
+    tds = job_deductions.get('tds', 0)
+    final_tax_due, taxable_income = calc_job_tax_new_regime(gross_income, tds, job_income.get('financial_year'))
+    comparison = compare_regimes(gross_income, tds, job_deductions, job_income.get('financial_year'))
+
+    section_80c_total = sum(job_deductions.get(k, 0) for k in ['epf_ppf', 'life_ins', 'elss', 'home_loan_principal', 'tuition', 'other_80c'])
+    health_insurance_80d = job_deductions.get('health_ins_self', 0) + job_deductions.get('health_ins_parents', 0)
+
+    return {
+        'row': (sess.get('person_id'), sess.get('pan_id'), job_income.get('financial_year'),
+                gross_income, final_tax_due, taxable_income),
+        'prompt': build_prompt('job', gross_income=gross_income, section_80c=section_80c_total, section_80d=health_insurance_80d),
+        'page': dict(tax=round(final_tax_due, 2), net_income=round(taxable_income, 2),
+                     gross_income=round(gross_income, 2), comparison=comparison),
+    }
+
+def save_job_result(conn, row, insights):
+    """
+    Saves a job result and updates its rollup. Returns the new row id.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO tax_results_job (person_id, pan_id, financial_year, gross_income, tax, net_income, insights)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', row + (insights,))
+    result_id = cursor.lastrowid
+    record_job_result(cursor, result_id)
+    conn.commit()
+    return result_id
 
 @app.route('/job/result')
 def job_result():
@@ -278,160 +437,240 @@ def job_result():
         flash("Session data missing. Please restart the job calculation.")
         return redirect(url_for('job_details'))
 
-    job_income = session.get('job_income', {})
-    job_deductions = session.get('job_deductions', {})
+    figures = job_result_figures(session)
+    worker = get_insight_worker(app)
+    insights = worker.cached(figures['prompt']) if worker else ""
 
-    gross_income = sum(v for k, v in job_income.items() if k != 'financial_year')
-    tds = job_deductions.get('tds', 0)
-    final_tax_due, taxable_income = calc_job_tax_new_regime(gross_income, tds)
+    with get_db() as conn:
+        # On a cache miss insights stays NULL until the background worker fills it in
+        result_id = save_job_result(conn, figures['row'], insights)
 
-    insights = ""
-    if GEMINI_API_KEY:
-        try:
-            section_80c_total = sum(job_deductions.get(k, 0) for k in ['epf_ppf', 'life_ins', 'elss', 'home_loan_principal', 'tuition', 'other_80c'])
-            health_insurance_80d = job_deductions.get('health_ins_self', 0) + job_deductions.get('health_ins_parents', 0)
-            
-            prompt = f"Analyze this salaried employee's data and give 2-3 tax tips: Gross Salary ₹{gross_income:,.2f}, 80C Investments ₹{section_80c_total:,.2f}, 80D Health Insurance ₹{health_insurance_80d:,.2f}"
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            response = model.generate_content(prompt)
-            insights = response.text
-        except Exception as e:
-            print(f"Error calling Gemini API: {e}")
-            insights = "Could not generate AI insights at this time."
-
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO tax_results_job (person_id, pan_id, financial_year, gross_income, tax, net_income, insights)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            session.get('person_id'), session.get('pan_id'), job_income.get('financial_year'),
-            gross_income, final_tax_due, taxable_income, insights
-        ))
-        conn.commit()
-
-    return render_template(
-        "tax_result_job.html", 
-        tax=round(final_tax_due, 2), 
-        net_income=round(taxable_income, 2), 
-        gross_income=round(gross_income, 2),
-        insights=insights
-    )
+    insights, insights_url = queue_insights(worker, 'job', result_id, figures['prompt'], insights)
+
+    return render_template("tax_result_job.html", insights=insights, insights_url=insights_url, **figures['page'])
+
+# ===================================================================
+# --- AI Insights (filled in by the background worker) ---
+# ===================================================================
+def fetch_result_insights(conn, kind, result_id, pan_id):
+    """
+    Returns the /insights JSON for one of the PAN's results, or None if it is not theirs.
+    """
+    row = conn.execute(f'SELECT insights FROM {RESULT_TABLES[kind]} WHERE id = ? AND pan_id = ?',
+                       (result_id, pan_id)).fetchone()
+    if not row:
+        return None
+    return {'ready': row[0] is not None, 'insights': row[0] or ''}
+
+@app.route('/insights/<kind>/<int:result_id>')
+def result_insights(kind, result_id):
+    if 'pan_id' not in session or kind not in RESULT_TABLES:
+        return jsonify({'error': 'not found'}), 404
+
+    with get_db() as conn:
+        status = fetch_result_insights(conn, kind, result_id, session['pan_id'])
+    if status is None:
+        return jsonify({'error': 'not found'}), 404
+    return jsonify(status)
 
 # ===================================================================
 # --- Dashboard Routes (Corrected) ---
 # ===================================================================
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 200
+
+# Only the columns the charts and history table use; insights is cut to the
+# 100 characters the table shows (+1 so it still knows to add "...")
+HISTORY_COLUMNS = {
+    'business': 'id, created_at, gross_income, net_taxable_income, gst_payable, final_tax_payable, substr(insights, 1, 101) AS insights',
+    'job': 'id, created_at, financial_year, gross_income, tax, net_income, substr(insights, 1, 101) AS insights',
+}
+
+def fetch_history_page(conn, kind, pan_id, before_created_at=None, before_id=None, limit=HISTORY_PAGE_SIZE):
+    """
+    Returns one page of a PAN's history, newest first, using keyset pagination
+    on (created_at, id) so every page costs the same however deep it is.
+    next is the cursor for the following (older) page, or None on the last one.
+    """
+    query = f'SELECT {HISTORY_COLUMNS[kind]} FROM {RESULT_TABLES[kind]} WHERE pan_id = ?'
+    params = [pan_id]
+    if before_created_at is not None and before_id is not None:
+        query += ' AND (created_at, id) < (?, ?)'
+        params += [before_created_at, before_id]
+    query += ' ORDER BY created_at DESC, id DESC LIMIT ?'
+    params.append(limit + 1)
+
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    rows = [dict(row) for row in cursor.execute(query, params).fetchall()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = {'before_created_at': rows[-1]['created_at'], 'before_id': rows[-1]['id']}
+    return {'items': rows, 'next': next_cursor}
+
+
+@app.route('/api/history/<kind>')
+def history_api(kind):
+    if 'pan_id' not in session or kind not in RESULT_TABLES:
+        return jsonify({'error': 'not found'}), 404
+
+    limit = min(max(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), 1), HISTORY_MAX_PAGE_SIZE)
+    with get_db() as conn:
+        page = fetch_history_page(conn, kind, session['pan_id'], request.args.get('before_created_at'),
+                                  request.args.get('before_id', type=int), limit)
+    return jsonify(page)
+
+
+def business_dashboard_context(conn, pan_id):
+    """
+    Template arguments for dash_bus.html.
+    """
+    # Only the newest page is rendered; the charts fetch older pages from /api/history
+    history_page = fetch_history_page(conn, 'business', pan_id)
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    # --- Aggregated yearly data, maintained on every insert (see database/rollups.py) ---
+    yearly = cursor.execute(
+        'SELECT year, gross_income, gst_payable, final_tax_payable, calculations FROM tax_rollup_business WHERE pan_id = ? ORDER BY year',
+        (pan_id,)
+    ).fetchall()
+
+    return dict(
+        history=history_page['items'],
+        history_page=history_page,
+        pan_number=pan_id,
+        total_calculations=sum(row['calculations'] for row in yearly),
+        yearly_labels=[row['year'] for row in yearly],
+        revenue_data_yearly=[row['gross_income'] for row in yearly],
+        gst_data_yearly=[row['gst_payable'] for row in yearly],
+        tax_data_yearly=[row['final_tax_payable'] for row in yearly]
+    )
+
+
+def job_dashboard_context(conn, pan_id):
+    """
+    Template arguments for dash_job.html.
+    """
+    # Only the newest page is rendered; the charts fetch older pages from /api/history
+    history_page = fetch_history_page(conn, 'job', pan_id)
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    # --- Per financial year totals, maintained on every insert (see database/rollups.py) ---
+    yearly = cursor.execute(
+        'SELECT financial_year, gross_income, tax, net_income, calculations FROM tax_rollup_job WHERE pan_id = ? ORDER BY financial_year',
+        (pan_id,)
+    ).fetchall()
+
+    return dict(
+        history=history_page['items'],
+        history_page=history_page,
+        pan_number=pan_id,
+        total_calculations=sum(row['calculations'] for row in yearly),
+        yearly_labels=[row['financial_year'] for row in yearly],
+        gross_income_data_yearly=[row['gross_income'] for row in yearly],
+        tax_data_yearly=[row['tax'] for row in yearly],
+        net_income_data_yearly=[row['net_income'] for row in yearly]
+    )
+
+
 @app.route('/dashboard/business')
 def dashboard_business():
     if 'pan_id' not in session:
         return redirect(url_for('signup'))
 
-    pan_id = session.get('pan_id')
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.row_factory = sqlite3.Row
-        history = cursor.execute(
-            '''SELECT id, gross_income, net_taxable_income, gst_payable, final_tax_payable, insights, created_at 
-               FROM tax_results_business 
-               WHERE pan_id = ? 
-               ORDER BY created_at ASC''',
-            (pan_id,)
-        ).fetchall()
-
-    history_for_template = [dict(row) for row in history]
-
-    # --- Aggregated yearly data (kept from your code) ---
-    from collections import defaultdict
-    yearly_data = defaultdict(lambda: {'gross_income': [], 'gst_payable': [], 'final_tax_payable': []})
-    for row in history_for_template:
-        year = row['created_at'][:4]  # Extract year
-        yearly_data[year]['gross_income'].append(row['gross_income'])
-        yearly_data[year]['gst_payable'].append(row['gst_payable'])
-        yearly_data[year]['final_tax_payable'].append(row['final_tax_payable'])
-
-    sorted_years = sorted(yearly_data.keys())
-    yearly_labels = sorted_years
-    revenue_data_yearly = [sum(yearly_data[year]['gross_income']) for year in sorted_years]
-    gst_data_yearly = [sum(yearly_data[year]['gst_payable']) for year in sorted_years]
-    tax_data_yearly = [sum(yearly_data[year]['final_tax_payable']) for year in sorted_years]
-
-    labels = [f"Calc {i+1} ({row['created_at'].split(' ')[0]})" for i, row in enumerate(history_for_template)]
-    revenue_data = [float(row['gross_income'] or 0) for row in history_for_template]
-    gst_data = [float(row['gst_payable'] or 0) for row in history_for_template]
-    tax_data = [float(row['final_tax_payable'] or 0) for row in history_for_template]
-
-    return render_template(
-        'dash_bus.html',
-        history=history_for_template,
-        pan_number=pan_id,
-        labels=labels,
-        revenue_data=revenue_data,
-        gst_data=gst_data,
-        tax_data=tax_data,
-        yearly_labels=yearly_labels,
-        revenue_data_yearly=revenue_data_yearly,
-        gst_data_yearly=gst_data_yearly,
-        tax_data_yearly=tax_data_yearly
-    )
+    with get_db() as conn:
+        context = business_dashboard_context(conn, session['pan_id'])
+    return render_template('dash_bus.html', **context)
 
 
 @app.route('/dashboard/job')
 def dashboard_job():
     if 'pan_id' not in session:
         return redirect(url_for('signup'))
-        
-    pan_id = session.get('pan_id')
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        cursor.row_factory = sqlite3.Row
-        history = cursor.execute('SELECT * FROM tax_results_job WHERE pan_id = ? ORDER BY created_at DESC', (pan_id,)).fetchall()
-        
-    history_for_template = [dict(row) for row in history]
-    
-    labels = [row['financial_year'] for row in reversed(history_for_template)]
-    gross_income_data = [row['gross_income'] for row in reversed(history_for_template)]
-    tax_data = [row['tax'] for row in reversed(history_for_template)]
-    net_income_data = [row['net_income'] for row in reversed(history_for_template)]
-
-    return render_template(
-        'dash_job.html',
-        history=history_for_template,
-        pan_number=pan_id,
-        total_calculations=len(history_for_template),
-        labels=labels,
-        gross_income_data=gross_income_data,
-        tax_data=tax_data,
-        net_income_data=net_income_data
-    )
+
+    with get_db() as conn:
+        context = job_dashboard_context(conn, session['pan_id'])
+    return render_template('dash_job.html', **context)
 
 # ===================================================================
 # --- PDF Download Routes ---
 # ===================================================================
-@app.route('/download-business-report')
-def download_business_report():
-    required_keys = ['person_id', 'business_income', 'business_details', 'business_expenses', 'finance_deduction']
+# Session keys each report needs, and where to send the user when they are gone
+REPORT_SESSION = {
+    'business': (['person_id', 'business_income', 'business_details', 'business_expenses', 'finance_deduction'],
+                 "Session expired. Please fill out business forms again to download.", 'business_details'),
+    'job': (['person_id', 'job_income', 'job_deductions'],
+            "Session expired. Please fill out job forms again to download.", 'job_details'),
+}
+
+def missing_report_session(kind):
+    """
+    Returns a redirect back to the forms if the session lacks what the report needs, else None.
+    """
+    required_keys, message, endpoint = REPORT_SESSION[kind]
     if not all(key in session for key in required_keys):
-        flash("Session expired. Please fill out business forms again to download.")
-        return redirect(url_for('business_details'))
-
-    # Gather data from session
-    bus_income = session.get('business_income', {})
-    bus_details = session.get('business_details', {})
-    bus_expenses = session.get('business_expenses', {})
-    fin_deductions = session.get('finance_deduction', {})
-
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        person = cursor.execute("SELECT * FROM people_info WHERE id = ?", (session.get('person_id'),)).fetchone()
-        personal = {
-            'name': person[1] if person else 'N/A',
-            'email': person[4] if person else 'N/A',
-            'mobile_number': person[6] if person else 'N/A',
-            'age': 'N/A'  # Not stored, placeholder
-        }
+        flash(message)
+        return redirect(url_for(endpoint))
+    return None
+
+def cached_report_pdf(kind, key, data, render):
+    """
+    Returns the PDF bytes for report_key `key`, rendering only on a cache miss.
+    """
+    def render_pdf():
+        start = time.perf_counter()
+        pdf = render(data).getvalue()
+        observe_pdf(kind, time.perf_counter() - start, len(pdf))
+        return pdf
+
+    return get_report_cache(app).get_or_render(key, render_pdf)
+
+def report_response(key, pdf, download_name):
+    """
+    The download response for a report; pdf=None answers 304 Not Modified.
+    """
+    if pdf is None:
+        response = app.response_class(status=304)
+    else:
+        response = send_file(io.BytesIO(pdf), as_attachment=True, download_name=download_name,
+                             mimetype='application/pdf', conditional=False)
+    response.set_etag(key)
+    # Reports hold personal data: browsers may keep them but must revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def send_report(kind, data, render, template_version, download_name):
+    """
+    Sends a PDF report, rendering it only if this exact data has not been rendered before.
+    The strong ETag is the report's content address, so a repeat download with
+    If-None-Match gets a 304 without building or even loading the PDF.
+    """
+    key = report_key(kind, template_version, data)
+    if key in request.if_none_match:
+        return report_response(key, None, download_name)
+    return report_response(key, cached_report_pdf(kind, key, data, render), download_name)
+
+def business_report_data(conn, sess):
+    """
+    Data for the business PDF report, from the form data in `sess` (the session or a copy of it).
+    """
+    bus_income = sess.get('business_income', {})
+    bus_details = sess.get('business_details', {})
+    bus_expenses = sess.get('business_expenses', {})
+    fin_deductions = sess.get('finance_deduction', {})
+
+    cursor = conn.cursor()
+    person = cursor.execute("SELECT * FROM people_info WHERE id = ?", (sess.get('person_id'),)).fetchone()
+    personal = {
+        'name': person[1] if person else 'N/A',
+        'email': person[4] if person else 'N/A',
+        'mobile_number': person[6] if person else 'N/A',
+        'age': 'N/A'  # Not stored, placeholder
+    }
 
-    # Prepare data for PDF
-    data = {
+    return {
         'personal': personal,
         'income': {
             'gross_income': bus_income.get('total_income', 0),
@@ -459,46 +698,33 @@ def download_business_report():
             'other_deductions': fin_deductions.get('other_deduction', 0),
         },
         'summary': {
-            'taxable_income': session.get('net_taxable_income', 0),  # From result
-            'final_tax_due': session.get('final_tax_payable', 0),
+            'taxable_income': sess.get('net_taxable_income', 0),  # From result
+            'final_tax_due': sess.get('final_tax_payable', 0),
         }
     }
 
-    # Generate PDF
-    buffer = create_business_report(data)
-
-    # Return PDF
-    return send_file(buffer, as_attachment=True, download_name='business_tax_report.pdf', mimetype='application/pdf')
-
-
-@app.route('/download-job-report')
-def download_job_report():
-    required_keys = ['person_id', 'job_income', 'job_deductions']
-    if not all(key in session for key in required_keys):
-        flash("Session expired. Please fill out job forms again to download.")
-        return redirect(url_for('job_details'))
-
-    # Gather data from session
-    job_income = session.get('job_income', {})
-    job_deductions = session.get('job_deductions', {})
+def job_report_data(conn, sess):
+    """
+    Data for the job PDF report, from the form data in `sess` (the session or a copy of it).
+    """
+    job_income = sess.get('job_income', {})
+    job_deductions = sess.get('job_deductions', {})
 
     # Get personal info
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        person = cursor.execute("SELECT * FROM people_info WHERE id = ?", (session.get('person_id'),)).fetchone()
-        personal = {
-            'name': person[1] if person else 'N/A',
-            'email': person[4] if person else 'N/A',
-            'mobile_number': person[6] if person else 'N/A',
-        }
+    cursor = conn.cursor()
+    person = cursor.execute("SELECT * FROM people_info WHERE id = ?", (sess.get('person_id'),)).fetchone()
+    personal = {
+        'name': person[1] if person else 'N/A',
+        'email': person[4] if person else 'N/A',
+        'mobile_number': person[6] if person else 'N/A',
+    }
 
     # Calculate totals
     gross_income = sum(v for k, v in job_income.items() if k != 'financial_year')
     tds = job_deductions.get('tds', 0)
-    final_tax_due, taxable_income = calc_job_tax_new_regime(gross_income, tds)
+    final_tax_due, taxable_income = calc_job_tax_new_regime(gross_income, tds, job_income.get('financial_year'))
 
-    # Prepare data for PDF
-    data = {
+    return {
         'personal': personal,
         'financial_year': job_income.get('financial_year', 'N/A'),
         'income': {
@@ -510,7 +736,7 @@ def download_job_report():
         },
         'summary': {
             'gross_income': gross_income,
-            'standard_deduction': 50000,  # Assuming standard deduction
+            'standard_deduction': get_slab_table(job_income.get('financial_year'), 'new').standard_deduction,
             'taxable_income': taxable_income,
             'total_tax': final_tax_due,
             'tds': tds,
@@ -518,11 +744,109 @@ def download_job_report():
         }
     }
 
-    # Generate PDF
-    buffer = create_job_report(data)
+# PDF report per kind: (data builder, renderer module, download name). The
+# renderer modules import ReportLab, so they are only loaded on first download.
+REPORTS = {
+    'business': (business_report_data, 'bus_pdf_gen', 'business_tax_report.pdf'),
+    'job': (job_report_data, 'pdf_gen', 'job_tax_report.pdf'),
+}
+
+def report_renderer(kind):
+    """
+    Returns (create_tax_report, TEMPLATE_VERSION) of the kind's PDF module.
+    """
+    module = importlib.import_module(REPORTS[kind][1])
+    return module.create_tax_report, module.TEMPLATE_VERSION
+
+def download_report(kind):
+    redirect_response = missing_report_session(kind)
+    if redirect_response:
+        return redirect_response
+
+    build_data, _, download_name = REPORTS[kind]
+    render, template_version = report_renderer(kind)
+    with get_db() as conn:
+        data = build_data(conn, session)
+
+    # Generate (or reuse) and return the PDF
+    return send_report(kind, data, render, template_version, download_name)
+
+@app.route('/download-business-report')
+def download_business_report():
+    return download_report('business')
+
+@app.route('/download-job-report')
+def download_job_report():
+    return download_report('job')
+
 
-    # Return PDF
-    return send_file(buffer, as_attachment=True, download_name='job_tax_report.pdf', mimetype='application/pdf')
+@app.route('/download-statement/<kind>')
+def download_statement(kind):
+    """
+    Sends the PAN's consolidated multi-year statement (see statement_pdf.py).
+    It is rendered into a temp file that is streamed back and deleted when the
+    response is closed, so a long history never sits in memory as one buffer.
+    """
+    if 'pan_id' not in session:
+        return redirect(url_for('signup'))
+    if kind not in RESULT_TABLES:
+        abort(404)
+
+    from statement_pdf import create_statement
+
+    pan_id = session['pan_id']
+    output = tempfile.TemporaryFile()
+    start = time.perf_counter()
+    with get_db() as conn:
+        create_statement(conn, kind, pan_id, output)
+    observe_pdf(f'{kind}_statement', time.perf_counter() - start, output.tell())
+    output.seek(0)
+    response = send_file(output, as_attachment=True, download_name=f'{pan_id}_{kind}_statement.pdf',
+                         mimetype='application/pdf')
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
+
+@app.route('/admin/reports.zip', methods=['POST'])
+def bulk_reports_zip():
+    """
+    Streams a ZIP with the latest job/business report for every PAN in the
+    JSON body ({"pans": [...], "person_ids": [...]}). Reports are rendered in
+    a process pool (see bulk_reports.py) and sent as each one finishes.
+    """
+    token = app.config.get('ADMIN_TOKEN')
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        abort(403)
+
+    body = request.get_json(silent=True) or {}
+    pans = [str(pan).strip().upper() for pan in body.get('pans', [])]
+    person_ids = [int(person_id) for person_id in body.get('person_ids', []) if str(person_id).isdigit()]
+    if not pans and not person_ids:
+        return jsonify({'error': "pans or person_ids required"}), 400
+
+    def generate():
+        with get_db() as conn:
+            jobs = iter_report_jobs(conn, resolve_pans(conn, pans, person_ids))
+            yield from iter_reports_zip(jobs, app.config.get('BULK_REPORT_WORKERS'),
+                                        on_report=lambda filename, seconds, size: observe_pdf('bulk', seconds, size),
+                                        on_error=lambda filename, error: print(f"Bulk report {filename} failed: {error}"))
+
+    response = app.response_class(stream_with_context(generate()), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename=tax_reports.zip'
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Hidden unless a scraper presents the configured token
+    token = app.config.get('METRICS_TOKEN')
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if not token or scheme.lower() != 'bearer' or not hmac.compare_digest(credentials.strip(), token):
+        abort(404)
+    return app.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,370 @@
+"""
+ASGI serving mode. Serve it with any ASGI server, e.g.
+
+    uvicorn asgi:application --workers 1
+
+Under WSGI every in-flight request holds a worker thread, including while it
+waits on SQLite, a PDF render or the AI client. Here the result, dashboard,
+PDF report and insight-poll routes run as coroutines on one event loop:
+blocking work (SQLite, PDF rendering) goes to small thread pools and the
+page waits on the AI client for at most ASGI_INSIGHT_TIMEOUT (the call itself
+is bounded by INSIGHT_REQUEST_TIMEOUT), so one process keeps many slow
+requests in flight. The coroutines reuse app.py's helpers, so the calculators, templates,
+session store, flashes and after_request hooks (metrics, session saving) are
+shared with the WSGI app.
+
+Every other route is handed to the unchanged Flask app on a thread pool, the
+same way a WSGI server would run it.
+
+Config (on app.config):
+    ASGI_THREADS           threads for WSGI routes and PDF rendering (32)
+    ASGI_DB_THREADS        threads running SQLite work (DATABASE_POOL_SIZE)
+    ASGI_INSIGHT_TIMEOUT   seconds a result page waits for fresh AI insights
+                           before falling back to polling; 0 always polls (3).
+                           When the insight workers are saturated every miss
+                           waits the full timeout, which then sets the result
+                           pages' p95 (see benchmarks/load_flow.py --mode compare)
+"""
+import io
+import sys
+import asyncio
+import contextvars
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import flash, jsonify, redirect, render_template, request, session, url_for
+from werkzeug.exceptions import HTTPException
+
+from app import (app, REPORTS, business_dashboard_context, business_result_figures, cached_report_pdf,
+                 fetch_result_insights, job_dashboard_context, job_result_figures, missing_report_session,
+                 report_renderer, report_response, save_business_result, save_job_result)
+from db import get_pool
+from insights import INSIGHTS_UNAVAILABLE, RESULT_TABLES, get_insight_worker
+from report_cache import report_key
+
+app.config.setdefault('ASGI_THREADS', 32)
+app.config.setdefault('ASGI_DB_THREADS', app.config.get('DATABASE_POOL_SIZE') or 8)
+app.config.setdefault('ASGI_INSIGHT_TIMEOUT', 3.0)
+
+
+class Offload:
+    """
+    Runs blocking calls on a dedicated thread pool from coroutines, in a copy
+    of the caller's context (like asyncio.to_thread).
+    """
+
+    def __init__(self, max_workers, name):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    async def __call__(self, fn, *args):
+        ctx = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(ctx.run, fn, *args))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class AsyncDatabase(Offload):
+    """
+    `await db(fn, *args)` calls fn(conn, *args) on a pooled connection in a
+    DB thread and commits if it returns normally.
+    """
+
+    def __init__(self, flask_app, max_workers):
+        super().__init__(max_workers, 'asgi-db')
+        self.app = flask_app
+
+    def _call(self, fn, args):
+        pool = get_pool(self.app)
+        conn = pool.acquire()
+        try:
+            with conn:
+                return fn(conn, *args)
+        finally:
+            pool.release(conn)
+
+    async def __call__(self, fn, *args):
+        return await super().__call__(self._call, fn, args)
+
+
+db = AsyncDatabase(app, app.config['ASGI_DB_THREADS'])
+work = Offload(app.config['ASGI_THREADS'], 'asgi-work')
+
+
+# ===================================================================
+# --- Coroutine views (same URLs and behaviour as app.py's) ---
+# ===================================================================
+async def save_with_insights(kind, save, figures):
+    """
+    Saves a result and gets its insights without blocking the loop: cached
+    insights are used directly, otherwise generation is queued and awaited
+    for up to ASGI_INSIGHT_TIMEOUT seconds. Returns (insights, insights_url)
+    as queue_insights does; insights_url is set only if the page must poll.
+    """
+    worker = get_insight_worker(app)
+    prompt = figures['prompt']
+    insights = await work(worker.cached, prompt) if worker else ""
+    # On a cache miss insights stays NULL until the background worker fills it in
+    result_id = await db(save, figures['row'], insights)
+    if insights is not None:
+        return insights, None
+
+    future = worker.submit(kind, result_id, prompt)
+    if future is None:
+        await work(worker.save, RESULT_TABLES[kind], result_id, INSIGHTS_UNAVAILABLE)
+        return INSIGHTS_UNAVAILABLE, None
+    timeout = app.config['ASGI_INSIGHT_TIMEOUT']
+    if timeout:
+        try:
+            # Waiting here holds no thread; shield keeps the generation going if we give up
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout), None
+        except asyncio.TimeoutError:
+            pass
+    return "", url_for('result_insights', kind=kind, result_id=result_id)
+
+
+async def business_result():
+    required_keys = ['business_income', 'business_details', 'business_expenses', 'pan_id']
+    if not all(key in session for key in required_keys):
+        flash("Session data is missing. Please restart the calculation.")
+        return redirect(url_for('business_details'))
+
+    figures = business_result_figures(session)
+    insights, insights_url = await save_with_insights('business', save_business_result, figures)
+    return render_template("tax_result_bus.html", insights=insights, insights_url=insights_url, **figures['page'])
+
+
+async def job_result():
+    if 'job_income' not in session or 'job_deductions' not in session:
+        flash("Session data missing. Please restart the job calculation.")
+        return redirect(url_for('job_details'))
+
+    figures = job_result_figures(session)
+    insights, insights_url = await save_with_insights('job', save_job_result, figures)
+    return render_template("tax_result_job.html", insights=insights, insights_url=insights_url, **figures['page'])
+
+
+async def result_insights(kind, result_id):
+    if 'pan_id' not in session or kind not in RESULT_TABLES:
+        return jsonify({'error': 'not found'}), 404
+
+    status = await db(fetch_result_insights, kind, result_id, session['pan_id'])
+    if status is None:
+        return jsonify({'error': 'not found'}), 404
+    return jsonify(status)
+
+
+async def dashboard(template, build_context):
+    if 'pan_id' not in session:
+        return redirect(url_for('signup'))
+
+    context = await db(build_context, session['pan_id'])
+    return render_template(template, **context)
+
+
+async def download_report(kind):
+    redirect_response = missing_report_session(kind)
+    if redirect_response:
+        return redirect_response
+
+    build_data, _, download_name = REPORTS[kind]
+    render, template_version = report_renderer(kind)
+    # DB threads can't see this request's session, so they get a plain copy
+    data = await db(build_data, dict(session))
+    key = report_key(kind, template_version, data)
+    if key in request.if_none_match:
+        return report_response(key, None, download_name)
+    pdf = await work(cached_report_pdf, kind, key, data, render)
+    return report_response(key, pdf, download_name)
+
+
+# Endpoint -> coroutine view; anything not listed runs the Flask view on a thread
+ASYNC_VIEWS = {
+    'business_result': business_result,
+    'job_result': job_result,
+    'result_insights': result_insights,
+    'dashboard_business': partial(dashboard, 'dash_bus.html', business_dashboard_context),
+    'dashboard_job': partial(dashboard, 'dash_job.html', job_dashboard_context),
+    'download_business_report': partial(download_report, 'business'),
+    'download_job_report': partial(download_report, 'job'),
+}
+
+
+# ===================================================================
+# --- ASGI adapter ---
+# ===================================================================
+def build_environ(scope, body):
+    """
+    A WSGI environ for an ASGI HTTP scope, so Flask's request machinery can be reused.
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client')
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0] if client else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + name
+        value = value.decode('latin-1')
+        if key in environ:
+            value = environ[key] + ('; ' if key == 'HTTP_COOKIE' else ',') + value
+        environ[key] = value
+    return environ
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+async def _start(send, status, headers):
+    await send({
+        'type': 'http.response.start',
+        'status': int(str(status).split(' ', 1)[0]),
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    })
+
+
+class AsgiApp:
+    def __init__(self, flask_app, views, bridge):
+        self.app = flask_app
+        self.views = views
+        self.bridge = bridge  # runs WSGI routes
+        self._shutdown_lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise NotImplementedError(f"unsupported ASGI scope {scope['type']!r}")
+
+        environ = build_environ(scope, await _read_body(receive))
+        try:
+            endpoint, values = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            endpoint, values = None, None
+        view = self.views.get(endpoint)
+        if view is None:
+            await self._call_wsgi(environ, send)
+        else:
+            await self._call_async(view, values, environ, send)
+
+    async def _call_async(self, view, values, environ, send):
+        """
+        Flask.wsgi_app with the view awaited: same hooks, error handlers and teardown.
+        """
+        ctx = self.app.request_context(environ)
+        error = None
+        try:
+            try:
+                ctx.push()
+                try:
+                    rv = self.app.preprocess_request()
+                    if rv is None:
+                        rv = await view(**values)
+                except Exception as e:
+                    rv = self.app.handle_user_exception(e)
+                response = self.app.finalize_request(rv)
+            except Exception as e:
+                error = e
+                response = self.app.handle_exception(e)
+            body, status, headers = response.get_wsgi_response(environ)
+        finally:
+            if error is not None and self.app.should_ignore_error(error):
+                error = None
+            ctx.pop(error)
+
+        try:
+            await _start(send, status, headers)
+            # Coroutine views only return in-memory bodies (pages, JSON, PDF bytes)
+            for chunk in body:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+    async def _call_wsgi(self, environ, send):
+        """
+        Runs the Flask app for one request on a bridge thread, streaming its body back.
+
+        Flask keeps the app and request contexts in contextvars, and a
+        stream_with_context body pushes them on its first chunk and pops them
+        (closing the DB connection) in close(). Successive bridge calls land on
+        different threads, each with its own context, so the call, every next()
+        and close() all run inside one copied context.
+        """
+        started = {}
+        ctx = contextvars.copy_context()
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+
+        def call():
+            body = self.app.wsgi_app(environ, start_response)
+            return body, iter(body)
+
+        body, chunks = await self.bridge(ctx.run, call)
+        try:
+            await _start(send, started['status'], started['headers'])
+            if isinstance(body, (list, tuple)):
+                for chunk in body:
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            else:
+                # Streamed bodies (files, the bulk ZIP) may block while producing each chunk
+                while True:
+                    chunk = await self.bridge(ctx.run, next, chunks, None)
+                    if chunk is None:
+                        break
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(body, 'close'):
+                await self.bridge(ctx.run, body.close)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def shutdown(self):
+        with self._shutdown_lock:
+            for offload in (db, work):
+                offload.shutdown()
+            for name in ('insight_worker', 'password_hasher'):
+                worker = self.app.extensions.get(name)
+                if worker:
+                    worker.shutdown(wait=False)
+
+
+application = AsgiApp(app, ASYNC_VIEWS, work)
@@ -0,0 +1,246 @@
+"""
+Fingerprinted, precompressed static assets.
+
+`python -m assets` (run at deploy time) copies every file in static/ to
+static/dist/ under a content-hashed name such as dash_job.3f2a9c1e07.css,
+writes .gz (and .br, when the brotli package is installed) variants of the
+text files next to it, and records logical -> hashed names in
+static/dist/manifest.json. Missing third-party files listed in VENDOR are
+downloaded into static/vendor/ first, and only kept if their sha256 matches
+the digest pinned in VENDOR; an entry with no digest is never fetched.
+
+Templates call asset_url('dash_job.css'). Once a manifest exists that
+resolves to /assets/<hashed name>, served with a one-year immutable
+Cache-Control and the smallest encoding the browser accepts, so repeat page
+loads fetch nothing. Without a build (development) it falls back to the
+plain /static/ URL.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import urllib.request
+
+from flask import current_app, request, send_file, abort, url_for
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone is fine
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = {'.css', '.js', '.json', '.svg', '.txt', '.html', '.map', '.ico'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Self-hosted third-party files: static path -> (where the build fetches them from, pinned sha256).
+# Pin the hex sha256 of a copy checked against the upstream release; until then the
+# file is not fetched and pages load it from the CDN.
+VENDOR = {
+    'vendor/chart.umd.js': ('https://cdnjs.cloudflare.com/ajax/libs/Chart.js/4.4.0/chart.umd.js', None),
+}
+
+
+class VendorIntegrityError(ValueError):
+    """A vendor file does not match the sha256 pinned in VENDOR."""
+
+
+def fingerprint(path, data):
+    """
+    Returns `path` with a short content hash before its extension.
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _check_vendor(path, data, sha256):
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != sha256:
+        raise VendorIntegrityError(f"{path}: sha256 {digest} does not match the pinned {sha256}")
+
+
+def fetch_vendor(static_dir, vendor=None):
+    """
+    Downloads any VENDOR file not yet present in static_dir and checks files
+    already there. Raises VendorIntegrityError, without writing anything, when
+    a file does not match its pinned sha256. Unpinned entries are skipped.
+    Returns the paths fetched.
+    """
+    fetched = []
+    for path, (url, sha256) in (VENDOR if vendor is None else vendor).items():
+        if sha256 is None:
+            continue
+        target = os.path.join(static_dir, path)
+        if os.path.exists(target):
+            with open(target, 'rb') as f:
+                _check_vendor(path, f.read(), sha256)
+            continue
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        _check_vendor(path, data, sha256)
+        _write(target, data)
+        fetched.append(path)
+    return fetched
+
+
+def build(static_dir):
+    """
+    Fingerprints and precompresses every file under static_dir into its dist/
+    directory, removes outputs of earlier builds and writes the manifest.
+    Returns the manifest dict.
+    """
+    dist = os.path.join(static_dir, DIST_DIR)
+    manifest, outputs = {}, set()
+
+    # 1. Hashed copy of each source file, plus compressed variants of text files
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir):
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for name in files:
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_dir).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            hashed = fingerprint(logical, data)
+            manifest[logical] = hashed
+            target = os.path.join(dist, hashed)
+            outputs.add(target)
+            if os.path.exists(target):
+                outputs.update(p for p in (target + '.gz', target + '.br') if os.path.exists(p))
+                continue
+            _write(target, data)
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = brotli.compress(data, quality=11)
+            for suffix, compressed in variants.items():
+                if len(compressed) < len(data):
+                    _write(target + suffix, compressed)
+                    outputs.add(target + suffix)
+
+    # 2. Drop files from previous builds that no longer match a source
+    for root, _, files in os.walk(dist):
+        for name in files:
+            path = os.path.join(root, name)
+            if path not in outputs and name != MANIFEST:
+                os.remove(path)
+
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+class AssetManifest:
+    """
+    The build manifest, re-read when the file changes (i.e. after a deploy).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._entries = {}
+
+    def version(self):
+        """
+        Identifies the current build (None before the first one); reloads the manifest if it changed.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self._entries = {}
+            if mtime is not None:
+                with open(self.path, encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            self._mtime = mtime
+        return mtime
+
+    def get(self, logical):
+        self.version()
+        return self._entries.get(logical)
+
+
+def asset_url(filename):
+    """
+    URL for static/<filename>: the fingerprinted /assets/ URL after a build,
+    otherwise /static/<filename> (or the CDN for a vendor file not yet fetched).
+    """
+    hashed = current_app.extensions['assets'].get(filename)
+    if hashed:
+        return url_for('asset', filename=hashed)
+    if filename in VENDOR and not os.path.exists(os.path.join(current_app.static_folder, filename)):
+        return VENDOR[filename][0]
+    return url_for('static', filename=filename)
+
+
+def serve_asset(filename):
+    """
+    Serves a fingerprinted file, precompressed when the client accepts it.
+    The name changes whenever the content does, so it can be cached forever.
+    """
+    dist = os.path.join(current_app.static_folder, DIST_DIR)
+    path = os.path.realpath(os.path.join(dist, filename))
+    if not path.startswith(os.path.realpath(dist) + os.sep) or filename == MANIFEST or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    accepted = request.accept_encodings
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[candidate] and os.path.isfile(path + suffix):
+            path, encoding = path + suffix, candidate
+            break
+
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True)
+    response.headers.pop('Content-Disposition', None)  # would name the .gz file
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE
+    return response
+
+
+def init_app(app):
+    app.config.setdefault('ASSET_URL_PATH', '/assets')
+    app.extensions['assets'] = AssetManifest(os.path.join(app.static_folder, DIST_DIR, MANIFEST))
+    app.add_url_rule(app.config['ASSET_URL_PATH'] + '/<path:filename>', 'asset', serve_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static/ into static/dist/")
+    parser.add_argument('--static', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+    parser.add_argument('--no-fetch', action='store_true', help="don't download missing VENDOR files")
+    args = parser.parse_args()
+
+    if not args.no_fetch:
+        try:
+            for path in fetch_vendor(args.static):
+                print(f"   fetched {path}")
+        except VendorIntegrityError as e:
+            raise SystemExit(f"❌ {e}")
+        except OSError as e:
+            print(f"⚠️  Could not fetch vendor files ({e}); pages keep loading them from the CDN")
+        unpinned = [path for path, (_, sha256) in VENDOR.items() if sha256 is None]
+        if unpinned:
+            print(f"⚠️  No sha256 pinned for {', '.join(unpinned)}; pages keep loading them from the CDN")
+    manifest = build(args.static)
+    dist = os.path.join(args.static, DIST_DIR)
+    size = sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(dist) for name in files)
+    print(f"✅ {len(manifest)} assets -> {dist} ({size / 1024:.0f} KiB with compressed variants"
+          f"{'' if brotli else ', gzip only: install brotli for .br'})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares the vectorized batch tax functions against calling the scalar
+functions in a Python loop, and checks both give the same answers.
+
+Run from the project root:
+    python -m benchmarks.bench_batch --filers 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from calc_job import calc_job_tax_new_regime, calc_job_tax_new_regime_batch
+from calc_bus import calc_bus_tax_new_regime, calc_bus_tax_new_regime_batch
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_job(gross_income, tds):
+    def loop(gross_income, tds):
+        return [calc_job_tax_new_regime(g, t) for g, t in zip(gross_income.tolist(), tds.tolist())]
+
+    loop_results, loop_time = _time(loop, gross_income, tds)
+    (tax, _cess, taxable), batch_time = _time(calc_job_tax_new_regime_batch, gross_income, tds)
+
+    assert np.array_equal(tax, [r[0] for r in loop_results])
+    assert np.array_equal(taxable, [r[1] for r in loop_results])
+    return loop_time, batch_time
+
+
+def bench_bus(gross_revenue, expenses):
+    def loop(gross_revenue, expenses):
+        return [calc_bus_tax_new_regime(r, e) for r, e in zip(gross_revenue.tolist(), expenses.tolist())]
+
+    loop_results, loop_time = _time(loop, gross_revenue, expenses)
+    (tax, _cess, taxable), batch_time = _time(calc_bus_tax_new_regime_batch, gross_revenue, expenses)
+
+    assert np.array_equal(tax, [r[0] for r in loop_results])
+    assert np.array_equal(taxable, [r[1] for r in loop_results])
+    return loop_time, batch_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scalar loop vs batch tax calculation benchmark")
+    parser.add_argument('--filers', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    gross = rng.uniform(0, 4000000, args.filers).round(2)
+    second = rng.uniform(0, 500000, args.filers).round(2)
+
+    for name, bench in (('job', bench_job), ('business', bench_bus)):
+        loop_time, batch_time = bench(gross, second)
+        print(f"{name:<9} {args.filers:>9,} filers  loop {loop_time * 1000:9.1f} ms  "
+              f"batch {batch_time * 1000:8.1f} ms  speedup {loop_time / batch_time:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Seeded bulk data generator for capacity planning. Fills a database (created
+with the app's schema, as database/mydata_db.py does) with millions of rows in
+user, people_info, user_pan_mapping, businesses/job_person, tax_results_job
+and tax_results_business, then rebuilds the rollups.
+
+Every filer can log in with the password "loadtest". Rows are inserted in
+PAN order with sorted created_at, so the (pan_id, created_at) indexes only
+ever append.
+
+Run from the project root:
+    python -m benchmarks.generate_data --db /tmp/load.db --people 1000000
+    python -m benchmarks.generate_data --db /tmp/load.db --people 50000 --job-rows 40 --business-rows 40
+"""
+import argparse
+import random
+import string
+import time
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.synthetic import create_database, job_row, business_row, timestamps
+from database.rollups import backfill_rollups
+
+PASSWORD = 'loadtest'
+
+
+def generated_pan(i):
+    """
+    Returns a valid-looking PAN for filer i. PANs sort in the same order as i.
+    """
+    letters, digits = divmod(i, 10000)
+    prefix = ''
+    for _ in range(5):
+        letters, r = divmod(letters, 26)
+        prefix = string.ascii_uppercase[r] + prefix
+    return f"{prefix}{digits:04d}G"
+
+
+def iter_filers(rng, start, count, business_share, job_rows, business_rows):
+    """
+    Yields (person, pan_id, is_business, created_at list) for filers start..start+count.
+    Saved calculations per filer are spread uniformly around the requested averages.
+    """
+    for i in range(start, start + count):
+        pan_id = generated_pan(i)
+        person = (f"Filer {i}", f"Guardian {i}", f"{rng.randint(1950, 2004)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                  rng.choice(['Male', 'Female']), f"filer{i}@example.com", f"{i:012d}", f"9{i % 10 ** 9:09d}")
+        is_business = rng.random() < business_share
+        rows = rng.randint(0, 2 * (business_rows if is_business else job_rows))
+        yield person, pan_id, is_business, timestamps(rng, rows)
+
+
+def generate(path, people, business_share=0.4, job_rows=10, business_rows=10, batch_size=20000, seed=42, progress=None):
+    """
+    Bulk-loads `people` filers into the database at path. Returns a dict of row counts.
+    """
+    rng = random.Random(seed)
+    conn = create_database(path)
+    # Load-time settings only: nothing here needs to survive a crash mid-load
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+
+    start = conn.execute("SELECT COUNT(*) FROM people_info").fetchone()[0]
+    password_hash = generate_password_hash(PASSWORD)  # one hash for everyone: hashing is the slow part
+    counts = {'people': 0, 'tax_results_job': 0, 'tax_results_business': 0}
+    cursor = conn.cursor()
+
+    for offset in range(0, people, batch_size):
+        size = min(batch_size, people - offset)
+        users, mapping, businesses, job_people, job_results, business_results = [], [], [], [], [], []
+        # Ids are assigned here so results can reference them in the same executemany batch
+        first_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM people_info").fetchone()[0] + 1
+        business_id = conn.execute("SELECT IFNULL(MAX(id), 0) FROM businesses").fetchone()[0]
+        people_rows = []
+
+        for n, (person, pan_id, is_business, created) in enumerate(
+                iter_filers(rng, start + offset, size, business_share, job_rows, business_rows)):
+            person_id = first_id + n
+            people_rows.append((person_id,) + person)
+            users.append((pan_id, password_hash))
+            mapping.append((pan_id, person_id))
+            if is_business:
+                business_id += 1
+                businesses.append((business_id, person_id, f"{pan_id} Traders"))
+                business_results += [business_row(rng, person_id, pan_id, business_id, t) for t in created]
+            else:
+                job_people.append((person_id, 'Private', f"TAN{person_id:07d}"))
+                job_results += [job_row(rng, person_id, pan_id, t) for t in created]
+
+        with conn:
+            cursor.executemany('''INSERT INTO people_info (id, name, fathers_guardian_name, date_of_birth, gender, email,
+                                  aadhar_number, mobile_number) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', people_rows)
+            cursor.executemany("INSERT INTO user (PAN_ID, Password) VALUES (?, ?)", users)
+            cursor.executemany("INSERT INTO user_pan_mapping (pan_id, person_id) VALUES (?, ?)", mapping)
+            cursor.executemany("INSERT INTO businesses (id, person_id, business_name) VALUES (?, ?, ?)", businesses)
+            cursor.executemany("INSERT INTO job_person (person_id, employer_category, employer_tan_number) VALUES (?, ?, ?)",
+                               job_people)
+            cursor.executemany('''INSERT INTO tax_results_job (person_id, pan_id, financial_year, gross_income, tax,
+                                  net_income, insights, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', job_results)
+            cursor.executemany('''INSERT INTO tax_results_business (person_id, pan_id, business_id, gross_income,
+                                  net_taxable_income, gst_payable, final_tax_payable, insights, created_at)
+                                  VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''', business_results)
+
+        counts['people'] += size
+        counts['tax_results_job'] += len(job_results)
+        counts['tax_results_business'] += len(business_results)
+        if progress:
+            progress(counts)
+
+    with conn:
+        backfill_rollups(cursor)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load seeded synthetic filers for load testing")
+    parser.add_argument('--db', required=True, help="SQLite database file to create or extend")
+    parser.add_argument('--people', type=int, default=100000)
+    parser.add_argument('--business-share', type=float, default=0.4, help="fraction of filers with a business")
+    parser.add_argument('--job-rows', type=int, default=10, help="average saved job calculations per job filer")
+    parser.add_argument('--business-rows', type=int, default=10, help="average saved calculations per business filer")
+    parser.add_argument('--batch-size', type=int, default=20000, help="filers per transaction")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+
+    def progress(counts):
+        rows = sum(counts.values())
+        elapsed = time.perf_counter() - started
+        print(f"  {counts['people']:>10,} filers  {rows:>12,} rows  {rows / elapsed:>10,.0f} rows/s", end='\r')
+
+    counts = generate(args.db, args.people, args.business_share, args.job_rows, args.business_rows,
+                      args.batch_size, args.seed, progress)
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ {counts['people']:,} filers, {counts['tax_results_job']:,} job and "
+          f"{counts['tax_results_business']:,} business results in {elapsed:.1f}s -> {args.db}")
+    print(f"   Log in as any generated PAN (e.g. {generated_pan(0)}) with password '{PASSWORD}'")
+
+
+if __name__ == '__main__':
+    main()
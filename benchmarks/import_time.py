@@ -0,0 +1,142 @@
+"""
+Cold-start import-time report. Imports the app in fresh interpreters under
+`python -X importtime` and shows where boot time goes: the total, the slowest
+modules by cumulative time and the third-party packages that cost the most.
+Each module's time is the best of --runs, so one noisy run doesn't count.
+
+Results are written as JSON; --compare checks them against an earlier run and
+exits non-zero when the total got slower than the threshold, so a new eager
+import of a heavy package is caught in review.
+
+Run from the project root:
+    python -m benchmarks.import_time -o import_baseline.json
+    python -m benchmarks.import_time --compare import_baseline.json
+    python -m benchmarks.import_time --module asgi --top 25
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """
+    Imports module in a new interpreter and returns {name: (self_us, cumulative_us)}.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=PROJECT_DIR,
+                          env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"❌ import {module} failed:\n{proc.stderr[-2000:]}")
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        # "import time:       123 |       4567 |   package.module"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def best_of(runs):
+    """
+    Per-module minimum over several import_times() results.
+    """
+    best = {}
+    for times in runs:
+        for name, (self_us, cumulative_us) in times.items():
+            if name in best:
+                self_us = min(self_us, best[name][0])
+                cumulative_us = min(cumulative_us, best[name][1])
+            best[name] = (self_us, cumulative_us)
+    return best
+
+
+def by_package(times):
+    """
+    Self time (µs) summed per top-level package, slowest first.
+    """
+    packages = {}
+    for name, (self_us, _) in times.items():
+        top = name.split('.', 1)[0]
+        packages[top] = packages.get(top, 0) + self_us
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+
+def report(module, times, top):
+    total_ms = times[module][1] / 1000
+    print(f"import {module}: {total_ms:.1f} ms\n")
+
+    print(f"{'module':<52} {'cumulative':>12} {'self':>10}")
+    slowest = sorted((item for item in times.items() if item[0] != module), key=lambda item: item[1][1], reverse=True)
+    for name, (self_us, cumulative_us) in slowest[:top]:
+        print(f"{name:<52} {cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms")
+
+    print(f"\n{'package':<52} {'self total':>12} {'share':>10}")
+    for package, self_us in by_package(times)[:top]:
+        print(f"{package:<52} {self_us / 1000:>10.1f}ms {self_us / 1000 / total_ms:>9.0%}")
+    return total_ms
+
+
+def compare(current, baseline, threshold):
+    """
+    Prints the total and the packages that changed most against the baseline.
+    Returns True if the total is more than `threshold` (a fraction) slower.
+    """
+    ratio = current['total_ms'] / baseline['total_ms']
+    print(f"\ntotal: {baseline['total_ms']:.1f}ms -> {current['total_ms']:.1f}ms ({(ratio - 1) * 100:+.1f}%)")
+    before = baseline['packages']
+    changes = [(name, ms - before.get(name, 0)) for name, ms in current['packages'].items()]
+    changes += [(name, -ms) for name, ms in before.items() if name not in current['packages']]
+    for name, delta in sorted(changes, key=lambda item: abs(item[1]), reverse=True)[:10]:
+        if abs(delta) >= 1:
+            note = '  (new)' if name not in before else '  (gone)' if name not in current['packages'] else ''
+            print(f"  {name:<40} {delta:>+9.1f}ms{note}")
+    return ratio > 1 + threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report for app start-up")
+    parser.add_argument('--module', default='app', help="module to import (default: app)")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15, help="rows per table")
+    parser.add_argument('-o', '--output', help="JSON file to write")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.20, help="allowed slowdown before failing (0.20 = 20%%)")
+    args = parser.parse_args()
+
+    times = best_of(import_times(args.module) for _ in range(args.runs))
+    total_ms = report(args.module, times, args.top)
+    result = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'module': args.module,
+            'runs': args.runs,
+        },
+        'total_ms': total_ms,
+        'packages': {name: self_us / 1000 for name, self_us in by_package(times)},
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            print(f"\n❌ import {args.module} slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regression")
+
+
+if __name__ == '__main__':
+    main()
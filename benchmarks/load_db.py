@@ -0,0 +1,105 @@
+"""
+Load test for the SQLite access layer. Runs the dashboard history read and
+the result insert from app.py on many threads, once with a fresh
+sqlite3.connect per request in rollback-journal mode (the old behaviour) and
+once through db.ConnectionPool in WAL mode, and prints requests per second.
+
+Run from the project root:
+    python -m benchmarks.load_db --threads 16 --seconds 5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from db import ConnectionPool
+
+READ_SQL = '''SELECT id, gross_income, net_taxable_income, gst_payable, final_tax_payable, insights, created_at
+              FROM tax_results_business WHERE pan_id = ? ORDER BY created_at ASC'''
+WRITE_SQL = '''INSERT INTO tax_results_business (person_id, pan_id, business_id, gross_income, net_taxable_income,
+               gst_payable, final_tax_payable, insights) VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+
+
+def make_database(path, pans, rows_per_pan):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+    CREATE TABLE tax_results_business (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        person_id INTEGER NOT NULL, pan_id TEXT NOT NULL, business_id INTEGER,
+        gross_income REAL, net_taxable_income REAL, gst_payable REAL,
+        final_tax_payable REAL, insights TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''')
+    conn.executemany(WRITE_SQL, (
+        (i, f"PAN{i:05d}", i, 1e6, 9e5, 1e4, 5e4, "tip " * 50)
+        for i in range(pans) for _ in range(rows_per_pan)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def request_once(conn, rng, pans, write_ratio):
+    pan = f"PAN{rng.randrange(pans):05d}"
+    if rng.random() < write_ratio:
+        with conn:
+            conn.execute(WRITE_SQL, (1, pan, 1, 1e6, 9e5, 1e4, 5e4, ""))
+    else:
+        conn.execute(READ_SQL, (pan,)).fetchall()
+
+
+def run(mode, path, threads, seconds, pans, write_ratio):
+    pool = ConnectionPool(path, size=threads) if mode == 'pool' else None
+    done = [0] * threads
+    errors = [0] * threads
+    stop = time.perf_counter() + seconds
+
+    def worker(n):
+        rng = random.Random(n)
+        while time.perf_counter() < stop:
+            try:
+                if pool:
+                    conn = pool.acquire()
+                    try:
+                        request_once(conn, rng, pans, write_ratio)
+                    finally:
+                        pool.release(conn)
+                else:
+                    with sqlite3.connect(path, timeout=5) as conn:
+                        request_once(conn, rng, pans, write_ratio)
+                    conn.close()
+                done[n] += 1
+            except sqlite3.OperationalError:
+                errors[n] += 1
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    if pool:
+        pool.close()
+    return sum(done) / seconds, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fresh-connection vs pooled WAL SQLite load test")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--pans', type=int, default=500)
+    parser.add_argument('--rows-per-pan', type=int, default=20)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('connect', 'pool'):
+            path = os.path.join(tmp, f"{mode}.db")
+            make_database(path, args.pans, args.rows_per_pan)
+            rps, errors = run(mode, path, args.threads, args.seconds, args.pans, args.write_ratio)
+            print(f"{mode:<8} {args.threads} threads  {rps:10,.0f} req/s  {errors} lock errors")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""
+Local load test of the full filing flow. Each virtual user signs up, logs in,
+picks a category, fills in the details forms, gets a result, polls its AI
+insights, opens the dashboard and downloads the PDF, then repeats the
+calculation part for as long as the test runs. Reports p50/p95/p99 latency,
+error count and throughput per route.
+
+By default the app is served in-process over real HTTP against a temp copy
+of --db, with Gemini replaced by insights.FakeInsightClient: --mode wsgi uses
+the threaded werkzeug server, --mode asgi serves asgi.application with
+uvicorn (pip install uvicorn), and --mode compare runs both, one after the
+other on fresh copies of the database, and prints them side by side. Use
+--url to drive a server started separately (it then decides how insights are
+generated).
+
+Run from the project root:
+    python -m benchmarks.generate_data --db /tmp/load.db --people 100000
+    python -m benchmarks.load_flow --db /tmp/load.db --users 32 --seconds 30
+    python -m benchmarks.load_flow --db /tmp/load.db --users 200 --mode compare
+    python -m benchmarks.load_flow --url http://127.0.0.1:5000 --users 16
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+INSIGHTS_URL = re.compile(r'/insights/(?:business|job)/\d+')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Every hop is timed as its own request, so redirects are not followed
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class VirtualUser:
+    """
+    One browser session walking the filing flow.
+    """
+
+    def __init__(self, base_url, n, rng, stats, category):
+        self.base_url = base_url.rstrip('/')
+        self.rng = rng
+        self.stats = stats
+        self.category = category
+        self.pan = f"LT{os.getpid() % 1000:03d}{n:05d}X"
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, label, path, form=None, json_body=None):
+        data, headers = None, {}
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers)
+
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                body = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            body = e.read()
+            status = e.code
+        except OSError:
+            body, status = b'', 0
+        self.stats.record(label, time.perf_counter() - start, status < 400 and status != 0)
+        self.status = status
+        return body
+
+    def request_with_retry(self, label, path, form, attempts=10):
+        # Logins are shed with 503 + Retry-After when password hashing is saturated; a person would retry
+        for _ in range(attempts):
+            self.request(label, path, form)
+            if self.status != 503:
+                return
+            time.sleep(self.rng.uniform(1, 3))
+
+    def money(self, low, high):
+        return str(round(self.rng.uniform(low, high), 2))
+
+    def start_session(self):
+        self.request_with_retry('POST /signup', '/signup', {'PAN': self.pan, 'pass': 'loadtest'})
+        self.request_with_retry('POST /login', '/login', {'PAN': self.pan, 'pass': 'loadtest'})
+        self.request('GET /dashboard', '/dashboard')
+        self.request('POST /select_category', '/select_category', json_body={'category': self.category})
+        aadhar = f"{self.rng.randrange(10 ** 12):012d}"
+        self.request('POST /details', '/details', {
+            'name': f"Load {self.pan}", 'father': "Guardian", 'dob': "1990-01-01", 'gender': "Female",
+            'email': f"{self.pan.lower()}@example.com", 'aadhar': aadhar, 'mno': "9000000000",
+            'Bussname': f"{self.pan} Traders", 'empc': "Private", 'tan': "TANX00001X",
+        })
+
+    def calculate(self):
+        if self.category == 'business':
+            self.request('POST /business/details', '/business/details', {
+                'gr-in': self.money(5e5, 2e7), 'oth-in': self.money(0, 5e5), 'Bus': f"{self.pan} Traders",
+                'pr-name': "Widgets", 'pur-price': self.money(1e5, 5e6), 'pur-gst': self.rng.choice(['5', '12', '18']),
+                'tos-p': self.rng.choice(['Intra-State', 'Inter-State']), 'sal-price': self.money(2e5, 8e6),
+                'sell-gst': self.rng.choice(['5', '12', '18']), 'tos-s': self.rng.choice(['Intra-State', 'Inter-State']),
+            })
+            self.request('POST /business/expenses', '/business/expenses', {
+                'rent': self.money(0, 5e5), 'emp-w': self.money(0, 2e6), 'op-exp': self.money(0, 5e5),
+                'sub': self.money(0, 5e4), 'oth-expenses': self.money(0, 1e5),
+                'section-80c': self.money(0, 1.5e5), 'section-80d': self.money(0, 5e4), 'other-ded': '0',
+            })
+            page = self.request('GET /business/result', '/business/result')
+        else:
+            self.request('POST /job/details', '/job/details', {
+                'financial_year': self.rng.choice(['2024-25', '2025-26']), 'basic_salary': self.money(3e5, 4e6),
+                'hra_received': self.money(0, 5e5), 'savings_interest': self.money(0, 2e4),
+                'fd_interest': self.money(0, 1e5), 'other_income': self.money(0, 1e5),
+            })
+            self.request('POST /job/deductions', '/job/deductions', {
+                'epf_ppf': self.money(0, 1e5), 'life_insurance': self.money(0, 5e4), 'elss': self.money(0, 5e4),
+                'home_loan_principal': '0', 'tuition_fees': '0', 'other_80c': '0',
+                'health_insurance_self': self.money(0, 2.5e4), 'health_insurance_parents': self.money(0, 5e4),
+                'home_loan_interest': '0', 'education_loan_interest': '0', 'donations': '0', 'tds': self.money(0, 2e5),
+            })
+            page = self.request('GET /job/result', '/job/result')
+
+        match = INSIGHTS_URL.search(page.decode('utf-8', 'replace'))
+        if match:
+            self.request('GET /insights/<kind>/<id>', match.group(0))
+        self.request(f'GET /dashboard/{self.category}', f'/dashboard/{self.category}')
+        self.request(f'GET /download-{self.category}-report', f'/download-{self.category}-report')
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, label, seconds, ok):
+        with self._lock:
+            self.latencies[label].append(seconds)
+            if not ok:
+                self.errors[label] += 1
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def run(base_url, users, seconds, business_share, seed):
+    stats = Stats()
+    stop = time.perf_counter() + seconds
+
+    def user(n):
+        rng = random.Random(seed + n)
+        category = 'business' if rng.random() < business_share else 'job'
+        vu = VirtualUser(base_url, n, rng, stats, category)
+        vu.start_session()
+        while time.perf_counter() < stop:
+            vu.calculate()
+
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(users)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return stats, time.perf_counter() - started
+
+
+def report(stats, elapsed):
+    print(f"\n{'route':<34} {'count':>7} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    total = 0
+    for label in sorted(stats.latencies):
+        values = stats.latencies[label]
+        total += len(values)
+        print(f"{label:<34} {len(values):>7} {stats.errors[label]:>5} {len(values) / elapsed:>8.1f} "
+              f"{percentile(values, 50) * 1000:>9.1f} {percentile(values, 95) * 1000:>9.1f} {percentile(values, 99) * 1000:>9.1f}")
+    everything = [v for values in stats.latencies.values() for v in values]
+    if everything:
+        print(f"{'all routes':<34} {total:>7} {sum(stats.errors.values()):>5} {total / elapsed:>8.1f} "
+              f"{percentile(everything, 50) * 1000:>9.1f} {percentile(everything, 95) * 1000:>9.1f} "
+              f"{percentile(everything, 99) * 1000:>9.1f}")
+        print(f"\n{total:,} requests in {elapsed:.1f}s, mean {statistics.fmean(everything) * 1000:.1f} ms")
+
+
+def serve_locally(db_path, gemini_delay, tmp, mode='wsgi'):
+    """
+    Starts the app on a free port in this process, against a temp copy of db_path.
+    Returns (base_url, stop), where stop() shuts the server and the app's pools down.
+    """
+    path = os.path.join(tmp, f'load-{mode}.db')
+    if db_path:
+        shutil.copyfile(db_path, path)
+    os.environ['DATABASE_PATH'] = path
+    os.environ['GEMINI_API_KEY'] = ''
+
+    from app import app
+    from insights import FakeInsightClient
+    app.config['DATABASE'] = path
+    app.config['INSIGHT_CLIENT'] = FakeInsightClient(delay=gemini_delay)
+    app.config['REPORT_CACHE_DIR'] = os.path.join(tmp, f'report_cache-{mode}')
+    for name in ('insight_worker', 'password_hasher', 'report_cache', 'db_pool'):
+        app.extensions.pop(name, None)
+
+    def stop_app():
+        for name in ('insight_worker', 'password_hasher'):
+            worker = app.extensions.get(name)
+            if worker:
+                worker.shutdown()
+        pool = app.extensions.get('db_pool')
+        if pool:
+            pool.close()
+
+    if mode == 'asgi':
+        import uvicorn
+        from asgi import application
+        server = uvicorn.Server(uvicorn.Config(application, host='127.0.0.1', port=0, log_level='error',
+                                               access_log=False, lifespan='off'))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        port = server.servers[0].sockets[0].getsockname()[1]
+
+        def stop():
+            server.should_exit = True
+            thread.join()
+            stop_app()
+        return f"http://127.0.0.1:{port}", stop
+
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)  # no access log line per request
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop():
+        server.shutdown()
+        stop_app()
+    return f"http://127.0.0.1:{server.server_port}", stop
+
+
+def summary(stats, elapsed):
+    """
+    Throughput, error count and latency percentiles over all routes.
+    """
+    everything = [v for values in stats.latencies.values() for v in values]
+    if not everything:
+        return {'requests': 0, 'errors': 0, 'rps': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    return {'requests': len(everything), 'errors': sum(stats.errors.values()), 'rps': len(everything) / elapsed,
+            'p50': percentile(everything, 50) * 1000, 'p95': percentile(everything, 95) * 1000,
+            'p99': percentile(everything, 99) * 1000}
+
+
+def report_comparison(results):
+    """
+    Prints the all-route and per-route figures of each mode side by side.
+    """
+    modes = list(results)
+    print(f"\n{'':<34}" + ''.join(f"{mode:>24}" for mode in modes))
+    totals = {mode: summary(*results[mode]) for mode in modes}
+    for label, key, fmt in (('requests', 'requests', '{:,.0f}'), ('errors', 'errors', '{:,.0f}'),
+                            ('req/s', 'rps', '{:,.1f}'), ('p50 ms', 'p50', '{:,.1f}'),
+                            ('p95 ms', 'p95', '{:,.1f}'), ('p99 ms', 'p99', '{:,.1f}')):
+        print(f"{label:<34}" + ''.join(f"{fmt.format(totals[mode][key]):>24}" for mode in modes))
+
+    print(f"\n{'p95 ms by route':<34}" + ''.join(f"{mode:>24}" for mode in modes))
+    labels = sorted(set().union(*(results[mode][0].latencies for mode in modes)))
+    for label in labels:
+        cells = []
+        for mode in modes:
+            values = results[mode][0].latencies.get(label)
+            cells.append(f"{percentile(values, 95) * 1000:,.1f}" if values else '-')
+        print(f"{label:<34}" + ''.join(f"{cell:>24}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-step filing flow load test")
+    parser.add_argument('--url', help="drive an already running server instead of serving the app in-process")
+    parser.add_argument('--mode', choices=['wsgi', 'asgi', 'compare'], default='wsgi',
+                        help="how to serve the app in-process (compare runs wsgi, then asgi)")
+    parser.add_argument('--db', help="database to copy for the in-process server (see benchmarks.generate_data)")
+    parser.add_argument('--users', type=int, default=16, help="concurrent virtual users")
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--business-share', type=float, default=0.4)
+    parser.add_argument('--gemini-delay', type=float, default=0.8, help="seconds the stubbed Gemini call takes")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.url:
+        print(f"Driving {args.url} with {args.users} users for {args.seconds:.0f}s ...")
+        report(*run(args.url, args.users, args.seconds, args.business_share, args.seed))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in (['wsgi', 'asgi'] if args.mode == 'compare' else [args.mode]):
+            base_url, stop = serve_locally(args.db, args.gemini_delay, tmp, mode)
+            print(f"Driving {mode} server at {base_url} with {args.users} users for {args.seconds:.0f}s ...")
+            try:
+                results[mode] = run(base_url, args.users, args.seconds, args.business_share, args.seed)
+            finally:
+                stop()
+            report(*results[mode])
+    if len(results) > 1:
+        report_comparison(results)
+
+
+if __name__ == '__main__':
+    main()
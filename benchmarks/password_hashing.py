@@ -0,0 +1,91 @@
+"""
+Logins per second at each password hashing cost, for choosing
+PASSWORD_HASH_METHOD. For every method it measures a single verification on
+one thread (logins/s per core) and then the throughput of a PasswordHasher
+pool with --workers threads, which shows whether hashing scales across cores.
+
+Run from the project root:
+    python -m benchmarks.password_hashing
+    python -m benchmarks.password_hashing --methods scrypt:16384:8:1 pbkdf2:sha256:600000 --workers 8
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from passwords import PasswordHasher
+
+METHODS = (
+    'scrypt:32768:8:1',      # werkzeug default
+    'scrypt:16384:8:1',
+    'pbkdf2:sha256:1000000',  # werkzeug default for pbkdf2
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+)
+PASSWORD = 'correct horse battery staple'
+
+
+def single_core(method, min_time):
+    """
+    Returns the verification times (seconds) of one thread, run for at least min_time.
+    """
+    stored = generate_password_hash(PASSWORD, method)
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline or len(timings) < 3:
+        start = time.perf_counter()
+        check_password_hash(stored, PASSWORD)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def pool_throughput(method, workers, logins):
+    """
+    Returns verifications per second through a PasswordHasher with `workers` threads.
+    """
+    hasher = PasswordHasher(method, max_workers=workers, max_pending=logins)
+    stored = generate_password_hash(PASSWORD, method)
+    try:
+        start = time.perf_counter()
+        # One client thread per login, as concurrent requests would be
+        with ThreadPoolExecutor(max_workers=logins) as clients:
+            results = list(clients.map(lambda _: hasher.verify(stored, PASSWORD), range(logins)))
+        elapsed = time.perf_counter() - start
+    finally:
+        hasher.shutdown()
+    assert all(ok for ok, _ in results)
+    return logins / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Password verification throughput per hashing cost")
+    parser.add_argument('--methods', nargs='+', default=METHODS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="pool threads (default: CPUs)")
+    parser.add_argument('--min-time', type=float, default=1.0, help="seconds of single-core timing per method")
+    parser.add_argument('--json', help="also write results to this file")
+    args = parser.parse_args()
+
+    print(f"{'method':<24} {'ms/verify':>10} {'logins/s/core':>14} {f'pool x{args.workers} /s':>14} {'scaling':>8}")
+    results = []
+    for method in args.methods:
+        timings = single_core(method, args.min_time)
+        per_core = 1 / statistics.median(timings)
+        pooled = pool_throughput(method, args.workers, logins=max(args.workers * 4, 8))
+        results.append({'method': method, 'median_ms': statistics.median(timings) * 1000,
+                        'logins_per_second_per_core': per_core, 'pool_workers': args.workers,
+                        'pool_logins_per_second': pooled})
+        print(f"{method:<24} {statistics.median(timings) * 1000:>10.1f} {per_core:>14.1f} {pooled:>14.1f} "
+              f"{pooled / per_core:>7.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'cpus': os.cpu_count(), 'results': results}, f, indent=2)
+        print(f"\n✅ Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Reproducible performance baseline. Times the scalar tax calculators,
+calculate_gst, both create_tax_report functions and the two dashboard routes
+(through the Flask test client, against a seeded synthetic database at several
+history sizes). Runs offline: AI insights are disabled and the database is a
+temp file.
+
+Results are written as JSON; --compare checks them against an earlier run and
+exits non-zero when any benchmark got slower than the threshold.
+
+Run from the project root:
+    python -m benchmarks.suite -o baseline.json
+    python -m benchmarks.suite -o current.json --compare baseline.json
+    python -m benchmarks.suite --filter dashboard --sizes 10 1000
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import seed_history_database
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+JOB_REPORT_DATA = {
+    'personal': {'name': 'Bench Filer', 'email': 'bench@example.com', 'mobile_number': '9000000000'},
+    'financial_year': '2024-25',
+    'income': {'basic_salary': 1200000, 'hra_received': 180000, 'savings_interest': 12000,
+               'fd_interest': 45000, 'other_income': 30000},
+    'summary': {'gross_income': 1467000, 'standard_deduction': 50000, 'taxable_income': 1417000,
+                'total_tax': 145704.0, 'tds': 60000, 'final_tax_due': 145704.0},
+}
+
+BUSINESS_REPORT_DATA = {
+    'personal': {'name': 'Bench Filer', 'email': 'bench@example.com', 'phone': '9000000000', 'age': 'N/A'},
+    'income': {'gross_income': 4500000, 'other_income': 150000, 'total_revenue': 4500000,
+               'business_name': 'Bench Traders', 'product_name': 'Widgets'},
+    'gst': {'purchase_value': 1800000, 'purchase_rate': 18, 'purchase_supply_type': 'Intra-State',
+            'sell_value': 3200000, 'sell_rate': 18, 'sell_supply_type': 'Inter-State'},
+    'expenses': {'rent': 240000, 'wages': 600000, 'operating_expenses': 180000, 'subscription': 24000,
+                 'other': 50000, '80c': 150000, '80d': 25000, 'other_deductions': 0},
+    'summary': {'taxable_income': 3231000, 'final_tax_due': 427440.0},
+}
+
+
+def measure(fn, repeat=5, min_time=0.2):
+    """
+    Calls fn enough times per round to run for about min_time / repeat
+    seconds, repeats the round `repeat` times and returns per-call timings in ms.
+    """
+    target = min_time / repeat
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target or loops >= 1_000_000:
+            break
+        loops = max(loops * 2, int(loops * target / max(elapsed, 1e-9)))
+
+    rounds = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        rounds.append((time.perf_counter() - start) / loops)
+    return {
+        'loops': loops,
+        'repeat': repeat,
+        'min_ms': min(rounds) * 1000,
+        'median_ms': statistics.median(rounds) * 1000,
+        'mean_ms': statistics.fmean(rounds) * 1000,
+    }
+
+
+def calculator_benchmarks():
+    from calc_job import calc_job_tax_new_regime
+    from calc_bus import calc_bus_tax_new_regime
+    from calc_gst import calculate_gst
+    from tax_optimizer import compare_regimes
+
+    yield 'calc_job_tax_new_regime', lambda: calc_job_tax_new_regime(1467000, 60000, '2024-25')
+    yield 'calc_bus_tax_new_regime', lambda: calc_bus_tax_new_regime(4500000, 1269000, '2024-25')
+    yield 'calculate_gst[intra->inter]', lambda: calculate_gst(1800000, 18, 'Intra-State', 3200000, 18, 'Inter-State')
+    yield 'calculate_gst[inter->intra]', lambda: calculate_gst(1800000, 12, 'Inter-State', 3200000, 18, 'Intra-State')
+    yield 'compare_regimes', lambda: compare_regimes(1500000, 0, {'epf_ppf': 50000, 'home_loan_interest': 200000}, '2024-25')
+
+
+def pdf_benchmarks():
+    from pdf_gen import create_tax_report as create_job_report
+    from bus_pdf_gen import create_tax_report as create_business_report
+
+    yield 'pdf_gen.create_tax_report', lambda: create_job_report(JOB_REPORT_DATA)
+    yield 'bus_pdf_gen.create_tax_report', lambda: create_business_report(BUSINESS_REPORT_DATA)
+
+
+def dashboard_benchmarks(sizes, seed, tmp):
+    path = os.path.join(tmp, 'bench.db')
+    filers = seed_history_database(path, sizes, seed)
+
+    # Must be set before app is imported: app reads them at import time
+    os.environ['DATABASE_PATH'] = path
+    os.environ['GEMINI_API_KEY'] = ''
+    from app import app
+    app.config['TESTING'] = True
+
+    for size in sizes:
+        pan_id, person_id = filers[size]
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['pan_id'] = pan_id
+            session['person_id'] = person_id
+        for route, url in (('dashboard_business', '/dashboard/business'), ('dashboard_job', '/dashboard/job')):
+            def request(client=client, url=url):
+                response = client.get(url)
+                assert response.status_code == 200, (url, response.status_code)
+            yield f"{route}[history={size}]", request
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints current vs baseline median for every shared benchmark and returns
+    the names that are more than `threshold` (a fraction) slower.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<44} {'baseline':>11} {'current':>11} {'change':>9}")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<44} {'-':>11} {current['median_ms']:>9.4f}ms {'new':>9}")
+            continue
+        ratio = current['median_ms'] / before['median_ms']
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  ⚠️  slower'
+        print(f"{name:<44} {before['median_ms']:>9.4f}ms {current['median_ms']:>9.4f}ms {(ratio - 1) * 100:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GST-ITR performance benchmark suite")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="JSON file to write")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed slowdown before failing (0.10 = 10%%)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="dashboard history sizes")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds to spend per benchmark")
+    parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        groups = [calculator_benchmarks(), pdf_benchmarks(), dashboard_benchmarks(args.sizes, args.seed, tmp)]
+        for group in groups:
+            for name, fn in group:
+                if args.filter not in name:
+                    continue
+                fn()  # warm up imports, statement caches and templates
+                results[name] = measure(fn, args.repeat, args.min_time)
+                r = results[name]
+                print(f"{name:<44} median {r['median_ms']:10.4f} ms  min {r['min_ms']:10.4f} ms  ({r['loops']} loops)")
+
+        # Release the pooled connections before the temp database is removed
+        if 'app' in sys.modules:
+            pool = sys.modules['app'].app.extensions.get('db_pool')
+            if pool:
+                pool.close()
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'sizes': args.sizes,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Seeded synthetic data for the benchmarks. Databases are created with the real
+schema (database/migrations.py), so everything the app queries exists and the
+same seed always produces the same rows.
+"""
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from database.migrations import migrate
+from database.rollups import backfill_rollups
+
+FINANCIAL_YEARS = ['2023-24', '2024-25', '2025-26']
+SUPPLY_TYPES = ['Intra-State', 'Inter-State']
+INSIGHT = ("Your effective tax rate is moderate. Consider maximising Section 80C investments "
+           "and keeping GST invoices reconciled every month to claim the full input tax credit. ")
+
+
+def create_database(path):
+    """
+    Creates (or upgrades) a database at path with the app's schema and returns a connection to it.
+    """
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    return conn
+
+
+def job_row(rng, person_id, pan_id, created_at):
+    gross_income = round(rng.uniform(300000, 4000000), 2)
+    tax = round(gross_income * rng.uniform(0.0, 0.25), 2)
+    return (person_id, pan_id, rng.choice(FINANCIAL_YEARS), gross_income, tax,
+            round(gross_income - tax, 2), INSIGHT, created_at)
+
+
+def business_row(rng, person_id, pan_id, business_id, created_at):
+    gross_income = round(rng.uniform(500000, 20000000), 2)
+    net_taxable_income = round(gross_income * rng.uniform(0.2, 0.8), 2)
+    return (person_id, pan_id, business_id, gross_income, net_taxable_income,
+            round(gross_income * rng.uniform(0.0, 0.05), 2), round(net_taxable_income * rng.uniform(0.05, 0.3), 2),
+            INSIGHT, created_at)
+
+
+def timestamps(rng, count, start=datetime(2023, 4, 1), days=3 * 365):
+    """
+    Returns count sorted created_at strings spread over `days` from start.
+    """
+    seconds = sorted(rng.randrange(days * 86400) for _ in range(count))
+    return [(start + timedelta(seconds=s)).strftime('%Y-%m-%d %H:%M:%S') for s in seconds]
+
+
+def add_filer(conn, rng, pan_id, job_rows=0, business_rows=0):
+    """
+    Adds one person with a PAN, a business and the given number of saved
+    calculations of each kind. Rollups are not touched; call backfill_rollups after.
+    Returns the person id.
+    """
+    cursor = conn.cursor()
+    n = rng.randrange(10 ** 12)
+    cursor.execute('''INSERT INTO people_info (name, fathers_guardian_name, date_of_birth, gender, email, aadhar_number, mobile_number)
+                      VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                   (f"Filer {pan_id}", "Guardian", "1985-06-15", rng.choice(['Male', 'Female']),
+                    f"{pan_id.lower()}@example.com", f"{n:012d}", f"9{n % 10 ** 9:09d}"))
+    person_id = cursor.lastrowid
+    cursor.execute("INSERT INTO user_pan_mapping (pan_id, person_id) VALUES (?, ?)", (pan_id, person_id))
+    cursor.execute("INSERT INTO businesses (person_id, business_name) VALUES (?, ?)", (person_id, f"{pan_id} Traders"))
+    business_id = cursor.lastrowid
+
+    cursor.executemany('''INSERT INTO tax_results_job (person_id, pan_id, financial_year, gross_income, tax, net_income, insights, created_at)
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                       [job_row(rng, person_id, pan_id, t) for t in timestamps(rng, job_rows)])
+    cursor.executemany('''INSERT INTO tax_results_business (person_id, pan_id, business_id, gross_income, net_taxable_income,
+                          gst_payable, final_tax_payable, insights, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                       [business_row(rng, person_id, pan_id, business_id, t) for t in timestamps(rng, business_rows)])
+    return person_id
+
+
+def seed_history_database(path, history_sizes, seed=42):
+    """
+    Creates a database with one filer per history size, each holding that many
+    job and business calculations. Returns {history_size: (pan_id, person_id)}.
+    """
+    rng = random.Random(seed)
+    conn = create_database(path)
+    filers = {}
+    with conn:
+        for size in history_sizes:
+            pan_id = f"BENCH{size:07d}"
+            filers[size] = (pan_id, add_filer(conn, rng, pan_id, size, size))
+        backfill_rollups(conn.cursor())
+    conn.close()
+    return filers
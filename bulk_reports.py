@@ -0,0 +1,291 @@
+"""
+Bulk PDF report generation for filing deadlines.
+
+Builds the `data` dict for each PAN's latest saved calculation, renders the
+job and business reports with create_tax_report in a process pool across all
+cores, and streams each finished PDF into a ZIP as soon as it completes. Only
+a bounded number of reports are in flight at once, so memory stays flat
+however many PANs are requested. The ZIP ends with render_latency.csv;
+a report that fails to render is left out of the archive and listed there
+with its error instead of aborting the download.
+
+Usage:
+    python bulk_reports.py --pans ABCDE1234F PQRSX5678Z -o reports.zip
+    python bulk_reports.py --person-ids 3 4 5 --workers 8 -o reports.zip
+    python bulk_reports.py --pans-file pans.txt -o reports.zip
+"""
+import io
+import os
+import csv
+import sys
+import time
+import zipfile
+import argparse
+import sqlite3
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from tax_slabs import get_slab_table
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'database', 'mydata.db')
+
+
+def _personal(conn, pan_id):
+    person = conn.execute('''SELECT p.name, p.email, p.mobile_number FROM user_pan_mapping m
+                             JOIN people_info p ON p.id = m.person_id WHERE m.pan_id = ?''', (pan_id,)).fetchone()
+    name, email, mobile = person if person else ('N/A', 'N/A', 'N/A')
+    return {'name': name, 'email': email, 'mobile_number': mobile, 'phone': mobile, 'age': 'N/A'}
+
+
+def job_report_data(conn, pan_id):
+    """
+    Builds the pdf_gen data dict from a PAN's latest tax_results_job row, or returns None.
+    History keeps totals only, so the whole gross income is shown as salary.
+    """
+    row = conn.execute('''SELECT financial_year, gross_income, tax, net_income FROM tax_results_job
+                          WHERE pan_id = ? ORDER BY created_at DESC, id DESC LIMIT 1''', (pan_id,)).fetchone()
+    if not row:
+        return None
+    financial_year, gross_income, tax, net_income = row
+    return {
+        'personal': _personal(conn, pan_id),
+        'financial_year': financial_year or 'N/A',
+        'income': {
+            'basic_salary': gross_income or 0,
+            'hra_received': 0,
+            'savings_interest': 0,
+            'fd_interest': 0,
+            'other_income': 0,
+        },
+        'summary': {
+            'gross_income': gross_income or 0,
+            'standard_deduction': get_slab_table(financial_year, 'new').standard_deduction,
+            'taxable_income': net_income or 0,
+            'total_tax': tax or 0,
+            'tds': 0,
+            'final_tax_due': tax or 0,
+        }
+    }
+
+
+def business_report_data(conn, pan_id):
+    """
+    Builds the bus_pdf_gen data dict from a PAN's latest tax_results_business row, or returns None.
+    History keeps totals only, so expenses are shown as one line and GST as the net payable.
+    """
+    row = conn.execute('''SELECT r.gross_income, r.net_taxable_income, r.gst_payable, r.final_tax_payable, b.business_name
+                          FROM tax_results_business r LEFT JOIN businesses b ON b.id = r.business_id
+                          WHERE r.pan_id = ? ORDER BY r.created_at DESC, r.id DESC LIMIT 1''', (pan_id,)).fetchone()
+    if not row:
+        return None
+    gross_income, net_taxable_income, gst_payable, final_tax_payable, business_name = row
+    gross_income = gross_income or 0
+    net_taxable_income = net_taxable_income or 0
+    return {
+        'personal': _personal(conn, pan_id),
+        'income': {
+            'gross_income': gross_income,
+            'other_income': 0,
+            'total_revenue': gross_income,
+            'business_name': business_name or '',
+            'product_name': '',
+        },
+        'gst': {
+            'purchase_value': 0, 'purchase_rate': 0, 'purchase_supply_type': '-',
+            'sell_value': 0, 'sell_rate': 0, 'sell_supply_type': '-',
+        },
+        'expenses': {
+            'rent': 0, 'wages': 0, 'operating_expenses': 0, 'subscription': 0,
+            'other': max(gross_income - net_taxable_income, 0),
+            '80c': 0, '80d': 0, 'other_deductions': 0,
+        },
+        'summary': {
+            'taxable_income': net_taxable_income,
+            'final_tax_due': final_tax_payable or 0,
+            'gst_payable': gst_payable or 0,
+        }
+    }
+
+
+def resolve_pans(conn, pans=(), person_ids=()):
+    """
+    Yields the requested PANs plus the PANs mapped to the requested person ids, without repeats.
+    """
+    seen = set()
+    for pan in pans:
+        if pan not in seen:
+            seen.add(pan)
+            yield pan
+    for person_id in person_ids:
+        for (pan,) in conn.execute('SELECT pan_id FROM user_pan_mapping WHERE person_id = ?', (person_id,)):
+            if pan not in seen:
+                seen.add(pan)
+                yield pan
+
+
+def iter_report_jobs(conn, pans):
+    """
+    Yields (filename, kind, data) for every report the PANs have history for.
+    """
+    for pan in pans:
+        data = job_report_data(conn, pan)
+        if data:
+            yield f"{pan}_job_tax_report.pdf", 'job', data
+        data = business_report_data(conn, pan)
+        if data:
+            yield f"{pan}_business_tax_report.pdf", 'business', data
+
+
+def render_report(kind, data):
+    """
+    Renders one report in a worker process. Returns (pdf_bytes, seconds).
+    """
+    start = time.perf_counter()
+    if kind == 'job':
+        from pdf_gen import create_tax_report
+    else:
+        from bus_pdf_gen import create_tax_report
+    pdf = create_tax_report(data).getvalue()
+    return pdf, time.perf_counter() - start
+
+
+class _ChunkSink:
+    """
+    Write-only stream that collects what ZipFile writes, so it can be handed
+    out in chunks. Having no seek/tell makes ZipFile use streaming mode.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _latency_csv(latencies, failures):
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(['filename', 'render_ms', 'bytes', 'error'])
+    writer.writerows([name, f"{seconds * 1000:.1f}", size, ''] for name, seconds, size in latencies)
+    writer.writerows([name, '', 0, error] for name, error in failures)
+    return out.getvalue()
+
+
+def iter_reports_zip(jobs, workers=None, max_in_flight=None, on_report=None, on_error=None):
+    """
+    Renders (filename, kind, data) jobs in a process pool and yields the bytes
+    of a ZIP archive as each report finishes. At most max_in_flight reports
+    are queued or held in memory at any time. on_report(filename, seconds,
+    size) is called for every finished report and on_error(filename, error)
+    for every report that failed to render; failed reports are skipped.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    sink = _ChunkSink()
+    latencies = []
+    failures = []
+    jobs = iter(jobs)
+
+    def failed(filename, e):
+        error = f"{type(e).__name__}: {e}"
+        failures.append((filename, error))
+        if on_error:
+            on_error(filename, error)
+
+    # spawn, not fork: this also runs inside the threaded web server
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool, \
+            zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        pending = {}
+
+        def fill():
+            for filename, kind, data in jobs:
+                try:
+                    pending[pool.submit(render_report, kind, data)] = filename
+                except BrokenProcessPool as e:
+                    # A worker died; the remaining reports are listed as failed
+                    failed(filename, e)
+                    continue
+                if len(pending) >= max_in_flight:
+                    return
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                filename = pending.pop(future)
+                try:
+                    pdf, seconds = future.result()
+                except Exception as e:
+                    failed(filename, e)
+                    continue
+                archive.writestr(filename, pdf)
+                latencies.append((filename, seconds, len(pdf)))
+                if on_report:
+                    on_report(filename, seconds, len(pdf))
+            fill()
+            yield sink.drain()
+
+        archive.writestr('render_latency.csv', _latency_csv(latencies, failures))
+    yield sink.drain()
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render tax reports for many PANs into one ZIP.")
+    parser.add_argument('--pans', nargs='*', default=[], help="PAN ids")
+    parser.add_argument('--pans-file', help="file with one PAN per line")
+    parser.add_argument('--person-ids', nargs='*', type=int, default=[], help="people_info ids")
+    parser.add_argument('--workers', type=int, default=None, help="render processes (default: all cores)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="SQLite database file")
+    parser.add_argument('-o', '--output', default='reports.zip', help="ZIP file to write")
+    args = parser.parse_args()
+
+    pans = list(args.pans)
+    if args.pans_file:
+        with open(args.pans_file, encoding='utf-8') as f:
+            pans += [line.strip() for line in f if line.strip()]
+
+    conn = sqlite3.connect(args.db)
+    latencies = []
+
+    def on_report(filename, seconds, size):
+        latencies.append(seconds)
+        print(f"{filename:<45} {seconds * 1000:8.1f} ms {size / 1024:8.1f} KB", file=sys.stderr)
+
+    def on_error(filename, error):
+        print(f"❌ {filename:<43} {error}", file=sys.stderr)
+
+    start = time.perf_counter()
+    jobs = iter_report_jobs(conn, resolve_pans(conn, pans, args.person_ids))
+    with open(args.output, 'wb') as out:
+        for chunk in iter_reports_zip(jobs, args.workers, on_report=on_report, on_error=on_error):
+            out.write(chunk)
+    conn.close()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print("⚠️  No saved calculations found for the requested PANs")
+        return
+    print(f"✅ {len(latencies)} reports in {elapsed:.2f}s -> {args.output} "
+          f"(render p50 {_percentile(latencies, 50) * 1000:.0f} ms, "
+          f"p95 {_percentile(latencies, 95) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
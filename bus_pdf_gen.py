@@ -5,6 +5,9 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER
 from reportlab.lib import colors
 
+# Bump whenever the layout below changes, so cached PDFs (report_cache.py) are rebuilt
+TEMPLATE_VERSION = 1
+
 def create_tax_report(data):
     """
     Generates a PDF tax report IN MEMORY and returns the buffer.
@@ -96,7 +99,8 @@ def create_tax_report(data):
     story.append(Paragraph("Final GST & Tax Summary", section_style))
     gst_paid = data['gst']['purchase_value'] * data['gst']['purchase_rate'] / 100
     gst_collected = data['gst']['sell_value'] * data['gst']['sell_rate'] / 100
-    net_gst_liability = gst_collected - gst_paid
+    # Use the set-off result when the caller has it (e.g. reports built from saved history)
+    net_gst_liability = data['summary'].get('gst_payable', gst_collected - gst_paid)
     total_revenue = data['income']['total_revenue']
     taxable_income = data['summary']['taxable_income']
 
@@ -1,29 +1,50 @@
-def calc_bus_tax_new_regime(gross_revenue, total_business_expenses):
+import numpy as np
+
+from tax_slabs import get_slab_table
+
+
+def calc_bus_tax_new_regime(gross_revenue, total_business_expenses, financial_year=None):
     """
-    Calculates business income tax under the NEW REGIME for FY 2024-25.
+    Calculates business income tax under the NEW REGIME.
+    Slabs and cess come from the financial year (see tax_slabs.json).
     NOTE: Personal deductions (80C, 80D) and Standard Deduction are not allowed.
     """
+    table = get_slab_table(financial_year, 'new')
+
     # 1. Calculate the business profit (this is the taxable income)
     taxable_income = gross_revenue - total_business_expenses
     
     if taxable_income < 0:
         taxable_income = 0
 
-    tax = 0
-    # 2. Apply the correct tax slabs for FY 2024-25
-    if taxable_income > 1500000:
-        tax = (taxable_income - 1500000) * 0.30 + 150000
-    elif taxable_income > 1200000:
-        tax = (taxable_income - 1200000) * 0.20 + 90000
-    elif taxable_income > 900000:
-        tax = (taxable_income - 900000) * 0.15 + 45000
-    elif taxable_income > 600000:
-        tax = (taxable_income - 600000) * 0.10 + 15000
-    elif taxable_income > 300000:
-        tax = (taxable_income - 300000) * 0.05
+    # 2. Apply the tax slabs
+    tax = table.tax(taxable_income)
     
-    # 3. Health and Education Cess (4%)
-    cess = tax * 0.04
+    # 3. Health and Education Cess
+    cess = tax * table.cess_rate
     total_tax_liability = tax + cess
     
-    return total_tax_liability, taxable_income
\ No newline at end of file
+    return total_tax_liability, taxable_income
+
+
+def calc_bus_tax_new_regime_batch(gross_revenue, total_business_expenses, financial_year=None):
+    """
+    Vectorized version of calc_bus_tax_new_regime for many businesses at once.
+    Takes arrays (or anything NumPy can read as one) of revenue and expenses and
+    returns arrays of (total_tax_liability, cess, taxable_income), matching the scalar function.
+    """
+    table = get_slab_table(financial_year, 'new')
+    gross_revenue = np.asarray(gross_revenue, dtype=np.float64)
+    total_business_expenses = np.asarray(total_business_expenses, dtype=np.float64)
+
+    # 1. Calculate the business profit (this is the taxable income)
+    taxable_income = np.maximum(gross_revenue - total_business_expenses, 0)
+
+    # 2. Apply the tax slabs
+    tax = table.tax_batch(taxable_income)
+
+    # 3. Health and Education Cess
+    cess = tax * table.cess_rate
+    total_tax_liability = tax + cess
+
+    return total_tax_liability, cess, taxable_income
@@ -1,34 +1,12 @@
-def calculate_gst(purchase_value, purchase_gst_rate, purchase_supply_type, sell_value, sell_gst_rate, sell_supply_type):
-    """
-    Calculates the net GST payable based on purchase and sales data.
-    """
-    # --- 1. Calculate Input Tax (Tax Paid on Purchases) ---
-    input_tax_total = purchase_value * (purchase_gst_rate / 100.0)
-    input_cgst, input_sgst, input_igst = 0.0, 0.0, 0.0
-
-    if purchase_supply_type == 'Intra-State':
-        input_cgst = input_tax_total / 2
-        input_sgst = input_tax_total / 2
-    else: # Inter-State
-        input_igst = input_tax_total
+import numpy as np
 
-    # --- 2. Calculate Output Tax (Tax Collected on Sales) ---
-    output_tax_total = sell_value * (sell_gst_rate / 100.0)
-    output_cgst, output_sgst, output_igst = 0.0, 0.0, 0.0
 
-    if sell_supply_type == 'Intra-State':
-        output_cgst = output_tax_total / 2
-        output_sgst = output_tax_total / 2
-    else: # Inter-State
-        output_igst = output_tax_total
-
-    # --- 3. Calculate Net Tax Payable by setting off Input Tax Credit (ITC) ---
-    
-    # Start with the liabilities
-    payable_cgst = output_cgst
-    payable_sgst = output_sgst
-    payable_igst = output_igst
-    
+def _set_off(input_igst, input_cgst, input_sgst, payable_igst, payable_cgst, payable_sgst):
+    """
+    Sets off Input Tax Credit (ITC) against the output liabilities in the
+    IGST -> CGST -> SGST order. Returns the net payables and the unused credit
+    as ((igst, cgst, sgst) payable, (igst, cgst, sgst) credit left).
+    """
     # Step A: Set off IGST credit
     # First, use IGST credit to pay IGST liability
     setoff = min(payable_igst, input_igst)
@@ -67,29 +45,136 @@ def calculate_gst(purchase_value, purchase_gst_rate, purchase_supply_type, sell_
     payable_igst -= setoff
     input_sgst -= setoff
 
-    net_gst_payable = payable_cgst + payable_sgst + payable_igst
+    return (payable_igst, payable_cgst, payable_sgst), (input_igst, input_cgst, input_sgst)
+
 
-    results = {
+def _gst_results(input_tax, output_tax, payable):
+    """
+    Builds the result dict shared by calculate_gst and calculate_gst_ledger.
+    Each argument is an (igst, cgst, sgst) tuple.
+    """
+    input_igst, input_cgst, input_sgst = input_tax
+    output_igst, output_cgst, output_sgst = output_tax
+    payable_igst, payable_cgst, payable_sgst = payable
+    return {
         "input_tax": {
-            "total": input_tax_total,
-            # FIX: Use the original calculated values, not "input_cgst + setoff"
-            "cgst": input_tax_total / 2 if purchase_supply_type == 'Intra-State' else 0,
-            "sgst": input_tax_total / 2 if purchase_supply_type == 'Intra-State' else 0,
-            "igst": input_tax_total if purchase_supply_type == 'Inter-State' else 0,
+            "total": input_igst + input_cgst + input_sgst,
+            "cgst": input_cgst,
+            "sgst": input_sgst,
+            "igst": input_igst,
         },
         "output_tax": {
-            # ... (this part was already correct) ...
-            "total": output_tax_total,
+            "total": output_igst + output_cgst + output_sgst,
             "cgst": output_cgst,
             "sgst": output_sgst,
             "igst": output_igst,
         },
         "net_payable": {
-            # ... (this part was already correct) ...
-            "total": net_gst_payable,
+            "total": payable_cgst + payable_sgst + payable_igst,
             "cgst": payable_cgst,
             "sgst": payable_sgst,
             "igst": payable_igst,
         }
     }
-    return results
\ No newline at end of file
+
+
+def calculate_gst(purchase_value, purchase_gst_rate, purchase_supply_type, sell_value, sell_gst_rate, sell_supply_type):
+    """
+    Calculates the net GST payable based on purchase and sales data.
+    """
+    # --- 1. Calculate Input Tax (Tax Paid on Purchases) ---
+    input_tax_total = purchase_value * (purchase_gst_rate / 100.0)
+    input_cgst, input_sgst, input_igst = 0.0, 0.0, 0.0
+
+    if purchase_supply_type == 'Intra-State':
+        input_cgst = input_tax_total / 2
+        input_sgst = input_tax_total / 2
+    else: # Inter-State
+        input_igst = input_tax_total
+
+    # --- 2. Calculate Output Tax (Tax Collected on Sales) ---
+    output_tax_total = sell_value * (sell_gst_rate / 100.0)
+    output_cgst, output_sgst, output_igst = 0.0, 0.0, 0.0
+
+    if sell_supply_type == 'Intra-State':
+        output_cgst = output_tax_total / 2
+        output_sgst = output_tax_total / 2
+    else: # Inter-State
+        output_igst = output_tax_total
+
+    # --- 3. Calculate Net Tax Payable by setting off Input Tax Credit (ITC) ---
+    payable, _ = _set_off(input_igst, input_cgst, input_sgst, output_igst, output_cgst, output_sgst)
+
+    results = _gst_results(
+        # Only an explicit 'Inter-State' purchase is reported as IGST input
+        (input_tax_total if purchase_supply_type == 'Inter-State' else 0, input_cgst, input_sgst),
+        (output_igst, output_cgst, output_sgst),
+        payable,
+    )
+    results["input_tax"]["total"] = input_tax_total
+    results["output_tax"]["total"] = output_tax_total
+    return results
+
+
+def _split_tax(values, rates, supply_types):
+    """
+    Returns the (igst, cgst, sgst) totals for a column of invoice lines.
+    supply_types is either an array of 'Intra-State'/'Inter-State' labels or a
+    boolean array that is True for intra-state lines.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rates = np.asarray(rates, dtype=np.float64)
+    supply_types = np.asarray(supply_types)
+    intra = supply_types if supply_types.dtype == np.bool_ else supply_types == 'Intra-State'
+
+    tax = values * (rates / 100.0)
+    intra_total = float(tax[intra].sum())
+    return float(tax[~intra].sum()), intra_total / 2, intra_total / 2
+
+
+def calculate_gst_ledger(purchase_values, purchase_gst_rates, purchase_supply_types,
+                         sell_values, sell_gst_rates, sell_supply_types):
+    """
+    Calculates the net GST payable for a whole register of purchase and sale lines.
+    Takes columnar arrays (one entry per invoice line), totals the input and
+    output tax with vectorized reductions and runs the ITC set-off once on the
+    totals. Returns the same dict shape as calculate_gst.
+    """
+    # --- 1. Total Input Tax and Output Tax over all lines ---
+    input_tax = _split_tax(purchase_values, purchase_gst_rates, purchase_supply_types)
+    output_tax = _split_tax(sell_values, sell_gst_rates, sell_supply_types)
+
+    # --- 2. One set-off on the totals ---
+    return calculate_gst_totals(input_tax, output_tax)
+
+
+def carry_forward_credit(credit_brought_forward, input_tax, output_tax):
+    """
+    One period of the ITC ledger: the unused credit brought forward plus this
+    period's input tax is set off against its output tax. Each argument is an
+    (igst, cgst, sgst) tuple. Returns (payable, credit carried forward).
+    """
+    available = tuple(credit + tax for credit, tax in zip(credit_brought_forward, input_tax))
+    return _set_off(*available, *output_tax)
+
+
+def calculate_gst_totals(input_tax, output_tax, credit_brought_forward=None):
+    """
+    Calculates the net GST payable from input and output tax that are already
+    totalled, e.g. one month of the invoice ledger (see database/gst_ledger.py).
+    Each argument is an (igst, cgst, sgst) tuple. Returns the same dict shape
+    as calculate_gst; with credit_brought_forward (unused ITC of earlier
+    periods) it is used in the set-off too, and an "itc" entry shows the
+    credit brought and carried forward.
+    """
+    if credit_brought_forward is None:
+        payable, _ = _set_off(*input_tax, *output_tax)
+        return _gst_results(input_tax, output_tax, payable)
+
+    payable, carried = carry_forward_credit(credit_brought_forward, input_tax, output_tax)
+    results = _gst_results(input_tax, output_tax, payable)
+    results["itc"] = {
+        name: {"total": igst + cgst + sgst, "cgst": cgst, "sgst": sgst, "igst": igst}
+        for name, (igst, cgst, sgst) in (("brought_forward", credit_brought_forward), ("carried_forward", carried))
+    }
+    return results
@@ -1,31 +1,119 @@
-def calc_job_tax_new_regime(gross_income, tds):
+import numpy as np
+
+from tax_slabs import get_slab_table
+
+
+def calc_job_tax_new_regime(gross_income, tds, financial_year=None):
     """
-    Calculates tax for a salaried person under the NEW REGIME for FY 2024-25.
+    Calculates tax for a salaried person under the NEW REGIME.
+    Slabs, cess and standard deduction come from the filer's financial year (see tax_slabs.json).
     """
+    table = get_slab_table(financial_year, 'new')
+
     # 1. Apply the standard deduction for salaried individuals
-    taxable_income = gross_income - 50000
+    taxable_income = gross_income - table.standard_deduction
     
     if taxable_income < 0:
         taxable_income = 0
 
-    tax = 0
-    # 2. Apply the correct tax slabs
-    if taxable_income > 1500000:
-        tax = (taxable_income - 1500000) * 0.30 + 150000
-    elif taxable_income > 1200000:
-        tax = (taxable_income - 1200000) * 0.20 + 90000
-    elif taxable_income > 900000:
-        tax = (taxable_income - 900000) * 0.15 + 45000
-    elif taxable_income > 600000:
-        tax = (taxable_income - 600000) * 0.10 + 15000
-    elif taxable_income > 300000:
-        tax = (taxable_income - 300000) * 0.05
+    # 2. Apply the tax slabs
+    tax = table.tax(taxable_income)
     
-    # 3. Health and Education Cess (4%)
-    cess = tax * 0.04
+    # 3. Health and Education Cess
+    cess = tax * table.cess_rate
     total_tax = tax + cess
 
     # 4. Subtract TDS from the final tax liability
     final_tax_due = total_tax - tds
     
-    return final_tax_due, taxable_income
\ No newline at end of file
+    return final_tax_due, taxable_income
+
+
+def calc_job_tax_new_regime_batch(gross_income, tds, financial_year=None):
+    """
+    Vectorized version of calc_job_tax_new_regime for many salaried filers at once.
+    Takes arrays (or anything NumPy can read as one) of gross income and TDS and
+    returns arrays of (final_tax_due, cess, taxable_income), matching the scalar function.
+    """
+    table = get_slab_table(financial_year, 'new')
+    gross_income = np.asarray(gross_income, dtype=np.float64)
+    tds = np.asarray(tds, dtype=np.float64)
+
+    # 1. Apply the standard deduction for salaried individuals
+    taxable_income = np.maximum(gross_income - table.standard_deduction, 0)
+
+    # 2. Apply the tax slabs
+    tax = table.tax_batch(taxable_income)
+
+    # 3. Health and Education Cess
+    cess = tax * table.cess_rate
+    total_tax = tax + cess
+
+    # 4. Subtract TDS from the final tax liability
+    final_tax_due = total_tax - tds
+
+    return final_tax_due, cess, taxable_income
+
+
+# Deduction fields of the job_deductions form, by section
+SECTION_80C_FIELDS = ('epf_ppf', 'life_ins', 'elss', 'home_loan_principal', 'tuition', 'other_80c')
+
+
+def old_regime_deductions(deductions, table):
+    """
+    Applies the section caps from the old-regime slab table to the job_deductions
+    form values and returns the allowed amount per section.
+    """
+    caps = table.deduction_caps
+    section_80c = sum(deductions.get(k, 0) for k in SECTION_80C_FIELDS)
+    return {
+        '80c': min(section_80c, caps['80c']),
+        '80d': min(deductions.get('health_ins_self', 0), caps['80d_self'])
+               + min(deductions.get('health_ins_parents', 0), caps['80d_parents']),
+        '80ccd_1b': min(deductions.get('nps', 0), caps['80ccd_1b']),
+        '24b': min(deductions.get('home_loan_interest', 0), caps['24b']),
+        '80e': deductions.get('education_loan_interest', 0),  # no upper limit
+        '80g': deductions.get('donations', 0) * caps['80g_rate'],
+    }
+
+
+def calc_job_tax_old_regime(gross_income, tds, deductions, financial_year=None):
+    """
+    Calculates tax for a salaried person under the OLD REGIME, where the
+    Chapter VI-A deductions and home loan interest reduce taxable income.
+    `deductions` is the job_deductions form dict.
+    """
+    table = get_slab_table(financial_year, 'old')
+
+    # 1. Standard deduction plus the capped section deductions
+    allowed = old_regime_deductions(deductions, table)
+    taxable_income = max(gross_income - table.standard_deduction - sum(allowed.values()), 0)
+
+    # 2. Apply the tax slabs
+    tax = table.tax(taxable_income)
+
+    # 3. Health and Education Cess
+    total_tax = tax + tax * table.cess_rate
+
+    # 4. Subtract TDS from the final tax liability
+    final_tax_due = total_tax - tds
+
+    return final_tax_due, taxable_income
+
+
+def calc_job_tax_old_regime_batch(gross_income, tds, total_deductions, financial_year=None):
+    """
+    Vectorized old-regime tax. total_deductions is the already-capped section
+    total (see old_regime_deductions) for each filer or what-if scenario.
+    Returns arrays of (final_tax_due, cess, taxable_income).
+    """
+    table = get_slab_table(financial_year, 'old')
+    gross_income = np.asarray(gross_income, dtype=np.float64)
+    total_deductions = np.asarray(total_deductions, dtype=np.float64)
+
+    taxable_income = np.maximum(gross_income - table.standard_deduction - total_deductions, 0)
+    tax = table.tax_batch(taxable_income)
+    cess = tax * table.cess_rate
+    final_tax_due = tax + cess - np.asarray(tds, dtype=np.float64)
+
+    return final_tax_due, cess, taxable_income
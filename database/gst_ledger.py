@@ -0,0 +1,332 @@
+# gst_ledger.py
+#
+# Monthly GSTR-3B-style totals of the `invoices` ledger. Every invoice carries
+# its tax_period ('YYYY-MM', taken from invoice_date), and gst_period_totals
+# keeps the running input and output IGST/CGST/SGST per (business_id,
+# tax_period). add_invoice, amend_invoice, delete_invoice and record_invoices
+# apply only the difference an invoice makes to its period, in the same
+# transaction as the ledger write, so a period's return summary is one
+# primary-key read plus the ITC set-off from calc_gst. backfill_gst_totals
+# rebuilds the totals from the ledger.
+#
+# Unused input tax credit is carried from period to period in gst_itc_ledger,
+# which stores each period's opening and closing credit. Whenever totals
+# change, carry_forward recomputes from the earliest changed period onwards
+# and stops at the first later period whose stored opening balance already
+# matches, so a new month costs one lookup of the previous closing balance
+# and amending an old month only touches the months its credit reaches.
+#
+# Usage:
+#   python database/gst_ledger.py                                  # one-shot backfill of totals and ITC
+#   python database/gst_ledger.py --business-id 3 --period 2024-07  # print one return summary
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import date
+
+try:
+    from calc_gst import calculate_gst_totals, carry_forward_credit
+except ImportError:  # run as a script from inside database/
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from calc_gst import calculate_gst_totals, carry_forward_credit
+
+INVOICE_COLUMNS = ('business_id', 'register', 'invoice_number', 'invoice_date', 'product_name',
+                   'value', 'gst_rate', 'type_of_supply', 'tax_period')
+
+INSERT_INVOICE_SQL = f'''
+    INSERT INTO invoices ({', '.join(INVOICE_COLUMNS)})
+    VALUES ({', '.join('?' * len(INVOICE_COLUMNS))})
+'''
+
+# Adds one (business, period) delta; amendments pass negative amounts for what they take away
+APPLY_DELTA_SQL = '''
+    INSERT INTO gst_period_totals (business_id, tax_period, invoices,
+                                   input_igst, input_cgst, input_sgst, output_igst, output_cgst, output_sgst)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (business_id, tax_period) DO UPDATE SET
+        invoices = invoices + excluded.invoices,
+        input_igst = input_igst + excluded.input_igst,
+        input_cgst = input_cgst + excluded.input_cgst,
+        input_sgst = input_sgst + excluded.input_sgst,
+        output_igst = output_igst + excluded.output_igst,
+        output_cgst = output_cgst + excluded.output_cgst,
+        output_sgst = output_sgst + excluded.output_sgst
+'''
+
+UPSERT_ITC_SQL = '''
+    INSERT OR REPLACE INTO gst_itc_ledger (business_id, tax_period, opening_igst, opening_cgst, opening_sgst,
+                                           closing_igst, closing_cgst, closing_sgst)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+NO_CREDIT = (0.0, 0.0, 0.0)
+
+
+def create_gst_ledger_tables(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS gst_period_totals (
+        business_id INTEGER NOT NULL, tax_period TEXT NOT NULL,
+        invoices INTEGER NOT NULL,
+        input_igst REAL NOT NULL, input_cgst REAL NOT NULL, input_sgst REAL NOT NULL,
+        output_igst REAL NOT NULL, output_cgst REAL NOT NULL, output_sgst REAL NOT NULL,
+        PRIMARY KEY (business_id, tax_period)
+    ) WITHOUT ROWID''')
+
+
+def create_itc_ledger_table(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS gst_itc_ledger (
+        business_id INTEGER NOT NULL, tax_period TEXT NOT NULL,
+        opening_igst REAL NOT NULL, opening_cgst REAL NOT NULL, opening_sgst REAL NOT NULL,
+        closing_igst REAL NOT NULL, closing_cgst REAL NOT NULL, closing_sgst REAL NOT NULL,
+        PRIMARY KEY (business_id, tax_period)
+    ) WITHOUT ROWID''')
+
+
+def tax_period(invoice_date):
+    """
+    The 'YYYY-MM' return period of an invoice date (a date or an ISO 'YYYY-MM-DD' string).
+    Raises ValueError for anything else.
+    """
+    if isinstance(invoice_date, date):
+        return invoice_date.strftime('%Y-%m')
+    try:
+        return date.fromisoformat(str(invoice_date).strip()[:10]).strftime('%Y-%m')
+    except ValueError:
+        raise ValueError(f"invoice_date {invoice_date!r} is not a YYYY-MM-DD date")
+
+
+def invoice_tax(register, value, gst_rate, type_of_supply):
+    """
+    The invoice's contribution to its period as (input igst, cgst, sgst, output igst, cgst, sgst),
+    split the way calculate_gst splits a purchase or a sale.
+    """
+    tax = value * (gst_rate / 100.0)
+    split = (0.0, tax / 2, tax / 2) if type_of_supply == 'Intra-State' else (tax, 0.0, 0.0)
+    return split + (0.0, 0.0, 0.0) if register == 'purchase' else (0.0, 0.0, 0.0) + split
+
+
+def _add_delta(deltas, invoice, sign):
+    """
+    Accumulates sign * one invoice (a dict of INVOICE_COLUMNS) into {(business_id, tax_period): [count, *taxes]}.
+    """
+    if invoice['tax_period'] is None:
+        return  # undated rows imported before the ledger existed are not in any return
+    totals = deltas.setdefault((invoice['business_id'], invoice['tax_period']), [0] + [0.0] * 6)
+    totals[0] += sign
+    taxes = invoice_tax(invoice['register'], invoice['value'], invoice['gst_rate'], invoice['type_of_supply'])
+    for i, amount in enumerate(taxes, start=1):
+        totals[i] += sign * amount
+
+
+def _apply(cursor, deltas):
+    """
+    Writes period deltas to gst_period_totals and carries the changed credit forward.
+    """
+    cursor.executemany(APPLY_DELTA_SQL, [key + tuple(totals) for key, totals in deltas.items()])
+    changed = {}
+    for business_id, period in deltas:
+        changed.setdefault(business_id, set()).add(period)
+    for business_id, periods in changed.items():
+        carry_forward(cursor, business_id, periods)
+
+
+def closing_credit_before(cursor, business_id, period):
+    """
+    The (igst, cgst, sgst) credit carried into `period`: the closing balance of the business's latest earlier period.
+    """
+    row = cursor.execute('''
+        SELECT closing_igst, closing_cgst, closing_sgst FROM gst_itc_ledger
+        WHERE business_id = ? AND tax_period < ? ORDER BY tax_period DESC LIMIT 1
+    ''', (business_id, period)).fetchone()
+    return tuple(row) if row else NO_CREDIT
+
+
+def carry_forward(cursor, business_id, changed_periods):
+    """
+    Recomputes the business's ITC ledger after the totals of changed_periods
+    changed. Starts from the closing balance before the earliest of them and
+    walks forward in period order; once past the last changed period, it stops
+    at the first period whose stored opening balance equals the recomputed one,
+    since nothing from there on can differ. Returns how many periods were rewritten.
+    """
+    first, last = min(changed_periods), max(changed_periods)
+    credit = closing_credit_before(cursor, business_id, first)
+    rows = cursor.execute('''
+        SELECT t.tax_period, t.input_igst, t.input_cgst, t.input_sgst, t.output_igst, t.output_cgst, t.output_sgst,
+               l.opening_igst, l.opening_cgst, l.opening_sgst
+        FROM gst_period_totals t
+        LEFT JOIN gst_itc_ledger l ON l.business_id = t.business_id AND l.tax_period = t.tax_period
+        WHERE t.business_id = ? AND t.tax_period >= ? ORDER BY t.tax_period
+    ''', (business_id, first))
+
+    updates = []
+    for period, *amounts in rows:
+        if period > last and tuple(amounts[6:]) == credit:
+            break
+        _, closing = carry_forward_credit(credit, amounts[:3], amounts[3:6])
+        updates.append((business_id, period) + credit + closing)
+        credit = closing
+    cursor.executemany(UPSERT_ITC_SQL, updates)
+    return len(updates)
+
+
+def record_invoices(cursor, rows):
+    """
+    Adds freshly inserted invoices (INSERT_INVOICE_SQL parameter tuples) to their period totals,
+    with one write per (business, period) however many rows there are.
+    Call it in the same transaction as the INSERT so the two never drift apart.
+    """
+    deltas = {}
+    for row in rows:
+        _add_delta(deltas, dict(zip(INVOICE_COLUMNS, row)), 1)
+    _apply(cursor, deltas)
+
+
+def add_invoice(cursor, business_id, register, invoice_number, invoice_date, product_name, value, gst_rate,
+                type_of_supply):
+    """
+    Inserts one invoice into the ledger and its period totals. Returns the new invoice id.
+    """
+    row = (business_id, register, invoice_number, invoice_date, product_name, value, gst_rate, type_of_supply,
+           tax_period(invoice_date))
+    cursor.execute(INSERT_INVOICE_SQL, row)
+    record_invoices(cursor, [row])
+    return cursor.lastrowid
+
+
+def _fetch_invoice(cursor, invoice_id):
+    row = cursor.execute(f"SELECT {', '.join(INVOICE_COLUMNS)} FROM invoices WHERE id = ?", (invoice_id,)).fetchone()
+    return dict(zip(INVOICE_COLUMNS, row)) if row else None
+
+
+def amend_invoice(cursor, invoice_id, **changes):
+    """
+    Changes fields of an invoice, moving its tax out of the old period totals and into
+    the new ones (the same period unless invoice_date changed). Returns False if there
+    is no such invoice.
+    """
+    unknown = set(changes) - set(INVOICE_COLUMNS[:-1])
+    if unknown:
+        raise ValueError(f"cannot amend {sorted(unknown)}")
+    old = _fetch_invoice(cursor, invoice_id)
+    if old is None:
+        return False
+
+    new = dict(old, **changes)
+    if 'invoice_date' in changes:
+        new['tax_period'] = tax_period(new['invoice_date'])
+    cursor.execute(f"UPDATE invoices SET {', '.join(f'{col} = ?' for col in INVOICE_COLUMNS)} WHERE id = ?",
+                   [new[col] for col in INVOICE_COLUMNS] + [invoice_id])
+
+    deltas = {}
+    _add_delta(deltas, old, -1)
+    _add_delta(deltas, new, 1)
+    _apply(cursor, deltas)
+    return True
+
+
+def delete_invoice(cursor, invoice_id):
+    """
+    Removes an invoice from the ledger and its period totals. Returns False if there is no such invoice.
+    """
+    old = _fetch_invoice(cursor, invoice_id)
+    if old is None:
+        return False
+    cursor.execute("DELETE FROM invoices WHERE id = ?", (invoice_id,))
+    deltas = {}
+    _add_delta(deltas, old, -1)
+    _apply(cursor, deltas)
+    return True
+
+
+def period_summary(cursor, business_id, period):
+    """
+    The return summary of one business and tax period: input and output tax,
+    the credit brought forward and the net payable after ITC set-off, in
+    calculate_gst_totals' dict shape plus tax_period and the invoice count.
+    Reads a single row (a month without invoices reads the previous closing balance instead).
+    """
+    row = cursor.execute('''
+        SELECT t.invoices, t.input_igst, t.input_cgst, t.input_sgst, t.output_igst, t.output_cgst, t.output_sgst,
+               l.opening_igst, l.opening_cgst, l.opening_sgst
+        FROM gst_period_totals t
+        LEFT JOIN gst_itc_ledger l ON l.business_id = t.business_id AND l.tax_period = t.tax_period
+        WHERE t.business_id = ? AND t.tax_period = ?
+    ''', (business_id, period)).fetchone()
+    if row is None:
+        row = (0,) + (0.0,) * 6 + closing_credit_before(cursor, business_id, period)
+    elif row[7] is None:
+        # Totals rebuilt without backfill_itc_ledger: nothing stored for this period yet
+        row = row[:7] + closing_credit_before(cursor, business_id, period)
+    # Drops the float residue amendments leave behind; intra-state halves can be half a paisa, so keep well below that
+    amounts = [round(amount, 6) for amount in row[1:]]
+    summary = calculate_gst_totals(tuple(amounts[:3]), tuple(amounts[3:6]), tuple(amounts[6:]))
+    summary['tax_period'] = period
+    summary['invoices'] = row[0]
+    return summary
+
+
+def backfill_gst_totals(cursor):
+    """
+    Derives tax_period for invoices that lack it and rebuilds gst_period_totals from the whole ledger.
+    """
+    cursor.execute('''
+        UPDATE invoices SET tax_period = substr(trim(invoice_date), 1, 7)
+        WHERE tax_period IS NULL AND trim(invoice_date) GLOB '[0-9][0-9][0-9][0-9]-[0-1][0-9]-[0-3][0-9]*'
+    ''')
+
+    # Same arithmetic as invoice_tax, so later incremental updates land on the same sums
+    tax = "value * (gst_rate / 100.0)"
+    columns = []
+    for register in ('purchase', 'sale'):
+        columns += [
+            f"TOTAL(CASE WHEN register = '{register}' AND type_of_supply != 'Intra-State' THEN {tax} END)",
+            f"TOTAL(CASE WHEN register = '{register}' AND type_of_supply = 'Intra-State' THEN {tax} / 2 END)",
+            f"TOTAL(CASE WHEN register = '{register}' AND type_of_supply = 'Intra-State' THEN {tax} / 2 END)",
+        ]
+    cursor.execute("DELETE FROM gst_period_totals")
+    cursor.execute(f'''
+        INSERT INTO gst_period_totals (business_id, tax_period, invoices,
+                                       input_igst, input_cgst, input_sgst, output_igst, output_cgst, output_sgst)
+        SELECT business_id, tax_period, COUNT(*), {', '.join(columns)}
+        FROM invoices WHERE tax_period IS NOT NULL GROUP BY business_id, tax_period
+    ''')
+
+
+def backfill_itc_ledger(cursor):
+    """
+    Rebuilds gst_itc_ledger by carrying credit through every business's periods from the first.
+    """
+    cursor.execute("DELETE FROM gst_itc_ledger")
+    first_periods = cursor.execute("SELECT business_id, MIN(tax_period) FROM gst_period_totals GROUP BY business_id").fetchall()
+    for business_id, first in first_periods:
+        carry_forward(cursor, business_id, {first})
+
+
+def main():
+    from migrations import db_path, migrate
+
+    parser = argparse.ArgumentParser(description="Rebuild the monthly GST totals and ITC ledger, or print one period's return summary.")
+    parser.add_argument('--db', default=db_path, help="SQLite database file")
+    parser.add_argument('--business-id', type=int, help="business to summarise (with --period)")
+    parser.add_argument('--period', help="tax period as YYYY-MM (with --business-id)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    migrate(conn)
+    if args.business_id is not None and args.period:
+        print(json.dumps(period_summary(conn.cursor(), args.business_id, args.period), indent=2))
+    else:
+        with conn:
+            backfill_gst_totals(conn.cursor())
+            backfill_itc_ledger(conn.cursor())
+        periods = conn.execute("SELECT COUNT(*) FROM gst_period_totals").fetchone()[0]
+        print(f"✅ GST totals and ITC ledger rebuilt: {periods} business-periods")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
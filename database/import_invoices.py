@@ -0,0 +1,209 @@
+# import_invoices.py
+#
+# Bulk-loads purchase and sales registers (CSV or JSON Lines) into the
+# `invoices` table. The file is streamed in fixed-size chunks, so memory stays
+# flat however many rows it has. Rows that fail validation are written to a
+# reject file instead of stopping the import.
+#
+# Usage:
+#   python database/import_invoices.py sales.csv --business-id 3 --register sale
+#   python database/import_invoices.py registers.jsonl --batch-size 10000 --rejects bad.jsonl
+#
+# Columns: business_id, register (purchase/sale), invoice_number, invoice_date
+# (YYYY-MM-DD), product_name, value, gst_rate, type_of_supply
+# (Intra-State/Inter-State). business_id and register may come from the
+# command line instead of the file. Each chunk also updates the monthly GST
+# totals in the same transaction (see gst_ledger.py).
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from itertools import islice
+
+from migrations import db_path, migrate
+from gst_ledger import INSERT_INVOICE_SQL, record_invoices, tax_period
+
+REGISTERS = {'purchase', 'sale'}
+GST_RATES = {0.0, 0.25, 3.0, 5.0, 12.0, 18.0, 28.0}
+SUPPLY_TYPES = {'Intra-State', 'Inter-State'}
+COLUMNS = ['business_id', 'register', 'invoice_number', 'invoice_date', 'product_name',
+           'value', 'gst_rate', 'type_of_supply']
+
+
+def file_format(path):
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_rows(path):
+    """
+    Yields (line_number, row_dict) one row at a time from a CSV or JSONL file.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format(path) == 'csv':
+            # Line 1 is the header
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    row = {'_raw': line.rstrip('\n'), '_error': f"invalid JSON: {e.msg}"}
+                if not isinstance(row, dict):
+                    row = {'_raw': line.rstrip('\n'), '_error': "line is not a JSON object"}
+                yield line_number, row
+
+
+def validate_row(row, business_id=None, register=None):
+    """
+    Returns the INSERT parameters for a row, or raises ValueError explaining why it was rejected.
+    """
+    if '_error' in row:
+        raise ValueError(row['_error'])
+
+    try:
+        business_id = int(row.get('business_id') or business_id)
+    except (TypeError, ValueError):
+        raise ValueError("missing or invalid business_id")
+
+    register = (row.get('register') or register or '').strip().lower()
+    if register not in REGISTERS:
+        raise ValueError(f"register must be one of {sorted(REGISTERS)}")
+
+    try:
+        value = float(row.get('value'))
+    except (TypeError, ValueError):
+        raise ValueError("missing or invalid value")
+    if value < 0:
+        raise ValueError("value cannot be negative")
+
+    try:
+        gst_rate = float(row.get('gst_rate'))
+    except (TypeError, ValueError):
+        raise ValueError("missing or invalid gst_rate")
+    if gst_rate not in GST_RATES:
+        raise ValueError(f"gst_rate {gst_rate:g} is not a GST slab")
+
+    type_of_supply = (row.get('type_of_supply') or '').strip()
+    if type_of_supply not in SUPPLY_TYPES:
+        raise ValueError(f"type_of_supply must be one of {sorted(SUPPLY_TYPES)}")
+
+    # The return period an invoice is reported in comes from its date
+    period = tax_period(row.get('invoice_date') or '')
+
+    return (business_id, register, row.get('invoice_number'), row.get('invoice_date'),
+            row.get('product_name'), value, gst_rate, type_of_supply, period)
+
+
+class RejectWriter:
+    """
+    Streams rejected rows to a CSV or JSONL file, opening it only when the first row is rejected.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._csv = None
+
+    def write(self, line_number, row, error):
+        if self._file is None:
+            self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            if file_format(self.path) == 'csv':
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(['line', 'error'] + COLUMNS)
+        self.count += 1
+        if self._csv:
+            self._csv.writerow([line_number, error] + [row.get(col, '') for col in COLUMNS])
+        else:
+            self._file.write(json.dumps({'line': line_number, 'error': error, 'row': row}) + '\n')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_invoices(path, business_id=None, register=None, batch_size=5000, reject_path=None,
+                    database=db_path, progress=True):
+    """
+    Imports an invoice register file and returns a dict of import statistics.
+    Each chunk of valid rows is inserted with executemany in its own transaction,
+    together with its period totals.
+    """
+    if reject_path is None:
+        root, ext = os.path.splitext(path)
+        reject_path = f"{root}.rejects{ext}"
+
+    conn = sqlite3.connect(database)
+    migrate(conn)
+
+    rejects = RejectWriter(reject_path)
+    imported = 0
+    start = time.perf_counter()
+    try:
+        for chunk in chunks(read_rows(path), batch_size):
+            params = []
+            for line_number, row in chunk:
+                try:
+                    params.append(validate_row(row, business_id, register))
+                except ValueError as e:
+                    rejects.write(line_number, row, str(e))
+
+            with conn:
+                conn.executemany(INSERT_INVOICE_SQL, params)
+                record_invoices(conn, params)
+            imported += len(params)
+
+            if progress:
+                elapsed = time.perf_counter() - start
+                print(f"\r{imported:,} imported, {rejects.count:,} rejected "
+                      f"({(imported + rejects.count) / elapsed:,.0f} rows/s)", end='', file=sys.stderr)
+    finally:
+        rejects.close()
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    if progress:
+        print(file=sys.stderr)
+    return {
+        'imported': imported,
+        'rejected': rejects.count,
+        'reject_file': reject_path if rejects.count else None,
+        'seconds': elapsed,
+        'rows_per_second': (imported + rejects.count) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import purchase/sales invoice registers (CSV or JSONL).")
+    parser.add_argument('path', help="CSV or JSONL file to import")
+    parser.add_argument('--business-id', type=int, help="business id for rows that do not have one")
+    parser.add_argument('--register', choices=sorted(REGISTERS), help="register for rows that do not have one")
+    parser.add_argument('--batch-size', type=int, default=5000, help="rows per transaction (default 5000)")
+    parser.add_argument('--rejects', help="where to write rejected rows (default <file>.rejects.<ext>)")
+    parser.add_argument('--db', default=db_path, help="SQLite database file")
+    args = parser.parse_args()
+
+    stats = import_invoices(args.path, args.business_id, args.register, args.batch_size, args.rejects, args.db)
+    print(f"✅ Imported {stats['imported']:,} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s)")
+    if stats['rejected']:
+        print(f"⚠️  {stats['rejected']:,} rows rejected, see {stats['reject_file']}")
+
+
+if __name__ == "__main__":
+    main()
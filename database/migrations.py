@@ -0,0 +1,265 @@
+# migrations.py
+#
+# Versioned schema migrations. The applied version is kept in the database's
+# PRAGMA user_version, and each migration runs in its own IMMEDIATE
+# transaction, so migrate() is safe to call at every startup and from several
+# workers at once: only versions newer than the stored one are applied.
+#
+# Usage:
+#   python database/migrations.py           # apply pending migrations
+#   python database/migrations.py --check   # verify no hot query does a full table scan
+import argparse
+import os
+import sqlite3
+
+try:
+    from database.rollups import create_rollup_tables, backfill_rollups
+    from database.gst_ledger import (create_gst_ledger_tables, backfill_gst_totals, create_itc_ledger_table,
+                                     backfill_itc_ledger)
+except ImportError:  # run as a script from inside database/
+    from rollups import create_rollup_tables, backfill_rollups
+    from gst_ledger import create_gst_ledger_tables, backfill_gst_totals, create_itc_ledger_table, backfill_itc_ledger
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+db_path = os.path.join(BASE_DIR, 'database', 'mydata.db')
+
+
+def _add_column_if_missing(cursor, table, column, definition):
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _001_baseline(cursor):
+    """Tables from mydata_db.py, plus the columns alter_table.py used to patch in."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        PAN_ID VARCHAR(50) NOT NULL UNIQUE,
+        Password VARCHAR(255) NOT NULL
+    )''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS people_info (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT, fathers_guardian_name TEXT, date_of_birth DATE,
+        gender TEXT, email TEXT, aadhar_number TEXT UNIQUE, mobile_number TEXT
+    )''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_pan_mapping (
+        pan_id TEXT PRIMARY KEY,
+        person_id INTEGER,
+        FOREIGN KEY (person_id) REFERENCES people_info(id)
+    )''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS businesses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        person_id INTEGER, business_name TEXT,
+        FOREIGN KEY(person_id) REFERENCES people_info(id)
+    )''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS job_person (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        person_id INTEGER,
+        FOREIGN KEY(person_id) REFERENCES people_info(id)
+    )''')
+    _add_column_if_missing(cursor, 'job_person', 'employer_category', 'TEXT')
+    _add_column_if_missing(cursor, 'job_person', 'employer_tan_number', 'TEXT')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tax_results_job (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        person_id INTEGER NOT NULL, pan_id TEXT NOT NULL, financial_year TEXT,
+        gross_income REAL, tax REAL, net_income REAL, insights TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tax_results_business (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        person_id INTEGER NOT NULL, pan_id TEXT NOT NULL, business_id INTEGER,
+        gross_income REAL, net_taxable_income REAL, gst_payable REAL,
+        final_tax_payable REAL, insights TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS invoices (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        business_id INTEGER NOT NULL, register TEXT NOT NULL,
+        invoice_number TEXT, invoice_date DATE, product_name TEXT,
+        value REAL NOT NULL, gst_rate REAL NOT NULL, type_of_supply TEXT NOT NULL,
+        FOREIGN KEY(business_id) REFERENCES businesses(id)
+    )''')
+
+
+def _002_history_indexes(cursor):
+    """Indexes for the dashboard history queries and the person lookups in /dashboard."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tax_results_business_pan_created ON tax_results_business (pan_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tax_results_job_pan_created ON tax_results_job (pan_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_businesses_person ON businesses (person_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_person_person ON job_person (person_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoices_business ON invoices (business_id)")
+
+
+def _003_insight_cache(cursor):
+    """Shared tier of insight_cache.InsightCache."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS insight_cache (
+        cache_key TEXT PRIMARY KEY,
+        insights TEXT NOT NULL,
+        created_at REAL NOT NULL, last_used REAL NOT NULL
+    )''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_insight_cache_last_used ON insight_cache (last_used)")
+
+
+def _004_yearly_rollups(cursor):
+    """Per-PAN yearly totals read by the dashboards (see rollups.py), filled from existing history."""
+    create_rollup_tables(cursor)
+    backfill_rollups(cursor)
+
+
+def _005_sessions(cursor):
+    """Server-side Flask sessions (see session_store.py); the cookie only carries the id."""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sessions (
+        sid TEXT PRIMARY KEY,
+        data BLOB NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+
+
+def _006_gst_ledger(cursor):
+    """Return periods on invoices and the monthly GST totals (see gst_ledger.py), filled from the existing ledger."""
+    _add_column_if_missing(cursor, 'invoices', 'tax_period', 'TEXT')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_invoices_business_period ON invoices (business_id, tax_period)")
+    # Covered by the new index's leading column
+    cursor.execute("DROP INDEX IF EXISTS idx_invoices_business")
+    create_gst_ledger_tables(cursor)
+    backfill_gst_totals(cursor)
+
+
+def _007_itc_ledger(cursor):
+    """Input tax credit carried between tax periods (see gst_ledger.py), computed for the existing ledger."""
+    create_itc_ledger_table(cursor)
+    backfill_itc_ledger(cursor)
+
+
+# (version, migration). Append new migrations here; never edit one that has shipped.
+MIGRATIONS = [
+    (1, _001_baseline),
+    (2, _002_history_indexes),
+    (3, _003_insight_cache),
+    (4, _004_yearly_rollups),
+    (5, _005_sessions),
+    (6, _006_gst_ledger),
+    (7, _007_itc_ledger),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """
+    Applies every migration newer than the database's user_version and returns the new version.
+    """
+    if get_version(conn) >= LATEST_VERSION:
+        return LATEST_VERSION
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # manage the transactions ourselves
+    try:
+        for version, migration in MIGRATIONS:
+            cursor = conn.cursor()
+            # IMMEDIATE takes the write lock before re-reading the version, so two
+            # workers starting together cannot apply the same migration twice
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if get_version(conn) < version:
+                    migration(cursor)
+                    cursor.execute(f"PRAGMA user_version = {int(version)}")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+    finally:
+        conn.isolation_level = isolation_level
+    return get_version(conn)
+
+
+# Queries on the request path that must be answered from an index.
+HOT_QUERIES = [
+    ("SELECT * FROM user WHERE PAN_ID = ?", ('X',)),
+    ("SELECT person_id FROM user_pan_mapping WHERE pan_id = ?", ('X',)),
+    ("SELECT 1 FROM businesses WHERE person_id = ?", (1,)),
+    ("SELECT 1 FROM job_person WHERE person_id = ?", (1,)),
+    ("SELECT id FROM people_info WHERE aadhar_number = ?", ('X',)),
+    # Keyset-paginated dashboard history (app.fetch_history_page)
+    ("SELECT id FROM tax_results_business WHERE pan_id = ? ORDER BY created_at DESC, id DESC LIMIT 21", ('X',)),
+    ("SELECT id FROM tax_results_business WHERE pan_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 21", ('X', '', 0)),
+    ("SELECT id FROM tax_results_job WHERE pan_id = ? ORDER BY created_at DESC, id DESC LIMIT 21", ('X',)),
+    ("SELECT id FROM tax_results_job WHERE pan_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT 21", ('X', '', 0)),
+    ("SELECT year, gross_income, gst_payable, final_tax_payable, calculations FROM tax_rollup_business WHERE pan_id = ? ORDER BY year", ('X',)),
+    ("SELECT financial_year, gross_income, tax, net_income, calculations FROM tax_rollup_job WHERE pan_id = ? ORDER BY financial_year", ('X',)),
+    # Server-side sessions (session_store.SQLiteSessionStore)
+    ("SELECT data, expires_at FROM sessions WHERE sid = ?", ('X',)),
+    ("DELETE FROM sessions WHERE expires_at < ?", (0,)),
+    # Monthly GST return summaries (gst_ledger.period_summary) and the invoices behind them
+    ("SELECT invoices, input_igst FROM gst_period_totals WHERE business_id = ? AND tax_period = ?", (1, 'X')),
+    ("SELECT id FROM invoices WHERE business_id = ? AND tax_period = ?", (1, 'X')),
+    # ITC carry-forward (gst_ledger.closing_credit_before and carry_forward)
+    ("SELECT closing_igst FROM gst_itc_ledger WHERE business_id = ? AND tax_period < ? ORDER BY tax_period DESC LIMIT 1", (1, 'X')),
+    ("SELECT t.tax_period, l.opening_igst FROM gst_period_totals t LEFT JOIN gst_itc_ledger l ON l.business_id = t.business_id AND l.tax_period = t.tax_period WHERE t.business_id = ? AND t.tax_period >= ? ORDER BY t.tax_period", (1, 'X')),
+    # Ownership check of /api/gst/<business_id>/<tax_period>
+    ("SELECT 1 FROM businesses b JOIN user_pan_mapping m ON m.person_id = b.person_id WHERE m.pan_id = ? AND b.id = ?", ('X', 1)),
+]
+
+
+def check_query_plans(conn, queries=HOT_QUERIES):
+    """
+    Runs EXPLAIN QUERY PLAN on each query and returns [(sql, plan_detail)] for
+    every step that scans a whole table or sorts with a temp B-tree.
+    """
+    problems = []
+    for sql, params in queries:
+        for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+            detail = row[-1]
+            full_scan = detail.startswith('SCAN') and 'USING' not in detail
+            if full_scan or 'TEMP B-TREE' in detail:
+                problems.append((' '.join(sql.split()), detail))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations to the SQLite database.")
+    parser.add_argument('--db', default=db_path, help="SQLite database file")
+    parser.add_argument('--check', action='store_true', help="fail if a hot query falls back to a full scan")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    before = get_version(conn)
+    after = migrate(conn)
+    print(f"✅ Schema at version {after}" + (f" (was {before})" if after != before else ""))
+
+    if args.check:
+        problems = check_query_plans(conn)
+        conn.close()
+        for sql, detail in problems:
+            print(f"❌ {detail}\n   {sql}")
+        if problems:
+            raise SystemExit(1)
+        print(f"✅ All {len(HOT_QUERIES)} hot queries use an index")
+    else:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# rollups.py
+#
+# Per-PAN yearly totals of tax_results_business and tax_results_job, kept in
+# tax_rollup_business / tax_rollup_job so the dashboards never re-aggregate a
+# PAN's whole history. app.py calls record_*_result in the same transaction as
+# the result INSERT; backfill_rollups rebuilds both tables from scratch.
+#
+# Usage:
+#   python database/rollups.py    # one-shot backfill
+import argparse
+import sqlite3
+
+# Business rows are grouped by calendar year of created_at, like the dashboard always did
+RECORD_BUSINESS_SQL = '''
+    INSERT INTO tax_rollup_business (pan_id, year, calculations, gross_income, gst_payable, final_tax_payable)
+    SELECT pan_id, substr(created_at, 1, 4), 1, IFNULL(gross_income, 0), IFNULL(gst_payable, 0), IFNULL(final_tax_payable, 0)
+    FROM tax_results_business WHERE id = ?
+    ON CONFLICT (pan_id, year) DO UPDATE SET
+        calculations = calculations + excluded.calculations,
+        gross_income = gross_income + excluded.gross_income,
+        gst_payable = gst_payable + excluded.gst_payable,
+        final_tax_payable = final_tax_payable + excluded.final_tax_payable
+'''
+
+# Job rows are grouped by the financial year the filer chose
+RECORD_JOB_SQL = '''
+    INSERT INTO tax_rollup_job (pan_id, financial_year, calculations, gross_income, tax, net_income)
+    SELECT pan_id, IFNULL(financial_year, ''), 1, IFNULL(gross_income, 0), IFNULL(tax, 0), IFNULL(net_income, 0)
+    FROM tax_results_job WHERE id = ?
+    ON CONFLICT (pan_id, financial_year) DO UPDATE SET
+        calculations = calculations + excluded.calculations,
+        gross_income = gross_income + excluded.gross_income,
+        tax = tax + excluded.tax,
+        net_income = net_income + excluded.net_income
+'''
+
+
+def create_rollup_tables(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tax_rollup_business (
+        pan_id TEXT NOT NULL, year TEXT NOT NULL,
+        calculations INTEGER NOT NULL, gross_income REAL NOT NULL,
+        gst_payable REAL NOT NULL, final_tax_payable REAL NOT NULL,
+        PRIMARY KEY (pan_id, year)
+    ) WITHOUT ROWID''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tax_rollup_job (
+        pan_id TEXT NOT NULL, financial_year TEXT NOT NULL,
+        calculations INTEGER NOT NULL, gross_income REAL NOT NULL,
+        tax REAL NOT NULL, net_income REAL NOT NULL,
+        PRIMARY KEY (pan_id, financial_year)
+    ) WITHOUT ROWID''')
+
+
+def record_business_result(cursor, result_id):
+    """
+    Adds one tax_results_business row to its PAN's yearly rollup.
+    Call it in the same transaction as the INSERT so the two never drift apart.
+    """
+    cursor.execute(RECORD_BUSINESS_SQL, (result_id,))
+
+
+def record_job_result(cursor, result_id):
+    """
+    Adds one tax_results_job row to its PAN's yearly rollup.
+    """
+    cursor.execute(RECORD_JOB_SQL, (result_id,))
+
+
+def backfill_rollups(cursor):
+    """
+    Rebuilds both rollup tables from the full result history.
+    """
+    cursor.execute("DELETE FROM tax_rollup_business")
+    cursor.execute('''
+        INSERT INTO tax_rollup_business (pan_id, year, calculations, gross_income, gst_payable, final_tax_payable)
+        SELECT pan_id, substr(created_at, 1, 4), COUNT(*),
+               TOTAL(gross_income), TOTAL(gst_payable), TOTAL(final_tax_payable)
+        FROM tax_results_business GROUP BY pan_id, substr(created_at, 1, 4)
+    ''')
+
+    cursor.execute("DELETE FROM tax_rollup_job")
+    cursor.execute('''
+        INSERT INTO tax_rollup_job (pan_id, financial_year, calculations, gross_income, tax, net_income)
+        SELECT pan_id, IFNULL(financial_year, ''), COUNT(*),
+               TOTAL(gross_income), TOTAL(tax), TOTAL(net_income)
+        FROM tax_results_job GROUP BY pan_id, IFNULL(financial_year, '')
+    ''')
+
+
+def main():
+    from migrations import db_path, migrate
+
+    parser = argparse.ArgumentParser(description="Rebuild the yearly dashboard rollup tables.")
+    parser.add_argument('--db', default=db_path, help="SQLite database file")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    migrate(conn)
+    with conn:
+        backfill_rollups(conn.cursor())
+    business, job = (conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                     for table in ('tax_rollup_business', 'tax_rollup_job'))
+    conn.close()
+    print(f"✅ Rollups rebuilt: {business} business and {job} job PAN-years")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import os
+import time
+import sqlite3
+from queue import LifoQueue, Empty, Full
+
+from flask import current_app, g
+
+from database.migrations import migrate
+from metrics import SQL_QUERY_DURATION, SQL_FETCH_SECONDS, SQL_ROWS, statement_name
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'database', 'mydata.db')
+
+# Applied once to every new connection. WAL lets dashboard readers run while a
+# result is being written, and NORMAL sync is safe in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",    # 16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Records execute time, fetch time and row counts per statement shape (see metrics.py).
+    """
+    _statement = None
+
+    def execute(self, sql, parameters=()):
+        self._statement = statement_name(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            SQL_QUERY_DURATION.observe(time.perf_counter() - start, self._statement)
+            if self.rowcount > 0:
+                SQL_ROWS.inc(self._statement, amount=self.rowcount)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._statement = statement_name(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            SQL_QUERY_DURATION.observe(time.perf_counter() - start, self._statement)
+            if self.rowcount > 0:
+                SQL_ROWS.inc(self._statement, amount=self.rowcount)
+
+    def _fetched(self, start, rows):
+        SQL_FETCH_SECONDS.inc(self._statement, amount=time.perf_counter() - start)
+        if rows:
+            SQL_ROWS.inc(self._statement, amount=rows)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors (including the ones conn.execute makes) are TimedCursors.
+    """
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class ConnectionPool:
+    """
+    A small pool of SQLite connections shared by all request threads.
+    Connections keep their prepared statement cache between requests, so the
+    routes' queries are only compiled once per connection.
+    """
+
+    def __init__(self, database, size=8, cached_statements=256, factory=TimedConnection):
+        self.database = database
+        self.size = size
+        self.cached_statements = cached_statements
+        self.factory = factory
+        self._idle = LifoQueue(maxsize=size)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False,
+                               cached_statements=self.cached_statements, factory=self.factory)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            return self._connect()
+
+    def release(self, conn):
+        # Never hand a half-finished transaction to the next request
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                return
+
+
+def get_pool(app=None):
+    app = app or current_app
+    pool = app.extensions.get('db_pool')
+    if pool is None or pool.database != app.config['DATABASE']:
+        pool = ConnectionPool(app.config['DATABASE'], app.config['DATABASE_POOL_SIZE'])
+        # Bring the schema up to date before the first query is served
+        conn = pool.acquire()
+        migrate(conn)
+        pool.release(conn)
+        app.extensions['db_pool'] = pool
+    return pool
+
+
+def get_db():
+    """
+    Returns this app context's connection, taking one from the pool on first use.
+    Use it like sqlite3.connect: `with get_db() as conn:` commits on success.
+    """
+    if 'db' not in g:
+        g.db = get_pool().acquire()
+    return g.db
+
+
+def close_db(exc=None):
+    conn = g.pop('db', None)
+    if conn is not None:
+        get_pool().release(conn)
+
+
+def init_app(app):
+    app.config.setdefault('DATABASE', os.getenv('DATABASE_PATH', DEFAULT_DB_PATH))
+    app.config.setdefault('DATABASE_POOL_SIZE', 8)
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,124 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def bucket(value):
+    """
+    Rounds a rupee amount to two significant figures (e.g. 12,34,567 -> 12,00,000),
+    so filers with near-identical figures share one cached insight.
+    """
+    value = float(value or 0)
+    if value <= 0:
+        return 0.0
+    digits = len(str(int(value)))
+    return float(round(value, 2 - digits))
+
+
+class InsightCache:
+    """
+    Two-tier cache of AI insight text keyed by prompt: an in-process LRU in
+    front of the `insight_cache` SQLite table, which is shared by all workers
+    and survives restarts. Entries expire after `ttl` seconds and the table is
+    trimmed to `max_rows` by least recent use.
+    """
+
+    def __init__(self, pool, version, max_memory=1024, ttl=30 * 24 * 3600, max_rows=100000, sweep_every=500):
+        self.pool = pool
+        self.version = version
+        self.max_memory = max_memory
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.sweep_every = sweep_every
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.counters = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def key(self, prompt):
+        return hashlib.sha256(f"{self.version}\n{prompt}".encode('utf-8')).hexdigest()
+
+    def get(self, prompt):
+        """
+        Returns the cached insight text for a prompt, or None.
+        """
+        key = self.key(prompt)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return entry[0]
+
+        conn = self.pool.acquire()
+        try:
+            row = conn.execute('SELECT insights, created_at FROM insight_cache WHERE cache_key = ? AND created_at > ?',
+                               (key, now - self.ttl)).fetchone()
+            if row:
+                with conn:
+                    conn.execute('UPDATE insight_cache SET last_used = ? WHERE cache_key = ?', (now, key))
+        finally:
+            self.pool.release(conn)
+
+        if not row:
+            with self._lock:
+                self.counters['misses'] += 1
+            return None
+
+        self._remember(key, row[0], row[1] + self.ttl)
+        with self._lock:
+            self.counters['db_hits'] += 1
+        return row[0]
+
+    def put(self, prompt, insights):
+        key = self.key(prompt)
+        now = time.time()
+        self._remember(key, insights, now + self.ttl)
+
+        conn = self.pool.acquire()
+        try:
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO insight_cache (cache_key, insights, created_at, last_used) VALUES (?, ?, ?, ?)',
+                             (key, insights, now, now))
+        finally:
+            self.pool.release(conn)
+
+        with self._lock:
+            self.counters['stores'] += 1
+            self._puts += 1
+            sweep = self._puts % self.sweep_every == 0
+        if sweep:
+            self.sweep()
+
+    def sweep(self):
+        """
+        Deletes expired rows and trims the table to max_rows, least recently used first.
+        """
+        conn = self.pool.acquire()
+        try:
+            with conn:
+                deleted = conn.execute('DELETE FROM insight_cache WHERE created_at <= ?', (time.time() - self.ttl,)).rowcount
+                deleted += conn.execute('''DELETE FROM insight_cache WHERE cache_key IN (
+                                               SELECT cache_key FROM insight_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)''',
+                                        (self.max_rows,)).rowcount
+        finally:
+            self.pool.release(conn)
+        with self._lock:
+            self.counters['evictions'] += deleted
+        return deleted
+
+    def _remember(self, key, insights, expires_at):
+        with self._lock:
+            self._memory[key] = (insights, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['memory_entries'] = len(self._memory)
+        return stats
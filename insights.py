@@ -0,0 +1,230 @@
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from db import get_pool
+from insight_cache import InsightCache, bucket
+from metrics import REGISTRY, GEMINI_DURATION, GEMINI_ERRORS, GaugeCallback
+
+INSIGHTS_UNAVAILABLE = "Could not generate AI insights at this time."
+
+# Bump when a prompt below changes, so cached insights for the old wording are not reused
+PROMPT_VERSION = 1
+
+PROMPTS = {
+    'business': "Analyze this business data and provide 2-3 simple tax tips: Revenue ₹{revenue:,.2f}, Expenses ₹{expenses:,.2f}, 80C Investment ₹{section_80c:,.2f}",
+    'job': "Analyze this salaried employee's data and give 2-3 tax tips: Gross Salary ₹{gross_income:,.2f}, 80C Investments ₹{section_80c:,.2f}, 80D Health Insurance ₹{section_80d:,.2f}",
+}
+
+# Result kinds that can receive insights, and the table each one is stored in
+RESULT_TABLES = {
+    'business': 'tax_results_business',
+    'job': 'tax_results_job',
+}
+
+
+def build_prompt(kind, **figures):
+    """
+    Fills in the prompt for a result kind. Figures are bucketed first, so the
+    prompt text doubles as the normalized insight cache key. The model never
+    sees a filer's exact figures, so text shared with other filers in the same
+    bucket cannot quote them.
+    """
+    return PROMPTS[kind].format(**{name: bucket(value) for name, value in figures.items()})
+
+
+class GeminiClient:
+    """
+    Generates insight text with the Gemini API. The SDK takes most of a second
+    to import, so it is loaded on the first call (or by load(), see startup.py).
+    Each call gives up after `timeout` seconds, so a hung request cannot hold
+    an InsightWorker slot forever.
+    """
+
+    def __init__(self, api_key, model_name='gemini-2.5-flash', timeout=20.0):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.timeout = timeout
+        self.model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                self.model = genai.GenerativeModel(self.model_name)
+        return self.model
+
+    def generate(self, prompt):
+        model = self.model or self.load()
+        return model.generate_content(prompt, request_options={'timeout': self.timeout}).text
+
+
+class FakeInsightClient:
+    """
+    Stand-in for GeminiClient that never touches the network, for tests and load runs.
+    Set app.config['INSIGHT_CLIENT'] = FakeInsightClient() to use it.
+    """
+
+    def __init__(self, text="1. Invest in 80C instruments.\n2. Keep your health insurance receipts.", delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.text
+
+
+class InsightWorker:
+    """
+    Runs insight generation on a bounded pool of background threads and writes
+    the text into the result row's `insights` column when it arrives.
+    The request thread only queues the job, so result pages render immediately.
+    Requests for a prompt that is already being generated wait for that call
+    instead of making their own (single-flight).
+    """
+
+    def __init__(self, client, pool, cache=None, max_workers=4, max_pending=64):
+        self.client = client
+        self.pool = pool
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='insights')
+        # Bounds queued + running jobs so a slow API cannot pile up unbounded work
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # prompt -> Future of the call generating it
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+    def submit(self, kind, result_id, prompt):
+        """
+        Queues insight generation for a result row. Returns a Future of the
+        insight text, or None without queueing when the worker is saturated.
+        If `prompt` is already being generated, the row gets that call's text
+        when it finishes and no new call is made.
+        """
+        table = RESULT_TABLES[kind]
+        with self._in_flight_lock:
+            leader = self._in_flight.get(prompt)
+            if leader is None:
+                if not self._slots.acquire(blocking=False):
+                    return None
+                try:
+                    leader = self._executor.submit(self._run, table, result_id, prompt)
+                except RuntimeError:
+                    self._slots.release()
+                    return None
+                self._in_flight[prompt] = leader
+                return leader
+
+        follower = Future()
+        leader.add_done_callback(lambda done: self._follow(done, table, result_id, follower))
+        return follower
+
+    def _run(self, table, result_id, prompt):
+        try:
+            start = time.perf_counter()
+            try:
+                insights = self.client.generate(prompt)
+                GEMINI_DURATION.observe(time.perf_counter() - start, 'ok')
+                if self.cache:
+                    self.cache.put(prompt, insights)
+            except Exception as e:
+                GEMINI_DURATION.observe(time.perf_counter() - start, 'error')
+                GEMINI_ERRORS.inc(type(e).__name__)
+                print(f"Error calling Gemini API: {e}")
+                insights = INSIGHTS_UNAVAILABLE
+            self.save(table, result_id, insights)
+            return insights
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(prompt, None)
+            self._slots.release()
+
+    def _follow(self, leader, table, result_id, follower):
+        """
+        Saves the text of the call a later request waited on into that request's row.
+        """
+        try:
+            insights = leader.result()
+        except Exception:
+            insights = INSIGHTS_UNAVAILABLE
+        try:
+            self.save(table, result_id, insights)
+        except Exception as e:
+            follower.set_exception(e)
+        else:
+            follower.set_result(insights)
+
+    def cached(self, prompt):
+        """
+        Returns previously generated insights for this prompt, or None.
+        """
+        return self.cache.get(prompt) if self.cache else None
+
+    def save(self, table, result_id, insights):
+        conn = self.pool.acquire()
+        try:
+            with conn:
+                conn.execute(f"UPDATE {table} SET insights = ? WHERE id = ?", (insights, result_id))
+        finally:
+            self.pool.release(conn)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_worker_lock = threading.Lock()
+
+
+def get_insight_worker(app):
+    """
+    Returns the app's InsightWorker, or None when no insight client is configured.
+    """
+    client = app.config.get('INSIGHT_CLIENT')
+    if client is None:
+        return None
+    with _worker_lock:
+        worker = app.extensions.get('insight_worker')
+        if worker is None or worker.client is not client:
+            pool = get_pool(app)
+            cache = InsightCache(pool, PROMPT_VERSION, app.config['INSIGHT_CACHE_SIZE'],
+                                 app.config['INSIGHT_CACHE_TTL'], app.config['INSIGHT_CACHE_MAX_ROWS'])
+            worker = InsightWorker(client, pool, cache, app.config['INSIGHT_WORKERS'], app.config['INSIGHT_MAX_PENDING'])
+            app.extensions['insight_worker'] = worker
+    return worker
+
+
+def _cache_stats(app):
+    worker = app.extensions.get('insight_worker')
+    if worker is None or worker.cache is None:
+        return None
+    return worker.cache.stats()
+
+
+def init_app(app, api_key=None):
+    app.config.setdefault('INSIGHT_REQUEST_TIMEOUT', 20.0)           # seconds per Gemini call
+    if api_key:
+        app.config.setdefault('INSIGHT_CLIENT', GeminiClient(api_key, timeout=app.config['INSIGHT_REQUEST_TIMEOUT']))
+    app.config.setdefault('INSIGHT_CLIENT', None)
+    app.config.setdefault('INSIGHT_WORKERS', 4)
+    app.config.setdefault('INSIGHT_MAX_PENDING', 64)
+    app.config.setdefault('INSIGHT_CACHE_SIZE', 1024)             # entries kept in memory
+    app.config.setdefault('INSIGHT_CACHE_TTL', 30 * 24 * 3600)    # seconds
+    app.config.setdefault('INSIGHT_CACHE_MAX_ROWS', 100000)
+
+    def cache_events():
+        stats = _cache_stats(app)
+        return stats and {event: count for event, count in stats.items() if event != 'memory_entries'}
+
+    def cache_entries():
+        stats = _cache_stats(app)
+        return stats and stats['memory_entries']
+
+    REGISTRY.register(GaugeCallback('insight_cache_events_total', "Insight cache lookups and writes by outcome.",
+                                    cache_events, 'event', kind='counter'))
+    REGISTRY.register(GaugeCallback('insight_cache_memory_entries', "Insights held in the in-memory cache tier.",
+                                    cache_entries))
@@ -0,0 +1,228 @@
+"""
+In-process metrics in the Prometheus text exposition format, served at
+/metrics. Kept dependency-free and cheap enough to leave on permanently: an
+observation is one bisect plus a few additions under a per-metric lock, and
+label values are limited to small fixed sets (route rules, statement shapes).
+
+The endpoint reveals per-route latencies, pool saturation and traffic, so it
+is off unless METRICS_TOKEN is set, and scrapers must then send it as
+`Authorization: Bearer <token>` (Prometheus: `authorization: {credentials: ...}`
+or `bearer_token`). Without the token, or with a wrong one, /metrics is a 404.
+"""
+import os
+import re
+import time
+import threading
+from bisect import bisect_left
+
+from flask import g, request
+
+# Seconds. Covers a cached dashboard (~1 ms) up to a slow Gemini call
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', _number(bound))])} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(values[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class GaugeCallback:
+    """
+    A family of gauges (or counters) read from fn() at scrape time. fn returns
+    {label value: number}, or a plain number when there are no labels.
+    """
+
+    def __init__(self, name, documentation, fn, labelname=None, kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.labelname = labelname
+        self.kind = kind
+
+    def collect(self):
+        values = self.fn()
+        if values is None:
+            return
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        if self.labelname is None:
+            yield f"{self.name} {_number(values)}"
+        else:
+            for label, value in values.items():
+                yield f"{self.name}{_labels((self.labelname,), (label,))} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', "Time to build each response, by route rule.", ('method', 'route', 'status')))
+SQL_QUERY_DURATION = REGISTRY.register(Histogram(
+    'sqlite_query_duration_seconds', "Time spent in execute()/executemany(), by statement shape.", ('statement',)))
+SQL_FETCH_SECONDS = REGISTRY.register(Counter(
+    'sqlite_fetch_seconds_total', "Time spent fetching result rows, by statement shape.", ('statement',)))
+SQL_ROWS = REGISTRY.register(Counter(
+    'sqlite_rows_total', "Rows returned by SELECTs or changed by writes, by statement shape.", ('statement',)))
+GEMINI_DURATION = REGISTRY.register(Histogram(
+    'gemini_request_duration_seconds', "Latency of insight generation calls.", ('outcome',)))
+GEMINI_ERRORS = REGISTRY.register(Counter(
+    'gemini_errors_total', "Insight generation calls that raised, by exception type.", ('error',)))
+PDF_RENDER_DURATION = REGISTRY.register(Histogram(
+    'pdf_render_duration_seconds', "Time to render a PDF report (cache misses only).", ('kind',)))
+PDF_SIZE = REGISTRY.register(Histogram(
+    'pdf_size_bytes', "Size of rendered PDF reports.", ('kind',), SIZE_BUCKETS))
+PASSWORD_HASH_DURATION = REGISTRY.register(Histogram(
+    'password_hash_duration_seconds', "Time to hash or verify a password on the hashing pool.", ('operation',)))
+PASSWORD_HASH_REJECTED = REGISTRY.register(Counter(
+    'password_hash_rejected_total', "Hash or verify requests refused because the hashing pool was full.", ('operation',)))
+
+_STATEMENT = re.compile(r'^\s*(?:(INSERT)(?:\s+OR\s+\w+)?\s+INTO\s+(\w+)|(UPDATE)\s+(\w+)|(DELETE)\s+FROM\s+(\w+)'
+                        r'|(SELECT)\b.*?\bFROM\s+(\w+)|(\w+))', re.IGNORECASE | re.DOTALL)
+_statement_names = {}
+
+
+def statement_name(sql):
+    """
+    Reduces SQL to a low-cardinality label such as 'SELECT tax_results_job'.
+    Results are memoized per SQL string, which the statement cache keeps few of.
+    """
+    name = _statement_names.get(sql)
+    if name is None:
+        match = _STATEMENT.match(sql)
+        name = ' '.join(part.upper() if i % 2 == 0 else part
+                        for i, part in enumerate(p for p in match.groups() if p)) if match else 'OTHER'
+        if len(_statement_names) < 1000:
+            _statement_names[sql] = name
+    return name
+
+
+def observe_pdf(kind, seconds, size):
+    PDF_RENDER_DURATION.observe(seconds, kind)
+    PDF_SIZE.observe(size, kind)
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, request.method, route, response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    # after_request is skipped when an exception propagates (PROPAGATE_EXCEPTIONS,
+    # or an after_request hook raising), so those requests are recorded here as 500s
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, request.method, route, 500)
+
+
+def init_app(app):
+    app.config.setdefault('METRICS_TOKEN', os.getenv('METRICS_TOKEN'))
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,84 @@
+"""
+Rendered-page cache for templates whose output is the same for every user
+(the landing page and the empty calculation forms). Each page is rendered
+once per deploy and then served from memory with a strong ETag, so a browser
+revalidating with If-None-Match gets a bodiless 304 and Jinja never runs on
+the hot path.
+
+Templates that show flashed messages are rendered normally while the session
+holds flashes, which also consumes them as before.
+"""
+import hashlib
+import threading
+
+from flask import current_app, render_template, request, session
+from jinja2 import nodes
+
+
+class PageCache:
+    """
+    Rendered pages keyed by (template, variant). Emptied whenever the static
+    asset build changes, since pages embed fingerprinted asset URLs.
+    """
+
+    def __init__(self):
+        self._pages = {}
+        self._shows_flashes = {}
+        self._build = None
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if build != self._build:
+                self._pages.clear()
+                self._build = build
+            return self._pages.get(key)
+
+    def put(self, key, build, body):
+        page = (body, hashlib.sha1(body).hexdigest())
+        with self._lock:
+            if build == self._build:
+                self._pages[key] = page
+        return page
+
+    def shows_flashes(self, env, template_name):
+        """
+        Whether the template calls get_flashed_messages(), found once from its source.
+        """
+        shows = self._shows_flashes.get(template_name)
+        if shows is None:
+            source = env.loader.get_source(env, template_name)[0]
+            shows = any(node.name == 'get_flashed_messages' for node in env.parse(source).find_all(nodes.Name))
+            self._shows_flashes[template_name] = shows
+        return shows
+
+
+def render_cached(template_name, variant=None):
+    """
+    Response for a context-free template, rendered at most once per deploy.
+    `variant` must capture anything else the template reads (e.g. a session
+    value it branches on); each distinct value is cached separately.
+    """
+    app = current_app._get_current_object()
+    cache = app.extensions['page_cache']
+
+    # 1. Render as usual while editing templates, or when there are flashes to show
+    if app.jinja_env.auto_reload or (cache.shows_flashes(app.jinja_env, template_name) and session.get('_flashes')):
+        return render_template(template_name)
+
+    # 2. Cached bytes, rendering on the first request after a deploy
+    build = app.extensions['assets'].version()
+    key = (template_name, variant)
+    page = cache.get(key, build)
+    if page is None:
+        page = cache.put(key, build, render_template(template_name).encode('utf-8'))
+
+    body, etag = page
+    response = app.response_class(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # revalidate each time; a match costs a 304
+    return response.make_conditional(request)
+
+
+def init_app(app):
+    app.extensions['page_cache'] = PageCache()
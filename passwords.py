@@ -0,0 +1,106 @@
+"""
+Password hashing off the request thread. Hashing is deliberately slow (tens to
+hundreds of ms of CPU), so during a login spike it runs on a bounded pool
+sized to the cores available: hashlib's scrypt and PBKDF2 release the GIL,
+so threads scale across cores. When the queue is full, new logins fail fast
+with PasswordHasherBusy instead of piling up behind it.
+
+PASSWORD_HASH_METHOD is any werkzeug method string ('scrypt',
+'scrypt:16384:8:1', 'pbkdf2:sha256:600000', ...). Stored hashes made with
+different parameters still verify, and are re-hashed with the configured
+ones on the next successful login.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_REJECTED
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised instead of queueing when the hashing pool is saturated.
+    """
+
+
+def hash_prefix(password_hash):
+    """
+    The method and cost part of a werkzeug hash, e.g. 'scrypt:32768:8:1'.
+    """
+    return password_hash.split('$', 1)[0]
+
+
+class PasswordHasher:
+    def __init__(self, method='scrypt', max_workers=None, max_pending=None):
+        self.method = method
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Expands defaults ('scrypt' -> 'scrypt:32768:8:1') so stored hashes compare exactly
+        self.prefix = hash_prefix(generate_password_hash('', method))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='passwords')
+        # Bounds queued + running jobs; a login waiting behind more than this would time out anyway
+        self._slots = threading.BoundedSemaphore(max_pending or self.max_workers * 4)
+
+    def _submit(self, operation, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_HASH_REJECTED.inc(operation)
+            raise PasswordHasherBusy(operation)
+        try:
+            future = self._executor.submit(self._timed, operation, fn, *args)
+        except RuntimeError:
+            self._slots.release()
+            raise PasswordHasherBusy(operation)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    @staticmethod
+    def _timed(operation, fn, *args):
+        with PASSWORD_HASH_DURATION.time(operation):
+            return fn(*args)
+
+    def needs_rehash(self, password_hash):
+        return hash_prefix(password_hash) != self.prefix
+
+    def hash(self, password):
+        """
+        Returns a new hash of password with the configured method.
+        """
+        return self._submit('hash', generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """
+        Checks password against a stored hash. Returns (ok, new_hash), where
+        new_hash is a re-hash with the configured method if the stored one
+        used other parameters (store it), otherwise None.
+        """
+        return self._submit('verify', self._verify, password_hash, password)
+
+    def _verify(self, password_hash, password):
+        if not check_password_hash(password_hash, password):
+            return False, None
+        if self.needs_rehash(password_hash):
+            return True, generate_password_hash(password, self.method)
+        return True, None
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher(app):
+    with _hasher_lock:
+        hasher = app.extensions.get('password_hasher')
+        if hasher is None:
+            hasher = PasswordHasher(app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_WORKERS'],
+                                    app.config['PASSWORD_MAX_PENDING'])
+            app.extensions['password_hasher'] = hasher
+    return hasher
+
+
+def init_app(app):
+    app.config.setdefault('PASSWORD_HASH_METHOD', os.getenv('PASSWORD_HASH_METHOD', 'scrypt'))
+    app.config.setdefault('PASSWORD_WORKERS', None)      # default: one per CPU
+    app.config.setdefault('PASSWORD_MAX_PENDING', None)  # default: 4 per worker
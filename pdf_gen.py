@@ -5,6 +5,9 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER
 from reportlab.lib import colors
 
+# Bump whenever the layout below changes, so cached PDFs (report_cache.py) are rebuilt
+TEMPLATE_VERSION = 1
+
 def create_tax_report(data):
     """
     Generates a PDF tax report IN MEMORY and returns the buffer.
@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def report_key(kind, template_version, data):
+    """
+    Content address of a report: a hash of the report kind, the PDF template
+    version and the normalized `data` dict. Also used as the strong ETag.
+    """
+    payload = json.dumps({'kind': kind, 'version': template_version, 'data': data},
+                         sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ReportCache:
+    """
+    Caches rendered PDF bytes by report_key. Recently used PDFs are kept in
+    memory up to max_memory_bytes; every PDF is also written to `directory`
+    (trimmed to max_disk_bytes, oldest first) so other workers and restarts
+    can reuse it.
+    """
+
+    def __init__(self, directory, max_memory_bytes=32 * 1024 * 1024, max_disk_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._disk_bytes = self._trim_disk()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        with self._lock:
+            pdf = self._memory.get(key)
+            if pdf is not None:
+                self._memory.move_to_end(key)
+                return pdf
+        try:
+            with open(self._path(key), 'rb') as f:
+                pdf = f.read()
+        except FileNotFoundError:
+            return None
+        self._remember(key, pdf)
+        return pdf
+
+    def put(self, key, pdf):
+        self._remember(key, pdf)
+        # Write to a temp file and rename, so readers never see half a PDF
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf)
+        # Re-rendering a key replaces its file, so only the difference is new disk usage
+        try:
+            replaced = os.stat(self._path(key)).st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self._disk_bytes += len(pdf) - replaced
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            disk_bytes = self._trim_disk()
+            with self._lock:
+                self._disk_bytes = disk_bytes
+
+    def get_or_render(self, key, render):
+        """
+        Returns the cached PDF bytes for key, calling render() to build them on a miss.
+        """
+        pdf = self.get(key)
+        if pdf is None:
+            pdf = render()
+            self.put(key, pdf)
+        return pdf
+
+    def _remember(self, key, pdf):
+        if len(pdf) > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._memory[key] = pdf
+            self._memory_bytes += len(pdf)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _trim_disk(self):
+        """
+        Deletes the oldest PDFs until the directory fits max_disk_bytes and returns its size.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pdf'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+
+_cache_lock = threading.Lock()
+
+
+def get_report_cache(app):
+    with _cache_lock:
+        cache = app.extensions.get('report_cache')
+        if cache is None:
+            cache = ReportCache(app.config['REPORT_CACHE_DIR'], app.config['REPORT_CACHE_MEMORY_BYTES'],
+                                app.config['REPORT_CACHE_DISK_BYTES'])
+            app.extensions['report_cache'] = cache
+    return cache
+
+
+def init_app(app):
+    app.config.setdefault('REPORT_CACHE_DIR', os.path.join(app.instance_path, 'report_cache'))
+    app.config.setdefault('REPORT_CACHE_MEMORY_BYTES', 32 * 1024 * 1024)
+    app.config.setdefault('REPORT_CACHE_DISK_BYTES', 512 * 1024 * 1024)
@@ -0,0 +1,221 @@
+"""
+Server-side Flask sessions. The multi-page filing flow keeps nested form
+dicts in the session; with the default signed-cookie session those were
+re-sent on every request, static files included. Here the cookie carries only
+a random session id and the data lives in a store:
+
+- SQLiteSessionStore: the `sessions` table, shared by every worker process.
+- MemorySessionStore: a dict, for a single process or tests.
+
+Sessions expire SESSION_TTL seconds after they were last saved or touched;
+expired rows are swept at most every SESSION_SWEEP_INTERVAL seconds.
+"""
+import time
+import secrets
+import threading
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from db import get_pool
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.rotated_from = None
+
+
+class MemorySessionStore:
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._data.get(sid)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry
+
+    def save(self, sid, data, expires_at):
+        with self._lock:
+            if len(self._data) >= self.max_entries and sid not in self._data:
+                # Full: drop the session closest to expiry
+                del self._data[min(self._data, key=lambda key: self._data[key][1])]
+            self._data[sid] = (data, expires_at)
+
+    def touch(self, sid, expires_at):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is not None:
+                self._data[sid] = (entry[0], expires_at)
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def sweep(self, now):
+        with self._lock:
+            expired = [sid for sid, (_, expires_at) in self._data.items() if expires_at < now]
+            for sid in expired:
+                del self._data[sid]
+        return len(expired)
+
+
+class SQLiteSessionStore:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def _run(self, sql, params, fetch=False):
+        conn = self.pool.acquire()
+        try:
+            if fetch:
+                return conn.execute(sql, params).fetchone()
+            with conn:
+                return conn.execute(sql, params).rowcount
+        finally:
+            self.pool.release(conn)
+
+    def get(self, sid):
+        row = self._run("SELECT data, expires_at FROM sessions WHERE sid = ?", (sid,), fetch=True)
+        if row is None or row[1] < time.time():
+            return None
+        return row
+
+    def save(self, sid, data, expires_at):
+        self._run('''INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)
+                     ON CONFLICT (sid) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at''',
+                  (sid, data, expires_at))
+
+    def touch(self, sid, expires_at):
+        self._run("UPDATE sessions SET expires_at = ? WHERE sid = ?", (expires_at, sid))
+
+    def delete(self, sid):
+        self._run("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def sweep(self, now):
+        return self._run("DELETE FROM sessions WHERE expires_at < ?", (now,))
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Keeps session data in `store`; the cookie holds only the session id.
+    """
+    serializer = TaggedJSONSerializer()
+    session_class = ServerSideSession
+
+    def __init__(self, store, ttl=24 * 3600, sweep_interval=300):
+        self.store = store
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    def open_session(self, app, request):
+        # Static files never read the session; don't spend a store lookup on them
+        if request.path.startswith(self._static_prefixes(app)):
+            return self.make_null_session(app)
+
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            entry = self.store.get(sid)
+            if entry is not None:
+                data, expires_at = entry
+                session = self.session_class(self.serializer.loads(data), sid=sid)
+                session.expires_at = expires_at
+                return session
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    @staticmethod
+    def _static_prefixes(app):
+        prefixes = [app.config.get('ASSET_URL_PATH')]
+        if app.static_url_path:
+            prefixes.append(app.static_url_path)
+        return tuple(prefix + '/' for prefix in prefixes if prefix)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        now = time.time()
+
+        if session.rotated_from:
+            self.store.delete(session.rotated_from)
+
+        if not session:
+            # Emptied (e.g. logout): forget it on both sides
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app), httponly=self.get_cookie_httponly(app))
+            return
+
+        if session.modified or session.new:
+            self.store.save(session.sid, self.serializer.dumps(dict(session)), now + self.ttl)
+        elif getattr(session, 'expires_at', now) - now < self.ttl / 2:
+            # Sliding expiry without a write on every read-only request
+            self.store.touch(session.sid, now + self.ttl)
+
+        if session.new or session.permanent:
+            response.vary.add('Cookie')
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                                secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
+        self._maybe_sweep(now)
+
+    def _maybe_sweep(self, now):
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sweep = now + self.sweep_interval
+            self.store.sweep(now)
+        finally:
+            self._sweep_lock.release()
+
+
+def rotate_session(session):
+    """
+    Gives the session a fresh id (call on login) so an id known before
+    authentication cannot be reused after it. The old entry is deleted on save.
+    """
+    if isinstance(session, ServerSideSession):
+        if not session.new:
+            session.rotated_from = session.sid
+        session.sid = secrets.token_urlsafe(32)
+        session.new = True
+        session.modified = True
+
+
+def init_app(app):
+    app.config.setdefault('SESSION_BACKEND', 'sqlite')   # 'sqlite' or 'memory'
+    app.config.setdefault('SESSION_TTL', 24 * 3600)      # seconds since last use
+    app.config.setdefault('SESSION_SWEEP_INTERVAL', 300)
+    if app.config['SESSION_BACKEND'] == 'memory':
+        store = MemorySessionStore()
+    else:
+        store = SQLiteSessionStore(_LazyPool(app))
+    app.session_interface = ServerSessionInterface(store, app.config['SESSION_TTL'], app.config['SESSION_SWEEP_INTERVAL'])
+
+
+class _LazyPool:
+    """
+    Resolves the app's connection pool on first use, after DATABASE is configured.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def acquire(self):
+        return get_pool(self.app).acquire()
+
+    def release(self, conn):
+        get_pool(self.app).release(conn)
@@ -0,0 +1,61 @@
+"""
+Cold-start tuning.
+
+Heavy subsystems most requests never touch (ReportLab through the PDF
+modules, the Gemini SDK) are imported on first use instead of when app.py
+loads, so worker boot and scale-out stay fast. Forking servers that load the
+app once in a master process (gunicorn --preload) can call preload() there
+instead (or set PRELOAD_APP=1), so every worker starts with them imported and
+shared copy-on-write.
+
+Compiled templates go to a Jinja FileSystemBytecodeCache in JINJA_CACHE_DIR,
+shared by every worker on the host; `python -m startup` fills it at deploy
+time. See benchmarks/import_time.py for the per-module import-time report.
+"""
+import os
+import time
+import importlib
+
+from jinja2 import FileSystemBytecodeCache
+
+# Imported on first use by the routes that need them
+LAZY_MODULES = ('pdf_gen', 'bus_pdf_gen', 'statement_pdf')
+
+
+def compile_templates(app):
+    """
+    Loads every template once, which compiles it into the bytecode cache. Returns how many there were.
+    """
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def preload(app):
+    """
+    Imports the lazily loaded subsystems and compiles the templates up front.
+    """
+    for name in LAZY_MODULES:
+        importlib.import_module(name)
+    client = app.config.get('INSIGHT_CLIENT')
+    if hasattr(client, 'load'):
+        client.load()
+    compile_templates(app)
+
+
+def init_app(app):
+    app.config.setdefault('JINJA_CACHE_DIR', os.getenv('JINJA_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache'))
+    os.makedirs(app.config['JINJA_CACHE_DIR'], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['JINJA_CACHE_DIR'])
+
+
+def main():
+    start = time.perf_counter()
+    from app import app
+    count = compile_templates(app)
+    print(f"✅ Compiled {count} templates into {app.config['JINJA_CACHE_DIR']} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""
+Consolidated multi-year statement for one PAN.
+
+Unlike pdf_gen / bus_pdf_gen, which render a single calculation from the
+session, this covers a PAN's whole tax_results_job or tax_results_business
+history: a year-over-year trend table (from the rollups) followed by every
+calculation, paged by year with a subtotal row per year.
+
+History rows are read through a cursor in small batches and turned into
+flowables only when ReportLab asks for the next one, so the story never holds
+more than a page or two of tables regardless of how long the history is. The
+PDF is written straight to the file or stream it is given.
+
+Usage:
+    python statement_pdf.py ABCDE1234F --kind job -o statement.pdf
+"""
+import os
+import argparse
+import sqlite3
+from datetime import datetime
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib import colors
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'database', 'mydata.db')
+
+# History rows per table; about one page each
+ROWS_PER_TABLE = 35
+FETCH_SIZE = 200
+
+STATEMENTS = {
+    'job': {
+        'title': "Income Tax Statement (Salary)",
+        'rollup': '''SELECT financial_year, calculations, gross_income, tax, net_income
+                     FROM tax_rollup_job WHERE pan_id = ? ORDER BY financial_year''',
+        'rows': '''SELECT created_at, financial_year, gross_income, tax, net_income FROM tax_results_job
+                   WHERE pan_id = ? AND IFNULL(financial_year, '') = ? ORDER BY created_at, id''',
+        'headers': ['Date', 'FY', 'Gross Income (₹)', 'Tax (₹)', 'Net Income (₹)'],
+        'money_columns': 3,
+        'tax_column': 1,
+        'year_label': "FY",
+    },
+    'business': {
+        'title': "GST & Business Tax Statement",
+        'rollup': '''SELECT year, calculations, gross_income, gst_payable, final_tax_payable
+                     FROM tax_rollup_business WHERE pan_id = ? ORDER BY year''',
+        # Calendar years as a created_at range, so the (pan_id, created_at) index is used
+        'rows': '''SELECT created_at, net_taxable_income, gross_income, gst_payable, final_tax_payable
+                   FROM tax_results_business WHERE pan_id = ? AND created_at >= ? AND created_at < ?
+                   ORDER BY created_at, id''',
+        'headers': ['Date', 'Taxable Income (₹)', 'Gross Income (₹)', 'GST Payable (₹)', 'Tax Payable (₹)'],
+        'money_columns': 4,
+        'tax_column': 2,
+        'year_label': "Year",
+    },
+}
+
+
+class LazyStory(list):
+    """
+    A story list that pulls flowables from a generator as the document
+    template consumes them. build() only ever looks at the front of the list,
+    so a small look-ahead keeps keepWithNext and split handling working.
+    """
+
+    def __init__(self, flowables, lookahead=3):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+        self._fill(lookahead)
+
+    def _fill(self, count):
+        while self._source is not None and super().__len__() < count:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill(self._lookahead)
+        return super().__len__()
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and index >= 0:
+            self._fill(index + 1)
+        return super().__getitem__(index)
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._fill(self._lookahead)
+
+
+# The ₹ sign lives in the column headers: per-cell it would take ReportLab's slow unicode path
+def _money(value):
+    return f"{value or 0:,.2f}"
+
+
+def _change(current, previous):
+    if not previous:
+        return '-'
+    return f"{(current - previous) / previous * 100:+.1f} %"
+
+
+def _history_table(rows, money_columns, subtotal=None):
+    data = [rows[0]] + [[(row[0] or '')[:10], *row[1:-money_columns], *map(_money, row[-money_columns:])] for row in rows[1:]]
+    style = [
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#e6eef7")),
+        ('ALIGN', (-money_columns, 1), (-1, -1), 'RIGHT'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ]
+    if subtotal:
+        data.append(subtotal)
+        style += [
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightyellow),
+        ]
+    table = Table(data, repeatRows=1)
+    table.setStyle(TableStyle(style))
+    return table
+
+
+def _year_rows(conn, kind, pan_id, year):
+    spec = STATEMENTS[kind]
+    if kind == 'business':
+        # Full dates: created_at has NUMERIC affinity, so a bare '2024' would compare as a number
+        params = (pan_id, f"{year}-01-01", f"{int(year) + 1}-01-01")
+    else:
+        params = (pan_id, year)
+    cursor = conn.execute(spec['rows'], params)
+    while True:
+        batch = cursor.fetchmany(FETCH_SIZE)
+        if not batch:
+            return
+        yield from batch
+
+
+def iter_statement(conn, kind, pan_id, personal, styles):
+    """
+    Yields the statement's flowables one at a time, reading history rows as it goes.
+    """
+    spec = STATEMENTS[kind]
+    title_style = ParagraphStyle('title_style', parent=styles['Heading1'], alignment=TA_CENTER, fontSize=18, spaceAfter=20)
+    section_style = ParagraphStyle('section_style', parent=styles['Heading2'], textColor=colors.HexColor("#003366"),
+                                   fontSize=14, spaceAfter=10, keepWithNext=1)
+    money_columns = spec['money_columns']
+
+    # --- Title & personal details ---
+    yield Paragraph(spec['title'], title_style)
+    personal_table = Table([
+        ['PAN:', pan_id],
+        ['Name:', personal.get('name', 'N/A')],
+        ['Email:', personal.get('email', 'N/A')],
+        ['Mobile Number:', personal.get('mobile_number', 'N/A')],
+        ['Generated:', datetime.now().strftime('%Y-%m-%d %H:%M')],
+    ], colWidths=[150, 300])
+    personal_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('BOX', (0, 0), (-1, -1), 0.25, colors.black),
+    ]))
+    yield personal_table
+    yield Spacer(1, 20)
+
+    # --- Trend summary: one row per year, already aggregated in the rollups ---
+    years = conn.execute(spec['rollup'], (pan_id,)).fetchall()
+    if not years:
+        yield Paragraph("No saved calculations for this PAN.", styles['Normal'])
+        return
+
+    yield Paragraph("Year-over-Year Summary", section_style)
+    trend = [[spec['year_label'], 'Calculations', spec['headers'][-3], spec['headers'][-2], spec['headers'][-1], 'Tax Change']]
+    previous_tax = None
+    for year, calculations, *totals in years:
+        tax = totals[spec['tax_column']]
+        trend.append([year or '-', calculations, *map(_money, totals), _change(tax, previous_tax)])
+        previous_tax = tax
+    trend.append(['Total', sum(row[1] for row in years),
+                  *(_money(sum(row[i] for row in years)) for i in (2, 3, 4)), ''])
+    trend_table = Table(trend, repeatRows=1)
+    trend_table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#e6eef7")),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.lightyellow),
+        ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ]))
+    yield trend_table
+    yield Spacer(1, 20)
+
+    # --- Full history, one section per year, a table per ROWS_PER_TABLE rows ---
+    for year, *_ in years:
+        yield Paragraph(f"Calculations – {spec['year_label']} {year or 'not set'}", section_style)
+        rows = [spec['headers']]
+        count = 0
+        sums = [0.0] * money_columns
+        for row in _year_rows(conn, kind, pan_id, year):
+            rows.append(row)
+            count += 1
+            for i, value in enumerate(row[-money_columns:]):
+                sums[i] += value or 0
+            if len(rows) > ROWS_PER_TABLE:
+                yield _history_table(rows, money_columns)
+                rows = [spec['headers']]
+        label = [f"Subtotal ({count})"] + [''] * (len(spec['headers']) - money_columns - 1)
+        yield _history_table(rows, money_columns, subtotal=label + [_money(value) for value in sums])
+        yield Spacer(1, 16)
+
+
+def create_statement(conn, kind, pan_id, output):
+    """
+    Writes the consolidated statement PDF for pan_id to output (a path or a
+    writable binary file object).
+    """
+    person = conn.execute('''SELECT p.name, p.email, p.mobile_number FROM user_pan_mapping m
+                             JOIN people_info p ON p.id = m.person_id WHERE m.pan_id = ?''', (pan_id,)).fetchone()
+    personal = dict(zip(('name', 'email', 'mobile_number'), person)) if person else {}
+
+    doc = SimpleDocTemplate(output, pagesize=letter, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40,
+                            title=STATEMENTS[kind]['title'])
+
+    def page_number(canvas, doc):
+        canvas.setFont('Helvetica', 8)
+        canvas.drawRightString(letter[0] - 40, 20, f"{pan_id} – page {doc.page}")
+
+    story = LazyStory(iter_statement(conn, kind, pan_id, personal, getSampleStyleSheet()))
+    doc.build(story, onFirstPage=page_number, onLaterPages=page_number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a PAN's consolidated multi-year statement.")
+    parser.add_argument('pan_id')
+    parser.add_argument('--kind', choices=sorted(STATEMENTS), default='job')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="SQLite database file")
+    parser.add_argument('-o', '--output', default=None, help="PDF file to write")
+    args = parser.parse_args()
+
+    output = args.output or f"{args.pan_id}_{args.kind}_statement.pdf"
+    conn = sqlite3.connect(args.db)
+    create_statement(conn, args.kind, args.pan_id, output)
+    conn.close()
+    print(f"✅ Statement written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+// Keyset-paginated calculation history for the dashboards.
+// The server renders only the newest page; this keeps the charts and the
+// history table in step as older pages are fetched from /api/history/<kind>.
+function initHistoryPager(options) {
+    // options: apiUrl, page ({items, next}), total, label(item),
+    //          charts ([{chart, fields}]), tableBody, rowCells(item), buttons
+    let items = [];  // oldest first, the order the charts draw in
+    let next = null;
+    let loaded = 0;
+
+    function addPage(page, renderRows) {
+        // Pages arrive newest first; number them the way the history table does
+        page.items.forEach(item => {
+            item.number = options.total - loaded;
+            loaded += 1;
+        });
+        items = page.items.slice().reverse().concat(items);
+        next = page.next;
+
+        const labels = items.map(options.label);
+        options.charts.forEach(({ chart, fields }) => {
+            if (!chart) return;
+            chart.data.labels = labels;
+            chart.data.datasets.forEach((dataset, i) => {
+                dataset.data = items.map(item => Number(item[fields[i]] || 0));
+            });
+            chart.update();
+        });
+
+        if (renderRows && options.tableBody) {
+            page.items.forEach(item => {
+                const row = document.createElement('tr');
+                options.rowCells(item).forEach(text => {
+                    const cell = document.createElement('td');
+                    cell.textContent = text;
+                    row.appendChild(cell);
+                });
+                options.tableBody.appendChild(row);
+            });
+        }
+        options.buttons.forEach(button => button.style.display = next ? '' : 'none');
+    }
+
+    function loadOlder() {
+        if (!next) return;
+        options.buttons.forEach(button => button.disabled = true);
+        fetch(`${options.apiUrl}?${new URLSearchParams(next)}`)
+            .then(response => response.json())
+            .then(page => addPage(page, true))
+            .catch(error => console.error("Error loading older history:", error))
+            .finally(() => options.buttons.forEach(button => button.disabled = false));
+    }
+
+    options.buttons.forEach(button => button.addEventListener('click', loadOlder));
+    // The first page's table rows are already rendered by the server
+    addPage(options.page, false);
+}
+
+function insightsPreview(insights) {
+    if (!insights || insights === "Could not generate AI insights at this time.") return "-";
+    return insights.length > 100 ? insights.slice(0, 100) + "..." : insights;
+}
+
+function money(value) {
+    return Number(value || 0).toFixed(2);
+}
@@ -0,0 +1,86 @@
+import numpy as np
+
+from tax_slabs import get_slab_table
+from calc_job import (calc_job_tax_new_regime, calc_job_tax_old_regime, calc_job_tax_old_regime_batch,
+                      old_regime_deductions)
+
+# Sections a filer can still top up, and the what-if grid step in rupees
+OPTIMIZED_SECTIONS = ('80c', '80d', '80ccd_1b')
+GRID_STEP = 5000
+
+
+def deduction_headroom(deductions, table):
+    """
+    Returns how much more each optimizable section could still deduct under the old-regime caps.
+    """
+    caps = table.deduction_caps
+    allowed = old_regime_deductions(deductions, table)
+    return {
+        '80c': caps['80c'] - allowed['80c'],
+        '80d': (caps['80d_self'] - min(deductions.get('health_ins_self', 0), caps['80d_self']))
+               + (caps['80d_parents'] - min(deductions.get('health_ins_parents', 0), caps['80d_parents'])),
+        '80ccd_1b': caps['80ccd_1b'] - allowed['80ccd_1b'],
+    }
+
+
+def _grid(headroom, step):
+    # 0, step, 2*step, ... and the headroom itself, so "use it all" is always a scenario
+    return np.unique(np.append(np.arange(0, headroom, step), headroom))
+
+
+def compare_regimes(gross_income, tds, deductions, financial_year=None, step=GRID_STEP):
+    """
+    Compares the new and old regimes for a salaried filer and searches for the
+    cheapest option.
+
+    Every combination of extra 80C, 80D and 80CCD(1B) deductions (in `step`
+    rupee increments up to each section's remaining cap) is taxed under the
+    old regime in one vectorized pass; the new regime ignores these sections,
+    so its tax is the same in every scenario. Returns a dict with both
+    regimes' tax on the declared deductions, the cheapest regime and extra
+    allocation ('best'), and the smallest extra allocation at which the old
+    regime stops costing more than the new one ('break_even', or None).
+    """
+    table = get_slab_table(financial_year, 'old')
+    allowed = old_regime_deductions(deductions, table)
+    new_tax, new_taxable = calc_job_tax_new_regime(gross_income, tds, financial_year)
+    old_tax, old_taxable = calc_job_tax_old_regime(gross_income, tds, deductions, financial_year)
+
+    # 1. What-if grid over the remaining headroom of each section
+    headroom = deduction_headroom(deductions, table)
+    axes = np.meshgrid(*(_grid(headroom[section], step) for section in OPTIMIZED_SECTIONS), indexing='ij')
+    extra = np.stack([axis.ravel() for axis in axes])  # one row per section
+    extra_total = extra.sum(axis=0)
+
+    # 2. Old-regime tax for every scenario at once
+    scenario_tax, _cess, _taxable = calc_job_tax_old_regime_batch(
+        gross_income, tds, sum(allowed.values()) + extra_total, financial_year)
+
+    # 3. Cheapest scenario; among equal taxes, the one needing the least extra
+    cheapest = np.lexsort((extra_total, np.round(scenario_tax, 2)))[0]
+
+    def allocation(i):
+        return {section: float(extra[n, i]) for n, section in enumerate(OPTIMIZED_SECTIONS)}
+
+    if scenario_tax[cheapest] < new_tax - 0.005:
+        best = {'regime': 'old', 'tax': float(scenario_tax[cheapest]),
+                'extra': allocation(cheapest), 'extra_total': float(extra_total[cheapest])}
+    else:
+        best = {'regime': 'new', 'tax': new_tax,
+                'extra': dict.fromkeys(OPTIMIZED_SECTIONS, 0.0), 'extra_total': 0.0}
+
+    # 4. Smallest top-up that makes the old regime no dearer than the new one
+    break_even = None
+    if old_tax > new_tax and best['regime'] == 'old':
+        candidates = np.flatnonzero(scenario_tax <= new_tax)
+        i = candidates[np.argmin(extra_total[candidates])]
+        break_even = {'tax': float(scenario_tax[i]), 'extra': allocation(i), 'extra_total': float(extra_total[i])}
+
+    return {
+        'new': {'tax': new_tax, 'taxable_income': new_taxable},
+        'old': {'tax': old_tax, 'taxable_income': old_taxable, 'deductions': allowed},
+        'current_best': 'old' if old_tax < new_tax else 'new',
+        'best': best,
+        'break_even': break_even,
+        'scenarios': int(extra_total.size),
+    }
@@ -0,0 +1,83 @@
+import os
+import json
+from bisect import bisect_left
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SLABS_FILE = os.path.join(BASE_DIR, 'tax_slabs.json')
+
+# Used when the filer's financial year is missing or not in tax_slabs.json
+DEFAULT_FINANCIAL_YEAR = '2024-25'
+
+
+class SlabTable:
+    """
+    Income tax slabs for one financial year and regime.
+    The tax due at the start of every slab is precomputed, so a lookup is one
+    bisect on the slab boundaries plus one multiply-add.
+    """
+
+    def __init__(self, financial_year, regime, slabs, cess_rate, standard_deduction=0, deduction_caps=None):
+        self.financial_year = financial_year
+        self.regime = regime
+        # Chapter VI-A limits, only used by the old regime (see calc_job.old_regime_deductions)
+        self.deduction_caps = dict(deduction_caps or {})
+        self.lower_limits = [float(lower) for lower, _ in slabs]
+        self.rates = [float(rate) for _, rate in slabs]
+        self.cess_rate = float(cess_rate)
+        self.standard_deduction = float(standard_deduction)
+
+        # Cumulative tax at each slab boundary, rounded to paise so e.g. the
+        # 15,000 at 6L is exactly 15000 and not 15000.000000000002
+        self.base_tax = [0.0]
+        for i in range(1, len(self.lower_limits)):
+            width = self.lower_limits[i] - self.lower_limits[i - 1]
+            self.base_tax.append(round(self.base_tax[-1] + width * self.rates[i - 1], 2))
+
+        self._lower_limits_arr = np.array(self.lower_limits)
+        self._rates_arr = np.array(self.rates)
+        self._base_tax_arr = np.array(self.base_tax)
+
+    def tax(self, taxable_income):
+        """
+        Returns the slab tax (before cess) on a single taxable income.
+        """
+        # A slab applies once income is strictly above its lower limit
+        i = max(bisect_left(self.lower_limits, taxable_income) - 1, 0)
+        return (taxable_income - self.lower_limits[i]) * self.rates[i] + self.base_tax[i]
+
+    def tax_batch(self, taxable_income):
+        """
+        Returns the slab tax (before cess) for an array of taxable incomes.
+        """
+        i = np.maximum(np.searchsorted(self._lower_limits_arr, taxable_income, side='left') - 1, 0)
+        return (taxable_income - self._lower_limits_arr[i]) * self._rates_arr[i] + self._base_tax_arr[i]
+
+
+def load_slab_tables(path=SLABS_FILE):
+    """
+    Reads the slab definitions file into a {(financial_year, regime): SlabTable} registry.
+    """
+    with open(path, encoding='utf-8') as f:
+        definitions = json.load(f)
+
+    registry = {}
+    for financial_year, regimes in definitions.items():
+        for regime, table in regimes.items():
+            registry[(financial_year, regime)] = SlabTable(financial_year, regime, **table)
+    return registry
+
+
+SLAB_TABLES = load_slab_tables()
+
+
+def get_slab_table(financial_year=None, regime='new'):
+    """
+    Returns the SlabTable for a financial year and regime, falling back to
+    DEFAULT_FINANCIAL_YEAR when the year has no slabs registered.
+    """
+    table = SLAB_TABLES.get((financial_year, regime))
+    if table is None:
+        table = SLAB_TABLES[(DEFAULT_FINANCIAL_YEAR, regime)]
+    return table
@@ -0,0 +1,95 @@
+"""
+Shared fixtures. The app is imported once against a throwaway database, with
+the Gemini key cleared so nothing can reach the network; tests that need AI
+insights install a FakeInsightClient through the `use_client` fixture.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Must be set before app is imported: app reads them at import time
+_TMP = tempfile.mkdtemp(prefix='gst-itr-tests-')
+os.environ['DATABASE_PATH'] = os.path.join(_TMP, 'test.db')
+os.environ['JINJA_CACHE_DIR'] = os.path.join(_TMP, 'jinja_cache')
+os.environ['GEMINI_API_KEY'] = ''
+os.environ.pop('PRELOAD_APP', None)
+os.environ.pop('METRICS_TOKEN', None)
+
+from app import app as flask_app  # noqa: E402
+from db import get_pool  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config['TESTING'] = True
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def query(app):
+    """
+    query(sql, *params) -> fetchall() on a pooled connection.
+    """
+    def run(sql, *params):
+        pool = get_pool(app)
+        conn = pool.acquire()
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            pool.release(conn)
+    return run
+
+
+@pytest.fixture
+def use_client(app, query):
+    """
+    use_client(client, **config) makes the app generate insights with `client`
+    (a fresh worker and an empty insight cache); the old settings come back afterwards.
+    """
+    saved = {key: app.config.get(key) for key in ('INSIGHT_CLIENT', 'INSIGHT_WORKERS', 'INSIGHT_MAX_PENDING')}
+
+    def install(client, **config):
+        query("DELETE FROM insight_cache")
+        app.config.update(config, INSIGHT_CLIENT=client)
+        return client
+
+    yield install
+
+    worker = app.extensions.pop('insight_worker', None)
+    if worker:
+        worker.shutdown(wait=True)
+    app.config.update(saved)
+
+
+@pytest.fixture
+def fill_result_session():
+    """
+    fill_result_session(client, kind, pan_id, amount) fills the session the way
+    the forms do, so /<kind>/result and the reports can be requested.
+    """
+    def fill(client, kind, pan_id, amount=1000000):
+        with client.session_transaction() as sess:
+            sess['pan_id'] = pan_id
+            sess['person_id'] = 1
+            if kind == 'business':
+                sess['business_income'] = {'gross_income': amount, 'other_income': 0, 'total_income': amount}
+                sess['business_details'] = {'purchase_value': 200000, 'gst_rate_purchase': 18, 'type_of_supply_purchase': 'Intra-State',
+                                            'sell_value': 500000, 'gst_rate_sell': 18, 'type_of_supply_sell': 'Inter-State'}
+                sess['business_expenses'] = {'rent': 120000, 'employee_wage': 0, 'operating_expenses': 0,
+                                             'subscription': 0, 'other_expenses': 0}
+                sess['finance_deduction'] = {'section_80c': 50000, 'section_80d': 0, 'other_deduction': 0}
+            else:
+                sess['job_income'] = {'financial_year': '2024-25', 'basic_salary': amount}
+                sess['job_deductions'] = {'epf_ppf': 50000, 'health_ins_self': 10000, 'tds': 0}
+    return fill
@@ -0,0 +1,154 @@
+"""
+The ASGI entry point (asgi.application), driven directly without a server:
+the coroutine views (results, dashboards, PDF reports) and a streamed WSGI
+route (the bulk ZIP).
+"""
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+
+from asgi import application
+from insights import RESULT_TABLES, FakeInsightClient
+from db import get_pool
+
+
+async def asgi_request(method, path, body=b'', headers=()):
+    """
+    Sends one request through asgi.application and returns (status, headers, body).
+    """
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    if body:
+        headers.append((b'content-length', str(len(body)).encode()))
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'headers': headers,
+             'server': ('testserver', 80), 'client': ('127.0.0.1', 5555), 'scheme': 'http',
+             'http_version': '1.1', 'root_path': ''}
+    received = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await asyncio.Event().wait()  # no disconnect while the response is sent
+
+    response = {'body': b''}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {name.decode(): value.decode() for name, value in message['headers']}
+        else:
+            response['body'] += message.get('body', b'')
+            response['complete'] = not message.get('more_body', False)
+
+    await application(scope, receive, send)
+    assert response.get('complete'), "response body was never finished"
+    return response['status'], response['headers'], response['body']
+
+
+@pytest.fixture
+def admin_token(app):
+    saved = app.config.get('ADMIN_TOKEN'), app.config.get('BULK_REPORT_WORKERS')
+    app.config['ADMIN_TOKEN'] = 'admin-secret'
+    app.config['BULK_REPORT_WORKERS'] = 1
+    yield 'admin-secret'
+    app.config['ADMIN_TOKEN'], app.config['BULK_REPORT_WORKERS'] = saved
+
+
+@pytest.fixture
+def filers(query):
+    pans = ['ZIPAA1234A', 'ZIPBB1234B']
+    for n, pan in enumerate(pans):
+        person_id = 900 + n
+        query("INSERT OR IGNORE INTO people_info (id, name, email, mobile_number) VALUES (?, ?, ?, ?)",
+              person_id, f'Filer {n}', f'filer{n}@example.com', '9000000000')
+        query("INSERT OR IGNORE INTO user_pan_mapping (pan_id, person_id) VALUES (?, ?)", pan, person_id)
+        query("INSERT INTO tax_results_job (person_id, pan_id, financial_year, gross_income, tax, net_income) "
+              "VALUES (?, ?, '2024-25', ?, ?, ?)", person_id, pan, 1200000 + n, 71500, 1125000)
+    return pans
+
+
+def test_bulk_zip_streams_complete_archive(app, admin_token, filers, monkeypatch):
+    pool = get_pool(app)
+    outstanding = []
+    acquire, release = pool.acquire, pool.release
+    monkeypatch.setattr(pool, 'acquire', lambda: outstanding.append(1) or acquire())
+    monkeypatch.setattr(pool, 'release', lambda conn: outstanding.pop() and release(conn))
+
+    async def fetch_all():
+        body = json.dumps({'pans': filers}).encode()
+        headers = [('X-Admin-Token', admin_token), ('Content-Type', 'application/json')]
+        # Concurrent requests each stream on their own bridge thread
+        return await asyncio.gather(*(asyncio.wait_for(asgi_request('POST', '/admin/reports.zip', body, headers), 120)
+                                      for _ in range(3)))
+
+    for status, headers, body in asyncio.run(fetch_all()):
+        assert status == 200
+        assert headers['content-type'] == 'application/zip'
+        with zipfile.ZipFile(io.BytesIO(body)) as archive:
+            assert archive.testzip() is None
+            names = archive.namelist()
+            for pan in filers:
+                assert archive.read(f"{pan}_job_tax_report.pdf").startswith(b'%PDF')
+        assert len(names) == len(filers) + 1  # plus the render-time report
+    # Every pooled connection the streams used was handed back
+    assert outstanding == []
+
+
+def test_routes_through_the_wsgi_bridge_and_coroutine_views(app):
+    status, _, body = asyncio.run(asgi_request('GET', '/'))
+    assert status == 200 and b'<html' in body.lower()
+    status, headers, _ = asyncio.run(asgi_request('GET', '/dashboard/job'))
+    assert status == 302 and headers['location'].endswith('/signup')
+
+
+def session_cookie(app, client):
+    """
+    The Cookie header that carries `client`'s session into an ASGI request.
+    """
+    name = app.config['SESSION_COOKIE_NAME']
+    return ('Cookie', f"{name}={client.get_cookie(name).value}")
+
+
+@pytest.fixture
+def coroutines_only(monkeypatch):
+    # A coroutine view that fell back to the WSGI bridge would pass the same checks
+    async def no_bridge(environ, send):
+        raise AssertionError(f"{environ['PATH_INFO']} was run through the WSGI bridge")
+    monkeypatch.setattr(application, '_call_wsgi', no_bridge)
+
+
+@pytest.mark.parametrize('kind', ['business', 'job'])
+def test_result_dashboard_and_report_coroutines(app, client, query, use_client, fill_result_session,
+                                                coroutines_only, kind):
+    fake = use_client(FakeInsightClient("Claim HRA on rent receipts."))
+    pan = f'ASYNC{kind[0].upper()}1234A'
+    fill_result_session(client, kind, pan)
+    cookie = session_cookie(app, client)
+
+    # The result page waits (up to ASGI_INSIGHT_TIMEOUT) for the worker, so the tips are inline
+    status, _, body = asyncio.run(asgi_request('GET', f'/{kind}/result', headers=[cookie]))
+    assert status == 200
+    assert fake.text in body.decode()
+    assert query(f"SELECT insights FROM {RESULT_TABLES[kind]} WHERE pan_id = ?", pan) == [(fake.text,)]
+
+    status, _, body = asyncio.run(asgi_request('GET', f'/dashboard/{kind}', headers=[cookie]))
+    assert status == 200 and b'<html' in body.lower()
+
+    status, headers, body = asyncio.run(asgi_request('GET', f'/download-{kind}-report', headers=[cookie]))
+    assert status == 200
+    assert headers['content-type'] == 'application/pdf'
+    assert body.startswith(b'%PDF')
+    # Revalidating with the report's ETag skips the render
+    status, _, body = asyncio.run(asgi_request('GET', f'/download-{kind}-report',
+                                               headers=[cookie, ('If-None-Match', headers['etag'])]))
+    assert status == 304 and body == b''
+
+
+def test_coroutine_views_redirect_without_a_session(coroutines_only):
+    status, headers, _ = asyncio.run(asgi_request('GET', '/job/result'))
+    assert status == 302 and headers['location'].endswith('/job/details')
+    status, headers, _ = asyncio.run(asgi_request('GET', '/download-business-report'))
+    assert status == 302
@@ -0,0 +1,46 @@
+"""
+Vendored third-party files are only written when they match their pinned sha256.
+"""
+import hashlib
+
+import pytest
+
+from assets import VendorIntegrityError, fetch_vendor
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    source = tmp_path / 'upstream.js'
+    source.write_bytes(b'/*! lib v1 */ window.lib = {};\n')
+    return source
+
+
+def test_pinned_file_is_fetched(tmp_path, upstream):
+    static = tmp_path / 'static'
+    vendor = {'vendor/lib.js': (upstream.as_uri(), hashlib.sha256(upstream.read_bytes()).hexdigest())}
+    assert fetch_vendor(str(static), vendor) == ['vendor/lib.js']
+    assert (static / 'vendor' / 'lib.js').read_bytes() == upstream.read_bytes()
+    assert fetch_vendor(str(static), vendor) == []
+
+
+def test_mismatched_download_is_rejected(tmp_path, upstream):
+    static = tmp_path / 'static'
+    vendor = {'vendor/lib.js': (upstream.as_uri(), hashlib.sha256(b'something else').hexdigest())}
+    with pytest.raises(VendorIntegrityError):
+        fetch_vendor(str(static), vendor)
+    assert not (static / 'vendor' / 'lib.js').exists()
+
+
+def test_tampered_local_copy_is_rejected(tmp_path, upstream):
+    static = tmp_path / 'static'
+    vendor = {'vendor/lib.js': (upstream.as_uri(), hashlib.sha256(upstream.read_bytes()).hexdigest())}
+    fetch_vendor(str(static), vendor)
+    (static / 'vendor' / 'lib.js').write_bytes(b'window.lib = evil;\n')
+    with pytest.raises(VendorIntegrityError):
+        fetch_vendor(str(static), vendor)
+
+
+def test_unpinned_entries_are_never_fetched(tmp_path, upstream):
+    static = tmp_path / 'static'
+    assert fetch_vendor(str(static), {'vendor/lib.js': (upstream.as_uri(), None)}) == []
+    assert not (static / 'vendor').exists()
@@ -0,0 +1,41 @@
+"""
+Bulk report ZIPs: a report that fails to render is skipped and recorded, and
+the rest of the archive still completes.
+"""
+import csv
+import io
+import zipfile
+
+from bulk_reports import iter_reports_zip
+
+
+def job_data(name):
+    return {
+        'personal': {'name': name, 'email': 'n/a', 'mobile_number': 'n/a', 'phone': 'n/a', 'age': 'N/A'},
+        'financial_year': '2024-25',
+        'income': {'basic_salary': 1200000, 'hra_received': 0, 'savings_interest': 0, 'fd_interest': 0, 'other_income': 0},
+        'summary': {'gross_income': 1200000, 'standard_deduction': 75000, 'taxable_income': 1125000,
+                    'total_tax': 71500, 'tds': 0, 'final_tax_due': 71500},
+    }
+
+
+def test_failed_report_is_skipped_and_recorded():
+    jobs = [
+        ('GOODA1234A_job_tax_report.pdf', 'job', job_data('Good A')),
+        ('BROKE1234B_job_tax_report.pdf', 'job', {'personal': {}}),
+        ('GOODC1234C_job_tax_report.pdf', 'job', job_data('Good C')),
+    ]
+    errors = []
+    body = b''.join(iter_reports_zip(jobs, workers=1, on_error=lambda filename, error: errors.append(filename)))
+
+    with zipfile.ZipFile(io.BytesIO(body)) as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == ['GOODA1234A_job_tax_report.pdf', 'GOODC1234C_job_tax_report.pdf',
+                                              'render_latency.csv']
+        rows = list(csv.DictReader(io.StringIO(archive.read('render_latency.csv').decode())))
+
+    assert errors == ['BROKE1234B_job_tax_report.pdf']
+    failed = [row for row in rows if row['error']]
+    assert [row['filename'] for row in failed] == ['BROKE1234B_job_tax_report.pdf']
+    assert failed[0]['error'].startswith('KeyError')
+    assert all(int(row['bytes']) > 0 for row in rows if not row['error'])
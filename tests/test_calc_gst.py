@@ -0,0 +1,24 @@
+"""
+Vectorized GST totals over invoice registers.
+"""
+from calc_gst import _split_tax, calculate_gst_ledger
+
+
+def test_all_intra_state_lines_have_no_igst():
+    values = [0.1, 0.2, 0.3] * 1000
+    igst, cgst, sgst = _split_tax(values, [18] * len(values), ['Intra-State'] * len(values))
+    assert igst == 0.0
+    assert cgst == sgst > 0
+
+
+def test_inter_state_lines_are_summed_directly():
+    igst, cgst, sgst = _split_tax([1000, 500, 200], [18, 12, 5], [False, True, False])
+    assert igst == 1000 * 0.18 + 200 * 0.05
+    assert cgst == sgst == 500 * 0.12 / 2
+
+
+def test_ledger_sets_off_register_totals():
+    result = calculate_gst_ledger([100000], [18], ['Inter-State'],
+                                  [300000], [18], ['Intra-State'])
+    assert result['input_tax']['igst'] == 18000
+    assert result['output_tax']['cgst'] == result['output_tax']['sgst'] == 27000
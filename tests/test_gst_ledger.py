@@ -0,0 +1,157 @@
+"""
+The incrementally maintained GST period totals and ITC carry-forward ledger
+(database/gst_ledger.py) must always equal a full rebuild from the invoice
+ledger, whatever sequence of adds, amendments and deletions produced them.
+"""
+import random
+import sqlite3
+
+import pytest
+
+from database.gst_ledger import (add_invoice, amend_invoice, backfill_gst_totals, backfill_itc_ledger,
+                                 delete_invoice, period_summary)
+from database.migrations import migrate
+from db import get_pool
+
+BUSINESSES = (1, 2)
+PERIODS = [f'2024-{month:02d}' for month in range(1, 13)]
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'ledger.db')
+    migrate(conn)
+    conn.executemany("INSERT INTO businesses (id, person_id, business_name) VALUES (?, ?, ?)",
+                     [(business_id, business_id, f'Business {business_id}') for business_id in BUSINESSES])
+    yield conn
+    conn.close()
+
+
+def random_invoice(rng):
+    return dict(register=rng.choice(['purchase', 'sale']),
+                invoice_date=f"{rng.choice(PERIODS)}-{rng.randint(1, 28):02d}",
+                value=round(rng.uniform(1, 500000), 2), gst_rate=rng.choice([0, 5, 12, 18, 28]),
+                type_of_supply=rng.choice(['Intra-State', 'Inter-State']))
+
+
+def random_edits(conn, rng, steps):
+    """
+    Applies `steps` random adds, amendments and deletions, each in its own transaction.
+    """
+    ids = []
+    for n in range(steps):
+        cursor = conn.cursor()
+        with conn:
+            action = rng.random()
+            if not ids or action < 0.5:
+                ids.append(add_invoice(cursor, rng.choice(BUSINESSES), invoice_number=f'INV-{n}',
+                                       product_name='Widget', **random_invoice(rng)))
+            elif action < 0.85:
+                changes = random_invoice(rng)
+                keep = rng.sample(sorted(changes), rng.randint(1, len(changes)))
+                assert amend_invoice(cursor, rng.choice(ids), **{name: changes[name] for name in keep})
+            else:
+                assert delete_invoice(cursor, ids.pop(rng.randrange(len(ids))))
+
+
+def period_totals(conn):
+    # Periods emptied by deletions keep a zero row incrementally; a rebuild has none
+    rows = conn.execute("SELECT * FROM gst_period_totals WHERE invoices > 0 ORDER BY business_id, tax_period")
+    return [row[:3] + tuple(round(amount, 6) for amount in row[3:]) for row in rows]
+
+
+def itc_ledger(conn):
+    rows = conn.execute('''
+        SELECT l.* FROM gst_itc_ledger l JOIN gst_period_totals t USING (business_id, tax_period)
+        WHERE t.invoices > 0 ORDER BY l.business_id, l.tax_period
+    ''')
+    return [row[:2] + tuple(round(amount, 6) for amount in row[2:]) for row in rows]
+
+
+def summaries(conn):
+    def rounded(value):
+        if isinstance(value, dict):
+            return {key: rounded(item) for key, item in value.items()}
+        return round(value, 6) if isinstance(value, float) else value
+    return [rounded(period_summary(conn.cursor(), business_id, period))
+            for business_id in BUSINESSES for period in PERIODS]
+
+
+def snapshot(conn):
+    return period_totals(conn), itc_ledger(conn), summaries(conn)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_incremental_totals_and_itc_match_a_rebuild(ledger, seed):
+    random_edits(ledger, random.Random(seed), 200)
+    incremental = snapshot(ledger)
+    assert incremental[1], "no credit was carried"
+
+    with ledger:
+        backfill_gst_totals(ledger.cursor())
+        backfill_itc_ledger(ledger.cursor())
+    assert snapshot(ledger) == incremental
+
+
+def test_backdated_amendment_updates_later_opening_credit(ledger):
+    cursor = ledger.cursor()
+    with ledger:
+        purchase = add_invoice(cursor, 1, 'purchase', 'P-1', '2024-01-05', 'Stock', 100000, 18, 'Inter-State')
+        add_invoice(cursor, 1, 'sale', 'S-2', '2024-02-10', 'Widget', 20000, 18, 'Inter-State')
+        add_invoice(cursor, 1, 'sale', 'S-4', '2024-04-10', 'Widget', 20000, 18, 'Inter-State')
+    # 18,000 of January credit: 3,600 used in February, 3,600 in April
+    assert period_summary(cursor, 1, '2024-04')['itc']['brought_forward']['igst'] == pytest.approx(14400)
+
+    with ledger:
+        amend_invoice(cursor, purchase, value=50000)
+    february, march, april = (period_summary(cursor, 1, period) for period in ('2024-02', '2024-03', '2024-04'))
+    assert february['itc']['brought_forward']['igst'] == pytest.approx(9000)
+    # A month without invoices reads the credit carried out of February
+    assert march['itc']['brought_forward']['igst'] == pytest.approx(5400)
+    assert april['itc']['brought_forward']['igst'] == pytest.approx(5400)
+    assert april['itc']['carried_forward']['igst'] == pytest.approx(1800)
+    assert april['net_payable']['total'] == 0
+
+
+def test_summary_without_stored_itc_uses_the_previous_closing_credit(ledger):
+    cursor = ledger.cursor()
+    with ledger:
+        add_invoice(cursor, 1, 'purchase', 'P-1', '2024-01-05', 'Stock', 100000, 18, 'Inter-State')
+        add_invoice(cursor, 1, 'sale', 'S-2', '2024-02-10', 'Widget', 20000, 18, 'Inter-State')
+        ledger.execute("DELETE FROM gst_itc_ledger WHERE tax_period = '2024-02'")
+    assert period_summary(cursor, 1, '2024-02')['itc']['brought_forward']['igst'] == pytest.approx(18000)
+
+
+def test_amending_the_date_moves_the_invoice_between_periods(ledger):
+    cursor = ledger.cursor()
+    with ledger:
+        invoice_id = add_invoice(cursor, 1, 'sale', 'INV-1', '2024-01-15', 'Widget', 100000, 18, 'Intra-State')
+        assert amend_invoice(cursor, invoice_id, invoice_date='2024-03-02')
+    january, march = (period_summary(cursor, 1, period) for period in ('2024-01', '2024-03'))
+    assert january['invoices'] == 0 and january['output_tax']['total'] == 0
+    assert march['invoices'] == 1 and march['output_tax']['cgst'] == march['output_tax']['sgst'] == 9000
+
+
+def test_gst_api_only_serves_the_pans_own_business(app, client, query):
+    query("INSERT INTO people_info (id, name) VALUES (?, ?)", 701, 'GST owner')
+    query("INSERT INTO user_pan_mapping (pan_id, person_id) VALUES (?, ?)", 'GSTOW1234A', 701)
+    (first,), = query("INSERT INTO businesses (person_id, business_name) VALUES (?, ?) RETURNING id", 701, 'Shop')
+    (second,), = query("INSERT INTO businesses (person_id, business_name) VALUES (?, ?) RETURNING id", 701, 'Studio')
+    (other,), = query("INSERT INTO businesses (person_id, business_name) VALUES (?, ?) RETURNING id", 702, 'Not yours')
+    conn = get_pool(app).acquire()
+    try:
+        with conn:
+            add_invoice(conn.cursor(), second, 'sale', 'INV-1', '2024-07-10', 'Design', 100000, 18, 'Inter-State')
+    finally:
+        get_pool(app).release(conn)
+
+    with client.session_transaction() as sess:
+        sess['pan_id'] = 'GSTOW1234A'
+    # Each of the PAN's businesses gets its own summary
+    assert client.get(f'/api/gst/{first}/2024-07').get_json()['invoices'] == 0
+    summary = client.get(f'/api/gst/{second}/2024-07').get_json()
+    assert summary['invoices'] == 1 and summary['output_tax']['igst'] == 18000
+    # Someone else's business, a bad period or no session are all 404s
+    assert client.get(f'/api/gst/{other}/2024-07').status_code == 404
+    assert client.get(f'/api/gst/{second}/2024-13').status_code == 404
+    assert app.test_client().get(f'/api/gst/{second}/2024-07').status_code == 404
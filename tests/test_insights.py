@@ -0,0 +1,179 @@
+"""
+AI insights without the network: result pages render before the model
+answers, the background worker fills the row in, the poll endpoint only
+answers the owning PAN, and a saturated worker stores the fallback text.
+Near-identical results share one model call, which only sees bucketed figures.
+"""
+import re
+import threading
+import time
+
+import pytest
+
+from insights import INSIGHTS_UNAVAILABLE, RESULT_TABLES, FakeInsightClient, GeminiClient
+
+PENDING = "Generating your personalised tips..."
+
+
+class GatedClient(FakeInsightClient):
+    """
+    FakeInsightClient that holds every call until release() is called.
+    """
+
+    def __init__(self, text="Claim 80C in full."):
+        super().__init__(text)
+        self.gate = threading.Event()
+
+    def generate(self, prompt):
+        self.gate.wait(5)
+        return super().generate(prompt)
+
+    def release(self):
+        self.gate.set()
+
+
+@pytest.fixture
+def start_result(fill_result_session):
+    """
+    start_result(client, kind, pan_id, amount) fills the session and returns the response of the result page.
+    """
+    def start(client, kind, pan_id, amount=1000000):
+        fill_result_session(client, kind, pan_id, amount)
+        return client.get(f'/{kind}/result')
+    return start
+
+
+def poll_url(response):
+    match = re.search(r'/insights/(business|job)/(\d+)', response.get_data(as_text=True))
+    assert match, "result page has no insights poll URL"
+    return match.group(0), int(match.group(2))
+
+
+def wait_ready(client, url, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get(url).get_json()
+        if status['ready']:
+            return status
+        time.sleep(0.02)
+    pytest.fail(f"{url} never became ready")
+
+
+@pytest.mark.parametrize('kind', ['business', 'job'])
+def test_result_renders_before_insights_and_worker_fills_row(client, query, use_client, kind, start_result):
+    fake = use_client(GatedClient())
+    response = start_result(client, kind, f'FILLR{kind[0].upper()}1234A')
+    assert response.status_code == 200
+    assert PENDING in response.get_data(as_text=True)
+
+    url, result_id = poll_url(response)
+    # The model has not answered yet, so the row was saved without insights
+    assert query(f"SELECT insights FROM {RESULT_TABLES[kind]} WHERE id = ?", result_id) == [(None,)]
+    assert client.get(url).get_json() == {'ready': False, 'insights': ''}
+
+    fake.release()
+    assert wait_ready(client, url)['insights'] == fake.text
+    assert query(f"SELECT insights FROM {RESULT_TABLES[kind]} WHERE id = ?", result_id) == [(fake.text,)]
+    assert fake.calls == 1
+
+
+def test_insights_are_only_served_to_the_owning_pan(client, app, use_client, start_result):
+    fake = use_client(FakeInsightClient("Keep rent receipts."))
+    url, _ = poll_url(start_result(client, 'job', 'OWNER1234A', amount=1300000))
+    assert wait_ready(client, url)['insights'] == fake.text
+
+    other = app.test_client()
+    with other.session_transaction() as sess:
+        sess['pan_id'] = 'OTHER1234B'
+    assert other.get(url).status_code == 404
+    assert app.test_client().get(url).status_code == 404
+    assert client.get('/insights/nope/1').status_code == 404
+
+
+def test_saturated_worker_stores_unavailable(client, query, use_client, start_result):
+    fake = use_client(GatedClient(), INSIGHT_WORKERS=1, INSIGHT_MAX_PENDING=1)
+    try:
+        # Takes the only slot until the gate opens
+        first = start_result(client, 'business', 'BUSYA1234A')
+        assert PENDING in first.get_data(as_text=True)
+
+        second = start_result(client, 'job', 'BUSYB1234B', amount=2200000)
+        assert second.status_code == 200
+        assert INSIGHTS_UNAVAILABLE in second.get_data(as_text=True)
+        assert query("SELECT insights FROM tax_results_job WHERE pan_id = ? ORDER BY id DESC LIMIT 1",
+                     'BUSYB1234B') == [(INSIGHTS_UNAVAILABLE,)]
+    finally:
+        fake.release()
+
+
+class RecordingClient(GatedClient):
+    """
+    GatedClient that also keeps every prompt it was sent.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        return super().generate(prompt)
+
+
+def test_identical_results_share_one_model_call(app, client, query, use_client, start_result):
+    fake = use_client(RecordingClient())
+    urls = []
+    for n in range(3):
+        # 10,00,000, 10,00,200 and 10,00,400 bucket to the same insight key
+        response = start_result(app.test_client(), 'job', f'FLIGHT{n}234A', amount=1000000 + n * 200)
+        urls.append(poll_url(response)[0])
+
+    fake.release()
+    for url in urls:
+        with client.session_transaction() as sess:
+            sess['pan_id'] = query("SELECT pan_id FROM tax_results_job WHERE id = ?", int(url.rsplit('/', 1)[1]))[0][0]
+        assert wait_ready(client, url)['insights'] == fake.text
+    assert fake.calls == 1
+
+
+class EchoClient(RecordingClient):
+    """
+    RecordingClient whose insight text quotes the prompt, the way a model repeats the figures it was given.
+    """
+
+    def generate(self, prompt):
+        super().generate(prompt)
+        return f"Based on: {prompt}"
+
+
+def test_shared_insights_never_quote_another_filers_figures(app, client, query, use_client, start_result):
+    fake = use_client(EchoClient())
+    fake.release()
+    url, _ = poll_url(start_result(client, 'job', 'LEAKA1234A', amount=1234567))
+    first = wait_ready(client, url)['insights']
+
+    # Same bucket, different filer: served from the cache without a new call
+    other = app.test_client()
+    response = start_result(other, 'job', 'LEAKB1234B', amount=1187654)
+    assert fake.calls == 1
+    shared = response.get_data(as_text=True)
+    assert query("SELECT insights FROM tax_results_job WHERE pan_id = ?", 'LEAKB1234B') == [(first,)]
+
+    # The model only ever saw bucketed figures (12,00,000), never either filer's own
+    assert "₹1,200,000.00" in fake.prompts[0]
+    for figure in ("1,234,567", "1,187,654"):
+        assert figure not in fake.prompts[0]
+        assert figure not in first
+    assert "1,234,567" not in shared
+
+
+def test_gemini_calls_have_a_request_timeout():
+    class Model:
+        def generate_content(self, prompt, request_options=None):
+            self.request_options = request_options
+            return type('Response', (), {'text': "tip"})()
+
+    client = GeminiClient('key', timeout=7.5)
+    client.model = Model()
+    assert client.generate("prompt") == "tip"
+    assert client.model.request_options == {'timeout': 7.5}
@@ -0,0 +1,37 @@
+"""
+Login holds no pooled database connection while the password is verified,
+and still upgrades hashes stored with older cost settings.
+"""
+from werkzeug.security import generate_password_hash
+
+from db import get_pool
+from passwords import get_password_hasher
+
+
+def test_login_verifies_without_holding_a_connection(app, client, query, monkeypatch):
+    query("INSERT INTO user (PAN_ID, Password) VALUES (?, ?)", 'LOGIN1234A', generate_password_hash('pw', 'pbkdf2:sha256:1000'))
+    pool = get_pool(app)
+    outstanding = []
+    acquire, release = pool.acquire, pool.release
+    monkeypatch.setattr(pool, 'acquire', lambda: outstanding.append(1) or acquire())
+    monkeypatch.setattr(pool, 'release', lambda conn: outstanding.pop() and release(conn))
+
+    hasher = get_password_hasher(app)
+    held = []
+    verify = hasher._verify
+    monkeypatch.setattr(hasher, '_verify', lambda *args: held.append(len(outstanding)) or verify(*args))
+
+    response = client.post('/login', data={'PAN': 'LOGIN1234A', 'pass': 'pw'})
+    assert response.status_code == 302 and response.headers['Location'].endswith('/dashboard')
+    assert held == [0]
+    assert outstanding == []
+    # The pbkdf2 hash was upgraded to the configured method after verifying
+    (stored,), = query("SELECT Password FROM user WHERE PAN_ID = ?", 'LOGIN1234A')
+    assert not hasher.needs_rehash(stored)
+
+
+def test_wrong_password_is_rejected(client, query):
+    query("INSERT INTO user (PAN_ID, Password) VALUES (?, ?)", 'LOGIN1234B', generate_password_hash('pw', 'pbkdf2:sha256:1000'))
+    response = client.post('/login', data={'PAN': 'LOGIN1234B', 'pass': 'nope'})
+    assert response.headers['Location'].endswith('/signup')
+    assert client.post('/login', data={'PAN': 'NOUSR1234C', 'pass': 'pw'}).headers['Location'].endswith('/signup')
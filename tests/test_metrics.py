@@ -0,0 +1,57 @@
+"""
+/metrics is only served to scrapers that present METRICS_TOKEN, and counts
+requests whose view raised as 500s.
+"""
+import re
+
+import pytest
+
+from metrics import REGISTRY
+
+
+@pytest.fixture
+def metrics_token(app):
+    saved = app.config.get('METRICS_TOKEN')
+    app.config['METRICS_TOKEN'] = 's3cret'
+    yield 's3cret'
+    app.config['METRICS_TOKEN'] = saved
+
+
+def test_metrics_hidden_without_configured_token(client, app):
+    app.config['METRICS_TOKEN'] = None
+    assert client.get('/metrics').status_code == 404
+    assert client.get('/metrics', headers={'Authorization': 'Bearer '}).status_code == 404
+
+
+def test_metrics_require_the_bearer_token(client, metrics_token):
+    assert client.get('/metrics').status_code == 404
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 404
+    assert client.get('/metrics', headers={'Authorization': f'Basic {metrics_token}'}).status_code == 404
+
+    response = client.get('/metrics', headers={'Authorization': f'Bearer {metrics_token}'})
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds' in response.get_data(as_text=True)
+
+
+def request_count(route, status):
+    rendered = REGISTRY.render()
+    match = re.search(rf'^http_request_duration_seconds_count\{{method="GET",route="{re.escape(route)}",status="{status}"\}} (\d+)$',
+                      rendered, re.MULTILINE)
+    return int(match.group(1)) if match else 0
+
+
+@pytest.mark.parametrize('propagate', [False, True])
+def test_failing_views_are_recorded_as_500(client, app, monkeypatch, propagate):
+    def broken():
+        raise RuntimeError("view failed")
+
+    monkeypatch.setitem(app.view_functions, 'landing', broken)
+    monkeypatch.setitem(app.config, 'PROPAGATE_EXCEPTIONS', propagate)
+    before = request_count('/', 500)
+    if propagate:
+        # after_request never runs when the exception propagates to the server
+        with pytest.raises(RuntimeError):
+            client.get('/')
+    else:
+        assert client.get('/').status_code == 500
+    assert request_count('/', 500) == before + 1
@@ -0,0 +1,27 @@
+"""
+Every hot query (database/migrations.py HOT_QUERIES) must use an index on a
+freshly migrated database, the same check as `python database/migrations.py --check`.
+"""
+import sqlite3
+
+from database.migrations import LATEST_VERSION, check_query_plans, get_version, migrate
+
+
+def test_hot_queries_use_indexes(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'plans.db')
+    try:
+        migrate(conn)
+        assert get_version(conn) == LATEST_VERSION
+        assert check_query_plans(conn) == []
+    finally:
+        conn.close()
+
+
+def test_check_flags_a_full_scan(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'plans.db')
+    try:
+        migrate(conn)
+        sql = "SELECT id FROM invoices WHERE invoice_date = ?"
+        assert check_query_plans(conn, [(sql, ('X',))]) == [(sql, 'SCAN invoices')]
+    finally:
+        conn.close()
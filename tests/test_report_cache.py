@@ -0,0 +1,20 @@
+"""
+ReportCache disk accounting.
+"""
+from report_cache import ReportCache
+
+
+def test_rewriting_a_key_does_not_double_count(tmp_path):
+    cache = ReportCache(str(tmp_path), max_disk_bytes=10000)
+    cache.put('a', b'x' * 400)
+    cache.put('a', b'y' * 300)
+    cache.put('b', b'z' * 500)
+    assert cache._disk_bytes == 800 == sum(p.stat().st_size for p in tmp_path.iterdir())
+
+
+def test_trims_oldest_when_over_limit(tmp_path):
+    cache = ReportCache(str(tmp_path), max_memory_bytes=0, max_disk_bytes=1000)
+    cache.put('a', b'x' * 600)
+    cache.put('b', b'y' * 600)
+    assert cache.get('b') == b'y' * 600
+    assert cache._disk_bytes <= 1000